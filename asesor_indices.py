@@ -0,0 +1,309 @@
+# asesor_indices.py
+"""Asesor de índices: corre EXPLAIN ANALYZE sobre las consultas y propone índices.
+
+    python asesor_indices.py                       # consultas 1-15 + búsquedas leer_*(campo=...)
+    python asesor_indices.py --consultas 4,11,14 --sin-busquedas
+    python asesor_indices.py --salida asesor.json
+
+Pensado para una base local poblada (p.ej. con `python -m benchmark generar`):
+EXPLAIN ANALYZE ejecuta de verdad cada sentencia y cada candidato se prueba creando
+el índice, midiendo de nuevo y borrándolo. Necesita MySQL 8.0.18+ y permiso de
+CREATE/DROP INDEX. No deja cambios: las propuestas se imprimen como CREATE INDEX.
+"""
+import argparse
+import hashlib
+import json
+import re
+import statistics
+import sys
+from typing import Any, Dict, Iterable, List, Tuple
+
+from mysql.connector import Error
+
+import instrumentacion
+import reportes
+import resumenes
+from conecction import get_db_connection
+from cruds import _sql_leer_tabla
+
+# Parámetros de las consultas que los piden (los mismos del benchmark).
+PARAMETROS_CONSULTAS = {
+    1: {'id_club': 1},
+    3: {'termino': 'sombra viento'},
+    4: {'ciudad': 'Medellín', 'filtro_club': 'Club'},
+}
+
+# Tablas con leer_*(campo=..., valor=...); la columna se elige en tiempo de ejecución.
+TABLAS_BUSQUEDA = ('usuario', 'libro', 'club_lectura')
+
+# Índices que se prueban siempre: (tabla, columnas, motivo). Las columnas extra al
+# final los vuelven "covering" para la consulta que los motiva.
+CANDIDATOS = (
+    ('usuario', ('ciudad', 'nombre'),
+     "consulta 4 filtra por ciudad y ordena por nombre"),
+    ('reunion', ('fecha_reunion',),
+     "consulta 11 filtra fecha_reunion >= NOW() sin id_club (idx_reunion_club_fecha no sirve)"),
+    ('orden_compra', ('id_libro', 'estado_orden', 'precio_total'),
+     "ventas por libro: verificación de resumen_ventas_libro (y la consulta 6 original)"),
+    ('leer_libros', ('id_libro', 'fecha_fin', 'id_usuario'),
+     "consulta 14 une por id_libro con fecha_fin IS NULL y cuenta id_usuario"),
+    ('leer_libros', ('id_club', 'fecha_fin', 'id_libro'),
+     "consulta 12 une por id_club con fecha_fin IS NULL y cuenta id_libro"),
+    ('intercambio', ('estado_intercambio', 'id_usuario_propone'),
+     "consulta 8 filtra por estado y agrupa por quien propone"),
+)
+
+REPETICIONES = 3
+_TIPOS_SIN_INDICE = ('text', 'tinytext', 'mediumtext', 'longtext', 'blob', 'json')
+
+_RE_TIEMPO = re.compile(r"actual time=[\d.]+\.\.([\d.]+) rows=[\d.]+ loops=(\d+)")
+_RE_TABLE_SCAN = re.compile(r"Table scan on (\w+)")
+_RE_INDEX_SCAN = re.compile(r"Index scan on (\w+) using (\w+)")
+_RE_TABLAS = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_PALABRAS_SQL = {'on', 'where', 'join', 'left', 'right', 'inner', 'group', 'order', 'limit', 'using', 'natural'}
+
+
+# ----------------------------------------------------------------------
+# CARGA DE TRABAJO
+# ----------------------------------------------------------------------
+
+def _capturar_consultas(numeros: Iterable[int]) -> List[Dict[str, Any]]:
+    """Ejecuta cada consulta una vez y guarda las sentencias que mandó a la base."""
+    sentencias = []
+    for numero in numeros:
+        titulo, funcion = reportes.REPORTES[numero]
+        with instrumentacion.capturar() as capturadas:
+            resultado = funcion(**PARAMETROS_CONSULTAS.get(numero, {}))
+            if not isinstance(resultado, list):
+                list(resultado)
+        for i, (query, params) in enumerate(capturadas, 1):
+            nombre = f"consulta {numero}" + (f".{i}" if len(capturadas) > 1 else "")
+            sentencias.append({'nombre': nombre, 'titulo': titulo, 'query': query, 'params': params})
+    for tabla, query in resumenes._VERIFICACIONES.items():
+        sentencias.append({'nombre': f"verificación {tabla}", 'titulo': "resumenes.py --verificar",
+                           'query': query, 'params': None})
+    return sentencias
+
+
+def _columnas_busqueda(cursor, tabla: str) -> List[str]:
+    cursor.execute("""SELECT COLUMN_NAME FROM information_schema.COLUMNS
+                      WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND DATA_TYPE NOT IN (%s, %s, %s, %s, %s, %s)
+                      ORDER BY ORDINAL_POSITION""", (tabla,) + _TIPOS_SIN_INDICE)
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def _sentencias_busqueda(cursor) -> List[Dict[str, Any]]:
+    """Una búsqueda leer_*(campo=valor) por columna, con un valor que exista en la tabla."""
+    sentencias = []
+    for tabla in TABLAS_BUSQUEDA:
+        for campo in _columnas_busqueda(cursor, tabla):
+            cursor.execute(f"SELECT {campo} FROM {tabla} WHERE {campo} IS NOT NULL LIMIT 1")
+            fila = cursor.fetchone()
+            cursor.fetchall()
+            if fila is None:
+                continue
+            query, params = _sql_leer_tabla(tabla, [f"{campo} = %s"], [fila[0]])
+            sentencias.append({'nombre': f"leer {tabla}({campo}=...)", 'titulo': "búsqueda dinámica",
+                               'query': query, 'params': params, 'busqueda': (tabla, campo)})
+    return sentencias
+
+
+def _tablas(query: str) -> Dict[str, str]:
+    """alias -> tabla de las tablas nombradas en FROM/JOIN."""
+    alias = {}
+    for tabla, nombre in _RE_TABLAS.findall(query):
+        if nombre and nombre.lower() not in _PALABRAS_SQL:
+            alias[nombre] = tabla
+        alias[tabla] = tabla
+    return alias
+
+
+# ----------------------------------------------------------------------
+# MEDICIÓN
+# ----------------------------------------------------------------------
+
+def _analizar(cursor, query: str, params) -> Dict[str, Any]:
+    """Mediana de REPETICIONES corridas de EXPLAIN ANALYZE, costo estimado y problemas del plan."""
+    sql = query.strip().rstrip(';')
+    cursor.execute("EXPLAIN FORMAT=JSON " + sql, params)
+    plan_json = json.loads(cursor.fetchone()[0])
+    cursor.fetchall()
+    costo = float(plan_json.get('query_block', {}).get('cost_info', {}).get('query_cost', 0) or 0)
+
+    tiempos = []
+    plan = ''
+    for _ in range(REPETICIONES):
+        cursor.execute("EXPLAIN ANALYZE " + sql, params)
+        plan = cursor.fetchone()[0]
+        cursor.fetchall()
+        raiz = _RE_TIEMPO.search(plan)
+        tiempos.append(float(raiz.group(1)) * int(raiz.group(2)) if raiz else 0.0)
+    return {'ms': round(statistics.median(tiempos), 3), 'costo': round(costo, 2),
+            'problemas': _problemas(plan, _tablas(query)), 'plan': plan}
+
+
+def _problemas(plan: str, alias: Dict[str, str]) -> List[str]:
+    problemas = []
+    for nombre in _RE_TABLE_SCAN.findall(plan):
+        if nombre != 'temporary':
+            problemas.append(f"full scan: {alias.get(nombre, nombre)}")
+    for nombre, indice in _RE_INDEX_SCAN.findall(plan):
+        problemas.append(f"full index scan: {alias.get(nombre, nombre)}.{indice}")
+    if re.search(r"-> Sort\b|Sort row IDs", plan):
+        problemas.append("filesort")
+    if '<temporary>' in plan or 'temporary table' in plan or 'Materialize' in plan:
+        problemas.append("tabla temporal")
+    return sorted(set(problemas))
+
+
+def _medir(cursor, sentencias: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    medidas = {}
+    for s in sentencias:
+        try:
+            medidas[s['nombre']] = _analizar(cursor, s['query'], s['params'])
+        except (Error, ValueError, TypeError) as e:
+            print(f"❌ Error DB analizando {s['nombre']}: {e}")
+    return medidas
+
+
+# ----------------------------------------------------------------------
+# CANDIDATOS
+# ----------------------------------------------------------------------
+
+def _indices_existentes(cursor) -> Dict[str, List[Tuple[str, ...]]]:
+    cursor.execute("""SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+                      WHERE TABLE_SCHEMA = DATABASE() ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX""")
+    indices: Dict[Tuple[str, str], List[str]] = {}
+    for tabla, indice, columna in cursor.fetchall():
+        indices.setdefault((tabla, indice), []).append(columna)
+    existentes: Dict[str, List[Tuple[str, ...]]] = {}
+    for (tabla, _), columnas in indices.items():
+        existentes.setdefault(tabla, []).append(tuple(columnas))
+    return existentes
+
+
+def _candidatos(sentencias: List[Dict[str, Any]], antes: Dict[str, Dict[str, Any]],
+                existentes: Dict[str, List[Tuple[str, ...]]]) -> List[Dict[str, Any]]:
+    """CANDIDATOS más un índice por cada búsqueda dinámica que hace full scan.
+
+    Se descartan los que ya son prefijo de un índice existente.
+    """
+    propuestos = [{'tabla': t, 'columnas': c, 'motivo': m} for t, c, m in CANDIDATOS]
+    for s in sentencias:
+        medida = antes.get(s['nombre'])
+        if 'busqueda' in s and medida and any(p.startswith('full scan') for p in medida['problemas']):
+            tabla, campo = s['busqueda']
+            propuestos.append({'tabla': tabla, 'columnas': (campo,), 'motivo': f"{s['nombre']} hace full scan"})
+
+    vistos, resultado = set(), []
+    for c in propuestos:
+        clave = (c['tabla'], c['columnas'])
+        cubierto = any(indice[:len(c['columnas'])] == c['columnas'] for indice in existentes.get(c['tabla'], ()))
+        if clave in vistos or cubierto:
+            continue
+        vistos.add(clave)
+        resultado.append(c)
+    return resultado
+
+
+def _nombre_indice(tabla: str, columnas: Tuple[str, ...]) -> str:
+    huella = hashlib.md5(f"{tabla}({','.join(columnas)})".encode()).hexdigest()[:8]
+    return f"adv_{tabla[:40]}_{huella}"
+
+
+def _probar(cursor, candidato: Dict[str, Any], sentencias: List[Dict[str, Any]],
+            antes: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Crea el índice, vuelve a medir las sentencias que usan la tabla y lo borra."""
+    tabla, columnas = candidato['tabla'], candidato['columnas']
+    afectadas = [s for s in sentencias if s['nombre'] in antes and tabla in _tablas(s['query']).values()]
+    indice = _nombre_indice(tabla, columnas)
+    cursor.execute(f"CREATE INDEX {indice} ON {tabla} ({', '.join(columnas)})")
+    try:
+        despues = _medir(cursor, afectadas)
+    finally:
+        cursor.execute(f"DROP INDEX {indice} ON {tabla}")
+
+    detalle = []
+    for s in afectadas:
+        if s['nombre'] not in despues:
+            continue
+        a, d = antes[s['nombre']], despues[s['nombre']]
+        detalle.append({
+            'sentencia': s['nombre'],
+            'antes_ms': a['ms'], 'despues_ms': d['ms'],
+            'antes_costo': a['costo'], 'despues_costo': d['costo'],
+            'problemas_antes': a['problemas'], 'problemas_despues': d['problemas'],
+        })
+    return dict(candidato,
+                sql=f"CREATE INDEX idx_{tabla}_{'_'.join(columnas)} ON {tabla} ({', '.join(columnas)});",
+                ahorro_ms=round(sum(x['antes_ms'] - x['despues_ms'] for x in detalle), 3),
+                ahorro_costo=round(sum(x['antes_costo'] - x['despues_costo'] for x in detalle), 2),
+                sentencias=detalle)
+
+
+# ----------------------------------------------------------------------
+# ASESOR
+# ----------------------------------------------------------------------
+
+def asesorar(numeros: Iterable[int] = range(1, 16), busquedas: bool = True) -> Dict[str, Any]:
+    """Mide la carga, prueba cada candidato y retorna las propuestas ordenadas por ahorro."""
+    sentencias = _capturar_consultas(numeros)
+
+    conn = get_db_connection()
+    if not conn:
+        raise Error(msg="No se pudo obtener una conexión para el asesor")
+    cursor = conn.cursor()
+    try:
+        if busquedas:
+            sentencias += _sentencias_busqueda(cursor)
+        antes = _medir(cursor, sentencias)
+        existentes = _indices_existentes(cursor)
+        propuestas = []
+        for candidato in _candidatos(sentencias, antes, existentes):
+            try:
+                propuestas.append(_probar(cursor, candidato, sentencias, antes))
+            except Error as e:
+                print(f"❌ Error DB probando {candidato['tabla']}{candidato['columnas']}: {e}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    propuestas.sort(key=lambda p: (p['ahorro_ms'], p['ahorro_costo']), reverse=True)
+    return {
+        'sentencias': [{'nombre': s['nombre'], 'titulo': s['titulo'], **antes[s['nombre']]}
+                       for s in sentencias if s['nombre'] in antes],
+        'propuestas': propuestas,
+    }
+
+
+def imprimir_informe(informe: Dict[str, Any]):
+    print("\n=== PLANES ACTUALES ===")
+    for s in informe['sentencias']:
+        problemas = ', '.join(s['problemas']) or 'ok'
+        print(f"{s['nombre']:<40} {s['ms']:>10.2f} ms  costo {s['costo']:>12,.1f}  {problemas}")
+
+    print("\n=== ÍNDICES PROPUESTOS (mayor ahorro primero) ===")
+    utiles = [p for p in informe['propuestas'] if p['ahorro_ms'] > 0]
+    if not utiles:
+        print("ℹ️ Ningún candidato mejoró las sentencias medidas.")
+    for i, p in enumerate(utiles, 1):
+        print(f"{i:>2}. {p['sql']}")
+        print(f"    {p['motivo']}; ahorro {p['ahorro_ms']:.2f} ms, costo {p['ahorro_costo']:,.1f}")
+        for x in p['sentencias']:
+            print(f"      {x['sentencia']:<38} {x['antes_ms']:>9.2f} -> {x['despues_ms']:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Propone índices a partir de EXPLAIN ANALYZE.")
+    parser.add_argument("--consultas", default="1-15", help="p.ej. 1-15 o 4,11,14")
+    parser.add_argument("--sin-busquedas", action="store_true", help="No medir las búsquedas leer_*(campo=...).")
+    parser.add_argument("--salida", help="Archivo JSON con planes y propuestas.")
+    args = parser.parse_args()
+
+    informe = asesorar(reportes.rango_consultas(args.consultas), busquedas=not args.sin_busquedas)
+    imprimir_informe(informe)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False, default=str)
+        print(f"✅ Informe guardado en {args.salida}")
+    sys.exit(0 if informe['sentencias'] else 1)
@@ -0,0 +1,6 @@
+"""Generador de datos sintéticos y benchmark de consultas y CRUDs.
+
+    python -m benchmark generar --escala 10k
+    python -m benchmark medir --salida resultados.json
+    python -m benchmark comparar base.json nuevo.json
+"""
@@ -0,0 +1,59 @@
+# benchmark/__main__.py
+import argparse
+import json
+import sys
+
+import reportes
+from benchmark import ejecutor, generador
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark",
+                                     description="Datos sintéticos y benchmark del esquema.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_gen = sub.add_parser("generar", help="Carga datos sintéticos en una base vacía.")
+    p_gen.add_argument("--escala", default="10k", choices=list(generador.ESCALAS))
+    p_gen.add_argument("--semilla", type=int, default=42)
+    p_gen.add_argument("--chunk", type=int, default=1000)
+
+    p_med = sub.add_parser("medir", help="Mide las consultas y los CRUDs.")
+    p_med.add_argument("--consultas", default="1-15", help="p.ej. 1-15 o 2,5,9")
+    p_med.add_argument("--sin-crud", action="store_true")
+    p_med.add_argument("--repeticiones", type=int, default=20)
+    p_med.add_argument("--calentamiento", type=int, default=3)
+    p_med.add_argument("--con-cache", action="store_true",
+                       help="No vaciar la caché de entidades entre ejecuciones.")
+    p_med.add_argument("--salida", default="resultados.json")
+
+    p_cmp = sub.add_parser("comparar", help="Compara dos archivos de resultados.")
+    p_cmp.add_argument("base")
+    p_cmp.add_argument("nuevo")
+    p_cmp.add_argument("--metrica", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms", "media_ms"])
+    p_cmp.add_argument("--umbral", type=float, default=1.2)
+
+    args = parser.parse_args(argv)
+
+    if args.comando == "generar":
+        resultado = generador.generar(args.escala, args.semilla, args.chunk)
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return 0
+
+    if args.comando == "medir":
+        ejecutor.ejecutar(reportes.rango_consultas(args.consultas), not args.sin_crud, args.repeticiones,
+                          args.calentamiento, args.con_cache, args.salida)
+        print(f"✅ Resultados guardados en {args.salida}")
+        return 0
+
+    filas = ejecutor.comparar(args.base, args.nuevo, args.metrica, args.umbral)
+    regresiones = 0
+    for f in filas:
+        marca = "❌" if f['regresion'] else "  "
+        razon = f"{f['razon']:.2f}x" if f['razon'] is not None else "   -"
+        print(f"{marca} {f['nombre']:<28} {f['base']:>10.2f} -> {f['nuevo']:>10.2f} ms  {razon}")
+        regresiones += f['regresion']
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
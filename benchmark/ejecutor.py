@@ -0,0 +1,199 @@
+# benchmark/ejecutor.py
+"""Mide las 15 consultas y los caminos CRUD con calentamiento y repeticiones."""
+import json
+import math
+import platform
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import reportes
+from conecction import pool_stats
+from cruds import (
+    execute_query, entity_cache,
+    crear_usuario, leer_usuarios, actualizar_usuario, borrar_usuario,
+    crear_libro, leer_libros, actualizar_libro, borrar_libro,
+    leer_clubes, leer_pagina,
+)
+
+# Parámetros fijos de las consultas que los piden (existen en cualquier escala generada).
+# Los ids se toman de la base (ver _muestras): no necesariamente empiezan en 1.
+PARAMETROS_CONSULTAS = {
+    3: {'termino': 'sombra viento'},
+    4: {'ciudad': 'Medellín', 'filtro_club': 'Club'},
+}
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano (p en 0-100)."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    rango = max(1, math.ceil(p / 100 * len(ordenados)))
+    return ordenados[rango - 1]
+
+
+def _contar_filas(resultado) -> int:
+    if isinstance(resultado, list):
+        return len(resultado)
+    if isinstance(resultado, tuple) and resultado and isinstance(resultado[0], list):
+        return len(resultado[0])  # (filas, cursor) de leer_pagina
+    return 1 if resultado not in (None, -1) else 0
+
+
+def medir(nombre: str, funcion: Callable[[], Any], repeticiones: int = 20, calentamiento: int = 3,
+          preparar: Optional[Callable[[], None]] = None) -> Dict[str, Any]:
+    """Ejecuta `funcion` calentamiento + repeticiones veces y resume las latencias.
+
+    `preparar` corre antes de cada ejecución sin contar en el tiempo (p.ej. vaciar la caché).
+    """
+    for _ in range(calentamiento):
+        if preparar:
+            preparar()
+        funcion()
+
+    tiempos = []
+    filas = 0
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+        filas += _contar_filas(resultado)
+
+    total = sum(tiempos)
+    return {
+        'nombre': nombre,
+        'repeticiones': repeticiones,
+        'p50_ms': round(percentil(tiempos, 50) * 1000, 3),
+        'p95_ms': round(percentil(tiempos, 95) * 1000, 3),
+        'p99_ms': round(percentil(tiempos, 99) * 1000, 3),
+        'media_ms': round(total / repeticiones * 1000, 3) if repeticiones else 0.0,
+        'filas': filas,
+        'filas_por_s': round(filas / total, 1) if total else None,
+    }
+
+
+def _muestras() -> Dict[str, Any]:
+    """Primer usuario (id y email), libro y club de la base generada."""
+    usuario = execute_query("SELECT id_usuario, email FROM usuario ORDER BY id_usuario LIMIT 1",
+                            commit=False, fetch_one=True)
+    libro = execute_query("SELECT MIN(id_libro) AS id FROM libro", commit=False, fetch_one=True)
+    club = execute_query("SELECT MIN(id_club) AS id FROM club_lectura", commit=False, fetch_one=True)
+    if not usuario or not libro or libro['id'] is None or not club or club['id'] is None:
+        raise RuntimeError("La base no tiene datos; corra antes `python -m benchmark generar`.")
+    return {'id_usuario': usuario['id_usuario'], 'email': usuario['email'],
+            'id_libro': libro['id'], 'id_club': club['id']}
+
+
+def _casos_consultas(numeros: Iterable[int], muestras: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    casos = {}
+    for numero in numeros:
+        titulo, funcion = reportes.REPORTES[numero]
+        params = PARAMETROS_CONSULTAS.get(numero, {})
+        if numero == 1:
+            params = {'id_club': muestras['id_club']}
+        casos[f"consulta_{numero}"] = (lambda f=funcion, p=params: f(**p))
+    return casos
+
+
+def _casos_crud(muestras: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    """Caminos CRUD; los que escriben dejan la base como estaba."""
+    contador = {'n': 0}
+
+    def ciclo_usuario():
+        contador['n'] += 1
+        email = f"bench.crud.{time.time_ns()}.{contador['n']}@bench.local"
+        user_id = crear_usuario("Bench CRUD", email, 'bench', 'Bogotá', '3000000000')
+        leer_usuarios(campo='id_usuario', valor=user_id)
+        actualizar_usuario(user_id, ciudad='Cali')
+        return borrar_usuario(user_id)
+
+    def ciclo_libro():
+        id_libro = crear_libro("Bench CRUD", "Autor", muestras['id_usuario'])
+        leer_libros(campo='id_libro', valor=id_libro)
+        actualizar_libro(id_libro, genero='Ensayo')
+        return borrar_libro(id_libro)
+
+    return {
+        'crud_ciclo_usuario': ciclo_usuario,
+        'crud_ciclo_libro': ciclo_libro,
+        'leer_usuario_por_id': lambda: leer_usuarios(campo='id_usuario', valor=muestras['id_usuario']),
+        'leer_usuario_por_email': lambda: leer_usuarios(campo='email', valor=muestras['email']),
+        'leer_libro_por_id': lambda: leer_libros(campo='id_libro', valor=muestras['id_libro']),
+        'leer_club_por_id': lambda: leer_clubes(campo='id_club', valor=muestras['id_club']),
+        'leer_pagina_libros': lambda: leer_pagina('libro', limit=50),
+        'leer_pagina_reuniones': lambda: leer_pagina('reunion', limit=50),
+        'leer_libros_stream_10k': lambda: sum(1 for _ in _primeras(leer_libros(stream=True), 10_000)),
+    }
+
+
+def _primeras(filas: Iterable, n: int):
+    for i, fila in enumerate(filas):
+        if i >= n:
+            filas.close()
+            break
+        yield fila
+
+
+def _conteos() -> Dict[str, int]:
+    conteos = {}
+    for tabla in ('usuario', 'libro', 'club_lectura', 'usuario_club', 'resena', 'orden_compra',
+                  'intercambio', 'leer_libros', 'reunion'):
+        fila = execute_query(f"SELECT COUNT(*) AS n FROM {tabla}", commit=False, fetch_one=True)
+        conteos[tabla] = fila['n'] if fila else None
+    return conteos
+
+
+def ejecutar(consultas: Iterable[int] = range(1, 16), incluir_crud: bool = True, repeticiones: int = 20,
+             calentamiento: int = 3, con_cache: bool = False, salida: Optional[str] = None) -> Dict[str, Any]:
+    """Mide consultas y CRUDs y (opcionalmente) guarda el resultado en JSON.
+
+    Con con_cache=False se vacía la caché de entidades antes de cada ejecución, así
+    las lecturas por id miden el camino a MySQL.
+    """
+    preparar = None if con_cache else entity_cache.clear
+    muestras = _muestras()
+    casos = _casos_consultas(consultas, muestras)
+    if incluir_crud:
+        casos.update(_casos_crud(muestras))
+
+    resultados = {}
+    for nombre, funcion in casos.items():
+        resultados[nombre] = medir(nombre, funcion, repeticiones, calentamiento, preparar)
+        r = resultados[nombre]
+        print(f"  {nombre:<28} p50 {r['p50_ms']:>9.2f} ms  p95 {r['p95_ms']:>9.2f} ms  "
+              f"p99 {r['p99_ms']:>9.2f} ms  {r['filas_por_s'] or 0:>10.0f} filas/s")
+
+    informe = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'repeticiones': repeticiones,
+        'calentamiento': calentamiento,
+        'con_cache': con_cache,
+        'conteos': _conteos(),
+        'pool': pool_stats(),
+        'resultados': resultados,
+    }
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False, default=str)
+    return informe
+
+
+def comparar(base: str, nuevo: str, metrica: str = 'p95_ms', umbral: float = 1.2) -> List[Dict[str, Any]]:
+    """Compara dos archivos de resultados; marca regresión si nuevo/base > umbral."""
+    with open(base, encoding='utf-8') as f:
+        a = json.load(f)['resultados']
+    with open(nuevo, encoding='utf-8') as f:
+        b = json.load(f)['resultados']
+
+    filas = []
+    for nombre in sorted(set(a) & set(b)):
+        antes, despues = a[nombre][metrica], b[nombre][metrica]
+        razon = despues / antes if antes else None
+        filas.append({'nombre': nombre, 'base': antes, 'nuevo': despues,
+                      'razon': round(razon, 3) if razon is not None else None,
+                      'regresion': razon is not None and razon > umbral})
+    return filas
@@ -0,0 +1,298 @@
+# benchmark/generador.py
+"""Datos sintéticos con integridad referencial para medir el esquema a escala.
+
+Los ids "populares" son los más bajos: _sesgado() concentra las reseñas, órdenes y
+clubes en pocos libros, como pasa con un catálogo real. Todo es determinista dada la
+semilla, así dos corridas con la misma escala cargan exactamente los mismos datos.
+"""
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+from cruds import (
+    execute_query,
+    crear_usuario_bulk, crear_libro_bulk, crear_club_bulk, crear_usuario_club_bulk,
+    crear_resena_bulk, crear_orden_bulk, crear_intercambio_bulk, crear_leer_libros_bulk,
+    crear_reunion_bulk,
+)
+
+# Escala = cantidad de usuarios; el resto de tablas se deriva con PROPORCIONES.
+ESCALAS = {
+    '1k': 1_000,
+    '10k': 10_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000,
+}
+
+PROPORCIONES = {
+    'libros_por_usuario': 2.0,
+    'clubes_por_usuario': 0.01,
+    'miembros_por_club': 20,
+    'lecturas_por_miembro': 0.6,
+    'reuniones_por_club': 4,
+    'resenas_por_usuario': 3.0,
+    'ordenes_por_usuario': 0.8,
+    'intercambios_por_usuario': 0.3,
+}
+
+CIUDADES = ['Bogotá', 'Medellín', 'Cali', 'Barranquilla', 'Cartagena', 'Bucaramanga', 'Pereira',
+            'Manizales', 'Santa Marta', 'Pasto', 'Ibagué', 'Cúcuta']
+PESOS_CIUDADES = [30, 20, 12, 8, 6, 5, 4, 4, 3, 3, 3, 2]
+
+PALABRAS_TITULO = ['sombra', 'viento', 'amor', 'tiempo', 'guerra', 'noche', 'mar', 'ciudad', 'laberinto',
+                   'memoria', 'silencio', 'fuego', 'jardín', 'río', 'espejo', 'olvido', 'luz', 'camino']
+AUTORES = ['Gabriel García Márquez', 'Jorge Luis Borges', 'Isabel Allende', 'Julio Cortázar', 'Mario Vargas Llosa',
+           'Laura Restrepo', 'Carlos Ruiz Zafón', 'George Orwell', 'Rosa Montero', 'Álvaro Mutis']
+GENEROS = ['Realismo Mágico', 'Misterio', 'Distopía', 'Romance', 'Cuento', 'Ensayo', 'Historia', 'Poesía']
+
+_TABLAS = ('usuario', 'libro', 'club_lectura', 'usuario_club', 'resena', 'orden_compra', 'intercambio',
+           'leer_libros', 'reunion')
+
+
+def _sesgado(rng: random.Random, n: int, sesgo: float = 3.0) -> int:
+    """Índice en [0, n) con sesgo hacia los primeros (sesgo=1 es uniforme)."""
+    return min(n - 1, int(n * rng.random() ** sesgo))
+
+
+# ----------------------------------------------------------------------
+# GENERADORES DE FILAS
+# ----------------------------------------------------------------------
+
+def _usuarios(n: int, semilla: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(semilla)
+    for i in range(n):
+        yield {
+            'nombre': f"Usuario {i}",
+            'email': f"usuario{i}.s{semilla}@bench.local",
+            'password_hash': 'bench',
+            'ciudad': rng.choices(CIUDADES, PESOS_CIUDADES)[0],
+            'telefono': f"3{rng.randrange(10**9):09d}",
+            'rol': 'admin' if i % 1000 == 0 else 'usuario',
+        }
+
+
+def _libros(n: int, primer_usuario: int, n_usuarios: int, semilla: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(semilla + 1)
+    for i in range(n):
+        modalidad = rng.choices(['visible', 'intercambio', 'venta'], [40, 30, 30])[0]
+        titulo = ' '.join(rng.sample(PALABRAS_TITULO, rng.randint(2, 4))).capitalize()
+        yield {
+            'titulo': f"{titulo} {i}",
+            'autor': rng.choice(AUTORES),
+            'id_propietario': primer_usuario + rng.randrange(n_usuarios),
+            'isbn': f"978{semilla % 100:02d}{i:012d}",
+            'genero': rng.choice(GENEROS),
+            'resumen': ' '.join(rng.choices(PALABRAS_TITULO, k=rng.randint(10, 60))),
+            'anio_publicacion': rng.randint(1901, 2024),
+            'paginas': rng.randint(80, 900),
+            'idioma': rng.choices(['Español', 'Inglés', 'Portugués'], [80, 15, 5])[0],
+            'en_catalogo': int(rng.random() < 0.7),
+            'modalidad_publicacion': modalidad,
+            'precio_venta': round(rng.uniform(5, 120), 2) if modalidad == 'venta' else None,
+        }
+
+
+def _clubes(n: int, primer_libro: int, n_libros: int, primer_usuario: int, n_usuarios: int,
+            semilla: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(semilla + 2)
+    for i in range(n):
+        yield {
+            'nombre_club': f"Club {i}",
+            'fecha_inicio': date.today() - timedelta(days=rng.randrange(365)),
+            'id_libro': primer_libro + _sesgado(rng, n_libros),
+            'id_administrador': primer_usuario + rng.randrange(n_usuarios),
+            'max_miembros': PROPORCIONES['miembros_por_club'] * 3,
+            'descripcion': f"Club de lectura sintético {i}",
+            'estado': rng.choices(['activo', 'finalizado', 'suspendido'], [80, 15, 5])[0],
+        }
+
+
+def _membresias(primer_club: int, n_clubes: int, primer_usuario: int, n_usuarios: int,
+                semilla: int) -> Iterator[tuple]:
+    """(id_usuario, id_club, estado) sin repetir pares.
+
+    Cada club usa su propio Random, así _lecturas() puede regenerar las mismas
+    membresías sin guardarlas en memoria.
+    """
+    promedio = PROPORCIONES['miembros_por_club']
+    for c in range(n_clubes):
+        rng = random.Random(semilla * 1_000_003 + c)
+        k = min(n_usuarios, rng.randint(1, 2 * promedio))
+        for u in rng.sample(range(n_usuarios), k):
+            estado = rng.choices(['aceptado', 'pendiente', 'retirado'], [75, 20, 5])[0]
+            yield primer_usuario + u, primer_club + c, estado
+
+
+def _lecturas(primer_club: int, libros_club: List[int], primer_usuario: int, n_usuarios: int,
+              semilla: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(semilla + 3)
+    for id_usuario, id_club, estado in _membresias(primer_club, len(libros_club), primer_usuario,
+                                                   n_usuarios, semilla):
+        if estado != 'aceptado' or rng.random() > PROPORCIONES['lecturas_por_miembro']:
+            continue
+        inicio = date.today() - timedelta(days=rng.randrange(1, 200))
+        fin = inicio + timedelta(days=rng.randrange(1, 60)) if rng.random() < 0.5 else None
+        yield {'id_usuario': id_usuario, 'id_club': id_club, 'id_libro': libros_club[id_club - primer_club],
+               'fecha_inicio': inicio, 'fecha_fin': fin}
+
+
+def _reuniones(primer_club: int, n_clubes: int, semilla: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(semilla + 4)
+    for c in range(n_clubes):
+        for _ in range(rng.randint(0, 2 * PROPORCIONES['reuniones_por_club'])):
+            yield {
+                'id_club': primer_club + c,
+                'fecha_reunion': datetime.now() + timedelta(days=rng.randint(-180, 180)),
+                'tema': ' '.join(rng.sample(PALABRAS_TITULO, 3)),
+                'lugar': rng.choice(['Biblioteca', 'Cafetería', 'Zoom', 'Parque']),
+            }
+
+
+def _resenas(n: int, primer_usuario: int, n_usuarios: int, primer_libro: int, n_libros: int,
+             semilla: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(semilla + 5)
+    for _ in range(n):
+        yield {
+            'contenido': ' '.join(rng.choices(PALABRAS_TITULO, k=rng.randint(5, 40))),
+            'calificacion': rng.choices([1, 2, 3, 4, 5], [5, 8, 17, 35, 35])[0],
+            'id_usuario': primer_usuario + _sesgado(rng, n_usuarios, 1.5),
+            'id_libro': primer_libro + _sesgado(rng, n_libros),
+        }
+
+
+def _ordenes(n: int, primer_usuario: int, n_usuarios: int, primer_libro: int, n_libros: int,
+             semilla: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(semilla + 6)
+    for _ in range(n):
+        yield {
+            'precio_total': round(rng.uniform(5, 120), 2),
+            'direccion_envio': f"Calle {rng.randint(1, 200)} # {rng.randint(1, 99)}-{rng.randint(1, 99)}",
+            'metodo_pago': rng.choice(['Tarjeta Crédito', 'Tarjeta Débito', 'PSE', 'Efectivo']),
+            'id_comprador': primer_usuario + _sesgado(rng, n_usuarios, 1.5),
+            'id_libro': primer_libro + _sesgado(rng, n_libros),
+            'estado_orden': rng.choices(['pedido', 'pagado', 'cancelado', 'enviado', 'recibido'],
+                                        [10, 25, 5, 20, 40])[0],
+        }
+
+
+def _intercambios(n: int, primer_usuario: int, n_usuarios: int, primer_libro: int, n_libros: int,
+                  semilla: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(semilla + 7)
+    for _ in range(n):
+        propone, recibe = rng.sample(range(n_usuarios), 2)
+        ofrecido, solicitado = rng.sample(range(n_libros), 2)
+        yield {
+            'id_usuario_propone': primer_usuario + propone,
+            'id_usuario_recibe': primer_usuario + recibe,
+            'id_libro_ofrecido': primer_libro + ofrecido,
+            'id_libro_solicitado': primer_libro + solicitado,
+            'estado_intercambio': rng.choices(['propuesto', 'aceptado', 'rechazado', 'completado'],
+                                              [30, 20, 20, 30])[0],
+            'mensaje_propuesta': '¿Intercambiamos?',
+        }
+
+
+# ----------------------------------------------------------------------
+# CARGA
+# ----------------------------------------------------------------------
+
+def _primer_id(tabla: str, resultado: Dict[str, Any]) -> int:
+    """Primer id generado; exige que la carga haya sido completa y con ids consecutivos."""
+    if resultado['errores']:
+        raise RuntimeError(f"La carga de {tabla} tuvo errores: {resultado['errores'][:3]}")
+    rangos = resultado['rangos_id']
+    for (_, fin), (inicio, _) in zip(rangos, rangos[1:]):
+        if inicio != fin + 1:
+            raise RuntimeError(f"Los ids de {tabla} no quedaron consecutivos")
+    return rangos[0][0]
+
+
+def _tablas_vacias() -> bool:
+    for tabla in _TABLAS:
+        fila = execute_query(f"SELECT EXISTS(SELECT 1 FROM {tabla}) AS hay", commit=False, fetch_one=True)
+        if fila is None or fila['hay']:
+            return False
+    return True
+
+
+def _ajustar_fechas_ordenes(primer_orden: int, n: int, bloque: int = 50_000):
+    """Reparte fecha_pedido/fecha_pago en los últimos dos años (crear_orden no las recibe)."""
+    for desde in range(primer_orden, primer_orden + n, bloque):
+        execute_query("""
+            UPDATE orden_compra
+            SET fecha_pedido = NOW() - INTERVAL (id_orden * 7919 % 730) DAY,
+                fecha_pago   = IF(estado_orden IN ('pagado','enviado','recibido'),
+                                  fecha_pedido + INTERVAL 1 DAY, NULL)
+            WHERE id_orden >= %s AND id_orden < %s
+        """, (desde, desde + bloque), commit=True)
+
+
+def generar(escala: str = '10k', semilla: int = 42, chunk_size: int = 1000) -> Dict[str, Any]:
+    """Carga una base completa de tamaño `escala` y retorna filas y filas/s por tabla.
+
+    Exige que las tablas estén vacías, para que los ids generados sean predecibles.
+    """
+    if escala not in ESCALAS:
+        raise ValueError(f"Escala desconocida: {escala!r} (opciones: {', '.join(ESCALAS)})")
+    if not _tablas_vacias():
+        raise RuntimeError("Las tablas no están vacías; use una base nueva para el benchmark.")
+
+    n_usuarios = ESCALAS[escala]
+    n_libros = max(2, int(n_usuarios * PROPORCIONES['libros_por_usuario']))
+    n_clubes = max(1, int(n_usuarios * PROPORCIONES['clubes_por_usuario']))
+    n_resenas = int(n_usuarios * PROPORCIONES['resenas_por_usuario'])
+    n_ordenes = int(n_usuarios * PROPORCIONES['ordenes_por_usuario'])
+    n_intercambios = int(n_usuarios * PROPORCIONES['intercambios_por_usuario'])
+
+    estadisticas = {}
+
+    def cargar(tabla, funcion, filas):
+        inicio = time.perf_counter()
+        resultado = funcion(filas, chunk_size=chunk_size)
+        duracion = time.perf_counter() - inicio
+        estadisticas[tabla] = {
+            'filas': resultado['filas_insertadas'],
+            'segundos': round(duracion, 3),
+            'filas_por_s': round(resultado['filas_insertadas'] / duracion, 1) if duracion else None,
+            'errores': len(resultado['errores']),
+        }
+        print(f"  {tabla}: {resultado['filas_insertadas']} filas en {duracion:.1f}s")
+        return resultado
+
+    print(f"Generando escala {escala} ({n_usuarios} usuarios, semilla {semilla})...")
+    p_usuario = _primer_id('usuario', cargar('usuario', crear_usuario_bulk, _usuarios(n_usuarios, semilla)))
+    p_libro = _primer_id('libro', cargar('libro', crear_libro_bulk,
+                                         _libros(n_libros, p_usuario, n_usuarios, semilla)))
+
+    # El libro de cada club se necesita después para las lecturas; se calcula igual que en _clubes.
+    clubes = list(_clubes(n_clubes, p_libro, n_libros, p_usuario, n_usuarios, semilla))
+    libros_club = [c['id_libro'] for c in clubes]
+    p_club = _primer_id('club_lectura', cargar('club_lectura', crear_club_bulk, iter(clubes)))
+    del clubes
+
+    cargar('usuario_club', crear_usuario_club_bulk,
+           _membresias(p_club, n_clubes, p_usuario, n_usuarios, semilla))
+    cargar('leer_libros', crear_leer_libros_bulk,
+           _lecturas(p_club, libros_club, p_usuario, n_usuarios, semilla))
+    cargar('reunion', crear_reunion_bulk, _reuniones(p_club, n_clubes, semilla))
+    r_resenas = cargar('resena', crear_resena_bulk,
+                       _resenas(n_resenas, p_usuario, n_usuarios, p_libro, n_libros, semilla))
+    r_ordenes = cargar('orden_compra', crear_orden_bulk,
+                       _ordenes(n_ordenes, p_usuario, n_usuarios, p_libro, n_libros, semilla))
+    cargar('intercambio', crear_intercambio_bulk,
+           _intercambios(n_intercambios, p_usuario, n_usuarios, p_libro, n_libros, semilla))
+
+    # Respuestas: 5% de las reseñas responden a una reseña anterior del mismo bloque de ids.
+    if r_resenas['rangos_id']:
+        p_resena = _primer_id('resena', r_resenas)
+        execute_query("""
+            UPDATE resena
+            SET id_resena_padre = id_resena - 1 - (id_resena % 7)
+            WHERE id_resena % 20 = 0 AND id_resena >= %s
+        """, (p_resena + 8,), commit=True)
+    if r_ordenes['rangos_id']:
+        _ajustar_fechas_ordenes(_primer_id('orden_compra', r_ordenes), n_ordenes)
+
+    return {'escala': escala, 'semilla': semilla, 'tablas': estadisticas}
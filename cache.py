@@ -0,0 +1,106 @@
+# cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+_MISS = object()
+
+
+class LRUCache:
+    """Caché en memoria con expulsión LRU, TTL y estadísticas de aciertos.
+
+    Cada entrada puede llevar etiquetas (tags); invalidate_tag() borra todas las
+    entradas con esa etiqueta. Se usa para invalidar a la vez todas las claves
+    (id, email, isbn...) que apuntan a la misma fila.
+
+    Una lectura que empezó antes de una invalidación puede traer la versión previa de
+    la fila: se toma generation() antes de leer y se pasa a set(), que descarta el valor
+    si hubo alguna invalidación entre medio.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # clave -> (valor, expira, tags)
+        self._tags: Dict[Hashable, set] = {}
+        self._lock = threading.Lock()
+        self._generation = 0  # crece con cada invalidate / invalidate_tag / clear
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0,
+                       'stale_sets': 0}
+
+    def get(self, key: Hashable, default: Any = _MISS) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+            value, expires, _ = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = (), generation: Optional[int] = None):
+        """Guarda `value`; con `generation` (de generation()) no lo guarda si desde entonces
+        se invalidó algo, porque pudo leerse antes de esa invalidación."""
+        tags = frozenset(tags)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                self._stats['stale_sets'] += 1
+                return
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, time.monotonic() + self.ttl, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._generation += 1
+            if key in self._data:
+                self._remove(key)
+                self._stats['invalidations'] += 1
+
+    def invalidate_tag(self, tag: Hashable):
+        with self._lock:
+            self._generation += 1
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            self._tags.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._data)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def _remove(self, key: Hashable):
+        """Quita una clave y sus referencias en el índice de tags (llamar con el lock tomado)."""
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
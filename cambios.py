@@ -0,0 +1,251 @@
+# cambios.py
+"""Consumidor del registro de cambios (cambios.sql).
+
+    python cambios.py estado
+    python cambios.py consumir --nombre auditoria --imprimir
+    python cambios.py compactar
+
+Cada consumidor tiene un nombre y un checkpoint (último seq procesado) en
+consumidor_cambios. Lee registro_cambios por lotes desde ese punto, agrupa los
+cambios por tabla y se los pasa a los manejadores registrados:
+
+    @manejador('libro', 'resena')
+    def reindexar(cambios):
+        for c in cambios: ...
+
+    Consumidor('indice_busqueda').ejecutar()
+
+La entrega es "al menos una vez": el checkpoint se guarda cada `checkpoint_cada`
+lotes, así que tras una caída se repiten los cambios posteriores al último checkpoint.
+Los manejadores deben ser idempotentes (p.ej. volver a leer la fila por su clave).
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+from conecction import primary_reads
+from cruds import execute_query, entity_cache
+
+CAMBIOS_CONFIG = {
+    'batch_size': 500,        # filas de registro_cambios por lectura
+    'checkpoint_cada': 10,    # lotes entre dos escrituras del checkpoint
+    'gap_timeout': 30.0,      # segundos esperando un seq faltante antes de saltarlo
+    'intervalo': 1.0,         # segundos de espera cuando no hay cambios nuevos
+}
+
+COMPACTAR_BLOQUE = 10_000
+
+
+class Cambio(NamedTuple):
+    seq: int
+    tabla: str
+    clave: Tuple            # valores de la PK, p.ej. (3,), (5, 2) en usuario_club o
+                            # (8, '2024-05-01 10:00:00.000000') en orden_compra
+    operacion: str          # 'I', 'U' o 'D'
+    fecha: Any
+
+
+# tabla -> funciones que reciben la lista de cambios de esa tabla; '*' = todas.
+_manejadores: Dict[str, List[Callable[[List[Cambio]], None]]] = {}
+
+
+def registrar_manejador(tablas: Iterable[str], funcion: Callable[[List[Cambio]], None]):
+    for tabla in tablas:
+        _manejadores.setdefault(tabla, []).append(funcion)
+
+
+def manejador(*tablas: str):
+    """Decorador de registrar_manejador; sin tablas recibe los cambios de todas."""
+    def decorar(funcion):
+        registrar_manejador(tablas or ('*',), funcion)
+        return funcion
+    return decorar
+
+
+def invalidar_cache_entidades(cambios: List[Cambio]):
+    """Manejador para procesos de larga vida: descarta de la caché de entidades las
+    filas de libro/usuario que cambiaron desde otros procesos."""
+    for c in cambios:
+        if c.tabla in ('libro', 'usuario'):
+            entity_cache.invalidate_tag((c.tabla, str(c.clave[0])))
+
+
+def _despachar(cambios: List[Cambio]):
+    por_tabla: Dict[str, List[Cambio]] = {}
+    for c in cambios:
+        por_tabla.setdefault(c.tabla, []).append(c)
+    for tabla, lista in por_tabla.items():
+        for funcion in _manejadores.get(tabla, []) + _manejadores.get('*', []):
+            funcion(lista)
+
+
+# ----------------------------------------------------------------------
+# CONSUMIDOR
+# ----------------------------------------------------------------------
+
+class Consumidor:
+    """Lee el registro desde su checkpoint y despacha los cambios por lotes.
+
+    Un seq faltante puede ser una transacción que todavía no confirmó: el lote se corta
+    ahí y se vuelve a leer después. Si la primera fila posterior al hueco tiene más de
+    gap_timeout segundos, el hueco se da por perdido (rollback) y se salta.
+    """
+
+    def __init__(self, nombre: str, desde_el_final: bool = False):
+        self.nombre = nombre
+        self.posicion = self._cargar_checkpoint(desde_el_final)
+        self._guardado = self.posicion
+        self._lotes_sin_guardar = 0
+
+    def _cargar_checkpoint(self, desde_el_final: bool) -> int:
+        with primary_reads():
+            fila = execute_query("SELECT ultimo_seq FROM consumidor_cambios WHERE consumidor = %s",
+                                 (self.nombre,), commit=False, fetch_one=True)
+            if fila:
+                return fila['ultimo_seq']
+            # Consumidor nuevo: desde lo que quede en el registro, o solo lo que venga.
+            consulta = "MAX(seq)" if desde_el_final else "MIN(seq) - 1"
+            fila = execute_query(f"SELECT IFNULL({consulta}, 0) AS seq FROM registro_cambios",
+                                 commit=False, fetch_one=True)
+        inicio = int(fila['seq']) if fila else 0
+        execute_query("INSERT IGNORE INTO consumidor_cambios (consumidor, ultimo_seq) VALUES (%s, %s)",
+                      (self.nombre, inicio), commit=True)
+        return inicio
+
+    def _leer(self) -> List[Dict[str, Any]]:
+        with primary_reads():
+            return execute_query("""
+                SELECT seq, tabla, clave, operacion, fecha,
+                       TIMESTAMPDIFF(MICROSECOND, fecha, NOW(6)) / 1000000 AS antiguedad
+                FROM registro_cambios
+                WHERE seq > %s
+                ORDER BY seq
+                LIMIT %s
+            """, (self.posicion, CAMBIOS_CONFIG['batch_size']), commit=False) or []
+
+    def _contiguos(self, filas: List[Dict[str, Any]]) -> List[Cambio]:
+        cambios = []
+        esperado = self.posicion + 1
+        for fila in filas:
+            if fila['seq'] != esperado and fila['antiguedad'] < CAMBIOS_CONFIG['gap_timeout']:
+                break  # hueco reciente: puede ser una transacción sin confirmar
+            clave = fila['clave']
+            cambios.append(Cambio(fila['seq'], fila['tabla'],
+                                  tuple(json.loads(clave) if isinstance(clave, (str, bytes)) else clave),
+                                  fila['operacion'], fila['fecha']))
+            esperado = fila['seq'] + 1
+        return cambios
+
+    def procesar_lote(self) -> int:
+        """Lee y despacha un lote; retorna cuántos cambios se procesaron.
+
+        Si un manejador lanza una excepción la posición no avanza: el lote completo se
+        reintentará (también para los manejadores que ya lo habían procesado).
+        """
+        cambios = self._contiguos(self._leer())
+        if not cambios:
+            return 0
+        _despachar(cambios)
+        self.posicion = cambios[-1].seq
+        self._lotes_sin_guardar += 1
+        if self._lotes_sin_guardar >= CAMBIOS_CONFIG['checkpoint_cada']:
+            self.guardar_checkpoint()
+        return len(cambios)
+
+    def guardar_checkpoint(self):
+        if self.posicion != self._guardado:
+            execute_query("UPDATE consumidor_cambios SET ultimo_seq = %s WHERE consumidor = %s",
+                          (self.posicion, self.nombre), commit=True)
+            self._guardado = self.posicion
+        self._lotes_sin_guardar = 0
+
+    def ejecutar(self, hasta_vaciar: bool = False) -> int:
+        """Procesa lotes sin parar (o hasta que no haya más, con hasta_vaciar=True).
+
+        Retorna el total de cambios procesados; Ctrl+C termina guardando el checkpoint.
+        """
+        total = 0
+        try:
+            while True:
+                n = self.procesar_lote()
+                total += n
+                if n < CAMBIOS_CONFIG['batch_size']:
+                    # Al día (o frenado por un hueco): buen momento para guardar.
+                    self.guardar_checkpoint()
+                    if hasta_vaciar:
+                        return total
+                    time.sleep(CAMBIOS_CONFIG['intervalo'])
+        except KeyboardInterrupt:
+            return total
+        finally:
+            self.guardar_checkpoint()
+
+
+# ----------------------------------------------------------------------
+# ADMINISTRACIÓN
+# ----------------------------------------------------------------------
+
+def estado() -> Dict[str, Any]:
+    """Último seq del registro, filas pendientes de compactar y atraso de cada consumidor."""
+    with primary_reads():
+        registro = execute_query("SELECT IFNULL(MIN(seq), 0) AS minimo, IFNULL(MAX(seq), 0) AS maximo, "
+                                 "COUNT(*) AS filas FROM registro_cambios", commit=False, fetch_one=True) or {}
+        consumidores = execute_query("SELECT consumidor, ultimo_seq, actualizado FROM consumidor_cambios "
+                                     "ORDER BY consumidor", commit=False) or []
+    for c in consumidores:
+        c['pendientes'] = max(0, registro.get('maximo', 0) - c['ultimo_seq'])
+    return {'registro': registro, 'consumidores': consumidores}
+
+
+def compactar(bloque: int = COMPACTAR_BLOQUE) -> int:
+    """Borra las filas que ya procesaron todos los consumidores; retorna cuántas borró.
+
+    Borra por bloques (un commit cada uno) para no retener candados mucho tiempo.
+    Sin consumidores registrados no borra nada.
+    """
+    with primary_reads():
+        fila = execute_query("SELECT MIN(ultimo_seq) AS limite FROM consumidor_cambios",
+                             commit=False, fetch_one=True)
+    limite = fila['limite'] if fila else None
+    if limite is None:
+        return 0
+    total = 0
+    while True:
+        borradas = execute_query("DELETE FROM registro_cambios WHERE seq <= %s ORDER BY seq LIMIT %s",
+                                 (limite, bloque), commit=True)
+        if not borradas or borradas < 0:
+            return total
+        total += borradas
+        if borradas < bloque:
+            return total
+
+
+def _imprimir(cambios: List[Cambio]):
+    for c in cambios:
+        print(f"{c.seq:>10} {c.fecha} {c.operacion} {c.tabla}{list(c.clave)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Registro de cambios (outbox).")
+    parser.add_argument("accion", choices=["estado", "consumir", "compactar"])
+    parser.add_argument("--nombre", default="consola", help="Nombre del consumidor.")
+    parser.add_argument("--desde-el-final", action="store_true",
+                        help="Un consumidor nuevo ignora los cambios ya registrados.")
+    parser.add_argument("--imprimir", action="store_true", help="Imprime cada cambio.")
+    parser.add_argument("--hasta-vaciar", action="store_true", help="Termina al alcanzar el final.")
+    args = parser.parse_args()
+
+    if args.accion == "estado":
+        info = estado()
+        r = info['registro']
+        print(f"Registro: seq {r.get('minimo')}..{r.get('maximo')} ({r.get('filas')} filas)")
+        for c in info['consumidores']:
+            print(f"  {c['consumidor']:<30} seq {c['ultimo_seq']:>10}  pendientes {c['pendientes']:>8}  ({c['actualizado']})")
+    elif args.accion == "compactar":
+        print(f"✅ {compactar()} fila(s) borradas")
+    else:
+        if args.imprimir:
+            registrar_manejador(('*',), _imprimir)
+        consumidor = Consumidor(args.nombre, args.desde_el_final)
+        print(f"✅ {consumidor.ejecutar(args.hasta_vaciar)} cambio(s) procesados; checkpoint en seq {consumidor.posicion}")
@@ -0,0 +1,294 @@
+-- REGISTRO DE CAMBIOS (OUTBOX) PARA ACTUALIZACIONES INCREMENTALES
+-- Se ejecuta después de entrega3.sql, resumenes.sql y particiones.sql. Cada INSERT,
+-- UPDATE o DELETE sobre libro, usuario, resena, orden_compra, intercambio y
+-- usuario_club agrega una fila a registro_cambios; cambios.py la consume por lotes.
+--
+-- seq es AUTO_INCREMENT: crece con cada cambio, pero se asigna al insertar y no al
+-- hacer commit, así que un lector puede ver seq 11 antes de que la transacción de
+-- seq 10 confirme (o la 10 puede no existir nunca si hubo rollback). El consumidor
+-- se detiene ante esos huecos un tiempo antes de darlos por perdidos.
+
+USE libros_circulares;
+
+CREATE TABLE IF NOT EXISTS registro_cambios (
+  seq        BIGINT UNSIGNED PRIMARY KEY AUTO_INCREMENT,
+  tabla      VARCHAR(64) NOT NULL,
+  clave      JSON NOT NULL,                    -- valores de la PK en orden, p.ej. [3] o [5, 2]
+  operacion  ENUM('I','U','D') NOT NULL,
+  fecha      DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6)
+) ENGINE=InnoDB;
+
+-- Hasta qué seq procesó cada consumidor; la compactación borra lo que ya leyeron todos.
+CREATE TABLE IF NOT EXISTS consumidor_cambios (
+  consumidor   VARCHAR(100) PRIMARY KEY,
+  ultimo_seq   BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  actualizado  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB;
+
+-- ===================================
+-- libro
+-- ===================================
+
+DELIMITER //
+CREATE TRIGGER trg_libro_cambios_ins
+AFTER INSERT ON libro
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('libro', JSON_ARRAY(NEW.id_libro), 'I');
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_libro_cambios_upd
+AFTER UPDATE ON libro
+FOR EACH ROW
+BEGIN
+  IF OLD.id_libro <=> NEW.id_libro THEN
+    INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('libro', JSON_ARRAY(NEW.id_libro), 'U');
+  ELSE
+    INSERT INTO registro_cambios (tabla, clave, operacion)
+    VALUES ('libro', JSON_ARRAY(OLD.id_libro), 'D'), ('libro', JSON_ARRAY(NEW.id_libro), 'I');
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_libro_cambios_del
+AFTER DELETE ON libro
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('libro', JSON_ARRAY(OLD.id_libro), 'D');
+END//
+DELIMITER ;
+
+-- ===================================
+-- usuario
+-- ===================================
+
+DELIMITER //
+CREATE TRIGGER trg_usuario_cambios_ins
+AFTER INSERT ON usuario
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('usuario', JSON_ARRAY(NEW.id_usuario), 'I');
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_usuario_cambios_upd
+AFTER UPDATE ON usuario
+FOR EACH ROW
+BEGIN
+  IF OLD.id_usuario <=> NEW.id_usuario THEN
+    INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('usuario', JSON_ARRAY(NEW.id_usuario), 'U');
+  ELSE
+    INSERT INTO registro_cambios (tabla, clave, operacion)
+    VALUES ('usuario', JSON_ARRAY(OLD.id_usuario), 'D'), ('usuario', JSON_ARRAY(NEW.id_usuario), 'I');
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_usuario_cambios_del
+AFTER DELETE ON usuario
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('usuario', JSON_ARRAY(OLD.id_usuario), 'D');
+END//
+DELIMITER ;
+
+-- ===================================
+-- resena
+-- ===================================
+
+DELIMITER //
+CREATE TRIGGER trg_resena_cambios_ins
+AFTER INSERT ON resena
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('resena', JSON_ARRAY(NEW.id_resena), 'I');
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_resena_cambios_upd
+AFTER UPDATE ON resena
+FOR EACH ROW
+BEGIN
+  IF OLD.id_resena <=> NEW.id_resena THEN
+    INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('resena', JSON_ARRAY(NEW.id_resena), 'U');
+  ELSE
+    INSERT INTO registro_cambios (tabla, clave, operacion)
+    VALUES ('resena', JSON_ARRAY(OLD.id_resena), 'D'), ('resena', JSON_ARRAY(NEW.id_resena), 'I');
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_resena_cambios_del
+AFTER DELETE ON resena
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('resena', JSON_ARRAY(OLD.id_resena), 'D');
+END//
+DELIMITER ;
+
+-- ===================================
+-- orden_compra
+-- ===================================
+-- La PK es (id_orden, fecha_pedido) desde particiones.sql: la clave lleva los dos, y
+-- mover una orden de fecha_pedido cuenta como cambio de PK.
+
+DELIMITER //
+CREATE TRIGGER trg_orden_compra_cambios_ins
+AFTER INSERT ON orden_compra
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('orden_compra', JSON_ARRAY(NEW.id_orden, NEW.fecha_pedido), 'I');
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_orden_compra_cambios_upd
+AFTER UPDATE ON orden_compra
+FOR EACH ROW
+BEGIN
+  IF OLD.id_orden <=> NEW.id_orden AND OLD.fecha_pedido <=> NEW.fecha_pedido THEN
+    INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('orden_compra', JSON_ARRAY(NEW.id_orden, NEW.fecha_pedido), 'U');
+  ELSE
+    INSERT INTO registro_cambios (tabla, clave, operacion)
+    VALUES ('orden_compra', JSON_ARRAY(OLD.id_orden, OLD.fecha_pedido), 'D'), ('orden_compra', JSON_ARRAY(NEW.id_orden, NEW.fecha_pedido), 'I');
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_orden_compra_cambios_del
+AFTER DELETE ON orden_compra
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('orden_compra', JSON_ARRAY(OLD.id_orden, OLD.fecha_pedido), 'D');
+END//
+DELIMITER ;
+
+-- ===================================
+-- intercambio
+-- ===================================
+
+DELIMITER //
+CREATE TRIGGER trg_intercambio_cambios_ins
+AFTER INSERT ON intercambio
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('intercambio', JSON_ARRAY(NEW.id_intercambio), 'I');
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_intercambio_cambios_upd
+AFTER UPDATE ON intercambio
+FOR EACH ROW
+BEGIN
+  IF OLD.id_intercambio <=> NEW.id_intercambio THEN
+    INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('intercambio', JSON_ARRAY(NEW.id_intercambio), 'U');
+  ELSE
+    INSERT INTO registro_cambios (tabla, clave, operacion)
+    VALUES ('intercambio', JSON_ARRAY(OLD.id_intercambio), 'D'), ('intercambio', JSON_ARRAY(NEW.id_intercambio), 'I');
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_intercambio_cambios_del
+AFTER DELETE ON intercambio
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('intercambio', JSON_ARRAY(OLD.id_intercambio), 'D');
+END//
+DELIMITER ;
+
+-- ===================================
+-- usuario_club
+-- ===================================
+
+DELIMITER //
+CREATE TRIGGER trg_usuario_club_cambios_ins
+AFTER INSERT ON usuario_club
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('usuario_club', JSON_ARRAY(NEW.id_usuario, NEW.id_club), 'I');
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_usuario_club_cambios_upd
+AFTER UPDATE ON usuario_club
+FOR EACH ROW
+BEGIN
+  IF OLD.id_usuario <=> NEW.id_usuario AND OLD.id_club <=> NEW.id_club THEN
+    INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('usuario_club', JSON_ARRAY(NEW.id_usuario, NEW.id_club), 'U');
+  ELSE
+    INSERT INTO registro_cambios (tabla, clave, operacion)
+    VALUES ('usuario_club', JSON_ARRAY(OLD.id_usuario, OLD.id_club), 'D'), ('usuario_club', JSON_ARRAY(NEW.id_usuario, NEW.id_club), 'I');
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_usuario_club_cambios_del
+AFTER DELETE ON usuario_club
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion) VALUES ('usuario_club', JSON_ARRAY(OLD.id_usuario, OLD.id_club), 'D');
+END//
+DELIMITER ;
+
+
+-- ===================================
+-- Acciones de llaves foráneas
+-- ===================================
+-- ON DELETE CASCADE / SET NULL no disparan triggers en las filas hijas, así que se
+-- registran antes de borrar el padre. Solo se cubre el primer nivel: las respuestas a
+-- reseñas borradas en cascada (id_resena_padre -> NULL) no quedan registradas.
+
+DELIMITER //
+CREATE TRIGGER trg_usuario_cambios_cascada
+BEFORE DELETE ON usuario
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion)
+  SELECT 'resena', JSON_ARRAY(id_resena), 'D' FROM resena WHERE id_usuario = OLD.id_usuario;
+  INSERT INTO registro_cambios (tabla, clave, operacion)
+  SELECT 'usuario_club', JSON_ARRAY(id_usuario, id_club), 'D' FROM usuario_club WHERE id_usuario = OLD.id_usuario;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_libro_cambios_cascada
+BEFORE DELETE ON libro
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion)
+  SELECT 'resena', JSON_ARRAY(id_resena), 'D' FROM resena WHERE id_libro = OLD.id_libro;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_club_lectura_cambios_cascada
+BEFORE DELETE ON club_lectura
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion)
+  SELECT 'usuario_club', JSON_ARRAY(id_usuario, id_club), 'D' FROM usuario_club WHERE id_club = OLD.id_club;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_resena_cambios_respuestas
+BEFORE DELETE ON resena
+FOR EACH ROW
+BEGIN
+  INSERT INTO registro_cambios (tabla, clave, operacion)
+  SELECT 'resena', JSON_ARRAY(id_resena), 'U' FROM resena WHERE id_resena_padre = OLD.id_resena;
+END//
+DELIMITER ;
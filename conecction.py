@@ -1,6 +1,13 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
 import mysql.connector
 from mysql.connector import Error
-from typing import Optional
+from mysql.connector.errors import PoolError
+from typing import Optional, Dict, Any, List
 
 # --- Configuración de Conexión ---
 DB_CONFIG = {
@@ -10,15 +17,507 @@ DB_CONFIG = {
     'password': '1234'
 }
 
-def get_db_connection() -> Optional[mysql.connector.MySQLConnection]:
-    """Establece y retorna el objeto de conexión a la base de datos."""
+# --- Configuración del Pool ---
+POOL_CONFIG = {
+    'pool_size': 5,          # conexiones que se mantienen abiertas
+    'max_overflow': 10,      # conexiones extra permitidas en picos de carga
+    'idle_timeout': 300,     # segundos; una conexión inactiva más tiempo se cierra
+    'checkout_timeout': 30,  # segundos máximos esperando una conexión libre
+    'health_check': True,    # hace ping a la conexión antes de entregarla
+}
+
+# --- Réplicas de lectura ---
+# Cada réplica es un dict como DB_CONFIG. Vacío = todo va al primario (DB_CONFIG).
+# Ejemplo con dos mysqld locales: [dict(DB_CONFIG, host='127.0.0.1', port=3307)]
+REPLICA_CONFIGS: List[Dict[str, Any]] = []
+
+ROUTING_CONFIG = {
+    'sticky_seconds': 5.0,       # tras escribir, las lecturas de la sesión van al primario
+    'max_lag': 10.0,             # segundos de retraso para sacar una réplica de rotación
+    'lag_check_interval': 5.0,   # segundos entre mediciones de retraso de cada réplica
+}
+
+# --- Sentencias preparadas ---
+PREPARED_CONFIG = {
+    'enabled': False,   # execute_query usa sentencias preparadas del servidor por defecto
+    'cache_size': 64,   # sentencias preparadas que se guardan por conexión
+}
+
+
+# ----------------------------------------------------------------------
+# CACHÉ DE SENTENCIAS PREPARADAS
+# ----------------------------------------------------------------------
+
+_stmt_stats = {'prepares': 0, 'hits': 0, 'evictions': 0}
+_stmt_stats_lock = threading.Lock()
+
+
+class StatementCache:
+    """Cursores preparados de una conexión, indexados por el texto SQL (LRU).
+
+    Cada cursor preparado guarda su handle en el servidor; volver a ejecutarlo con el
+    mismo SQL solo envía los parámetros. La caché vive en la conexión física, así que
+    sobrevive entre préstamos del pool. Al expulsar un cursor se libera su handle.
+    """
+
+    def __init__(self, raw, maxsize: int = 64):
+        self._raw = raw
+        self.maxsize = maxsize
+        self._cursors = OrderedDict()
+
+    def cursor_for(self, sql: str):
+        cursor = self._cursors.get(sql)
+        if cursor is not None:
+            self._cursors.move_to_end(sql)
+            _count_stmt('hits')
+            return cursor
+        cursor = self._raw.cursor(prepared=True)
+        self._cursors[sql] = cursor
+        _count_stmt('prepares')
+        while len(self._cursors) > self.maxsize:
+            _, viejo = self._cursors.popitem(last=False)
+            self._close_cursor(viejo)
+            _count_stmt('evictions')
+        return cursor
+
+    def discard(self, sql: str):
+        """Quita un cursor (p.ej. tras un error) para que se prepare de nuevo."""
+        cursor = self._cursors.pop(sql, None)
+        if cursor is not None:
+            self._close_cursor(cursor)
+
+    def __len__(self):
+        return len(self._cursors)
+
+    @staticmethod
+    def _close_cursor(cursor):
+        try:
+            cursor.close()
+        except Error:
+            pass
+
+
+def _count_stmt(key: str):
+    with _stmt_stats_lock:
+        _stmt_stats[key] += 1
+
+
+def statement_cache_stats() -> Dict[str, Any]:
+    """Preparaciones, aciertos y tasa de aciertos de las cachés de sentencias."""
+    with _stmt_stats_lock:
+        stats = dict(_stmt_stats)
+    usos = stats['prepares'] + stats['hits']
+    stats['hit_rate'] = stats['hits'] / usos if usos else 0.0
+    return stats
+
+
+# ----------------------------------------------------------------------
+# POOL DE CONEXIONES
+# ----------------------------------------------------------------------
+
+class PooledConnection:
+    """Envoltorio de una conexión prestada por el pool.
+
+    Se comporta como una conexión normal de mysql.connector, pero close()
+    la devuelve al pool en vez de cerrar el socket.
+    """
+
+    def __init__(self, pool: 'ConnectionPool', raw, wait_time: float = 0.0):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+        self.wait_time = wait_time
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def statement_cache(self) -> StatementCache:
+        """Caché de sentencias preparadas de la conexión física subyacente."""
+        cache = getattr(self._raw, '_statement_cache', None)
+        if cache is None:
+            cache = StatementCache(self._raw, PREPARED_CONFIG['cache_size'])
+            self._raw._statement_cache = cache
+        return cache
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool._release(self._raw)
+
+    def invalidate(self):
+        """Cierra de verdad la conexión (p.ej. si quedó en un estado inconsistente)."""
+        if not self._released:
+            self._released = True
+            self._pool._release(self._raw, discard=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Pool de conexiones MySQL con desborde, expiración por inactividad y health check."""
+
+    def __init__(self, db_config: Dict[str, Any], pool_size: int = 5, max_overflow: int = 10,
+                 idle_timeout: float = 300, checkout_timeout: float = 30, health_check: bool = True):
+        self.db_config = dict(db_config)
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check = health_check
+
+        self._idle = deque()  # (conexión, instante en que se devolvió)
+        self._open = 0        # conexiones abiertas (libres + prestadas)
+        self._cond = threading.Condition()
+        self._counters = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'health_check_failures': 0,
+            'checkout_timeouts': 0,
+        }
+
+    # -- préstamo y devolución ------------------------------------------
+
+    def get_connection(self) -> PooledConnection:
+        """Presta una conexión; espera si se alcanzó pool_size + max_overflow."""
+        start = time.monotonic()
+        waited = False
+        with self._cond:
+            while True:
+                self._expire_idle()
+                if self._idle:
+                    raw, _ = self._idle.pop()
+                    break
+                if self._open < self.pool_size + self.max_overflow:
+                    raw = None
+                    self._open += 1
+                    break
+                remaining = self.checkout_timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._counters['checkout_timeouts'] += 1
+                    raise PoolError(msg="Tiempo de espera agotado esperando una conexión del pool")
+                waited = True
+                self._cond.wait(remaining)
+
+        if raw is None:
+            raw = self._connect()
+        elif self.health_check and not self._is_healthy(raw):
+            with self._cond:
+                self._counters['health_check_failures'] += 1
+            self._close_raw(raw, keep_slot=True)
+            raw = self._connect()
+
+        wait_time = time.monotonic() - start
+        with self._cond:
+            self._counters['checkouts'] += 1
+            if waited:
+                self._counters['waits'] += 1
+                self._counters['wait_time'] += wait_time
+        return PooledConnection(self, raw, wait_time)
+
+    def _release(self, raw, discard: bool = False):
+        if not discard:
+            try:
+                if raw.is_connected() and raw.in_transaction:
+                    raw.rollback()
+            except Error:
+                discard = True
+        if discard or not self._safe_is_connected(raw):
+            self._close_raw(raw)
+            return
+        with self._cond:
+            if len(self._idle) >= self.pool_size:
+                # Conexión de desborde: se cierra en vez de quedarse ociosa.
+                close_it = True
+            else:
+                self._idle.append((raw, time.monotonic()))
+                close_it = False
+                self._cond.notify()
+        if close_it:
+            self._close_raw(raw)
+
+    # -- utilidades internas ----------------------------------------------
+
+    def _connect(self):
+        try:
+            raw = mysql.connector.connect(**self.db_config)
+        except Error:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._counters['connections_created'] += 1
+        return raw
+
+    def _close_raw(self, raw, keep_slot: bool = False):
+        try:
+            raw.close()
+        except Error:
+            pass
+        with self._cond:
+            if not keep_slot:
+                self._open -= 1
+                self._cond.notify()
+            self._counters['connections_closed'] += 1
+
+    def _expire_idle(self):
+        """Cierra conexiones ociosas más viejas que idle_timeout (llamar con el lock tomado)."""
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            raw, _ = self._idle.popleft()
+            try:
+                raw.close()
+            except Error:
+                pass
+            self._open -= 1
+            self._counters['connections_closed'] += 1
+
+    @staticmethod
+    def _is_healthy(raw) -> bool:
+        try:
+            raw.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    @staticmethod
+    def _safe_is_connected(raw) -> bool:
+        try:
+            return raw.is_connected()
+        except Error:
+            return False
+
+    # -- administración ----------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores del pool para dimensionarlo."""
+        with self._cond:
+            stats = dict(self._counters)
+            stats['open'] = self._open
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._open - len(self._idle)
+            stats['avg_wait_time'] = stats['wait_time'] / stats['waits'] if stats['waits'] else 0.0
+        return stats
+
+    def close_all(self):
+        """Cierra todas las conexiones ociosas."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for raw, _ in idle:
+            self._close_raw(raw)
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Retorna el pool global, creándolo con DB_CONFIG y POOL_CONFIG la primera vez."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+    return _pool
+
+
+def configure_pool(**kwargs) -> ConnectionPool:
+    """Reemplaza el pool global con una nueva configuración (cierra el anterior)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+        POOL_CONFIG.update(kwargs)
+        _pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+    return _pool
+
+
+def pool_stats() -> Dict[str, Any]:
+    return get_pool().stats()
+
+
+def get_db_connection() -> Optional[PooledConnection]:
+    """Presta una conexión del pool; close() la devuelve al pool."""
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
+        conn = get_pool().get_connection()
         if conn.is_connected():
             return conn
+        conn.invalidate()
         return None
     except Error as e:
 
         print(f" Error al conectar a la base de datos MySQL: {e}")
         return None
 
+
+# ----------------------------------------------------------------------
+# RÉPLICAS DE LECTURA
+# ----------------------------------------------------------------------
+# Una "sesión" es el contexto actual (un hilo o una tarea de asyncio): cruds.py llama
+# a mark_write() después de cada escritura y, durante sticky_seconds, las lecturas de
+# esa sesión van al primario para que vea lo que acaba de escribir.
+
+_last_write = contextvars.ContextVar('_last_write', default=float('-inf'))
+_force_primary = contextvars.ContextVar('_force_primary', default=False)
+
+
+def mark_write():
+    """Registra que la sesión actual acaba de escribir en el primario."""
+    _last_write.set(time.monotonic())
+
+
+@contextmanager
+def primary_reads():
+    """Dentro del bloque todas las lecturas de la sesión van al primario."""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+class ReplicaSet:
+    """Pools de las réplicas, repartidos en round-robin.
+
+    El retraso de cada réplica (Seconds_Behind_Source) se mide al prestar una conexión,
+    como mucho una vez cada lag_check_interval. Si supera max_lag, si la replicación
+    está detenida o si la réplica no responde, sale de rotación hasta la próxima medición.
+    """
+
+    def __init__(self, configs: List[Dict[str, Any]], pool_kwargs: Dict[str, Any],
+                 max_lag: float = 10.0, lag_check_interval: float = 5.0):
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self._lock = threading.Lock()
+        self._turno = 0
+        self._replicas = [{
+            'nombre': f"{cfg.get('host', 'localhost')}:{cfg.get('port', 3306)}",
+            'pool': ConnectionPool(cfg, **pool_kwargs),
+            'en_rotacion': True,
+            'lag': None,
+            'medido': float('-inf'),
+            'lecturas': 0,
+        } for cfg in configs]
+
+    def get_connection(self) -> Optional[PooledConnection]:
+        """Conexión de la siguiente réplica sana; None si ninguna lo está."""
+        with self._lock:
+            inicio = self._turno
+            self._turno = (self._turno + 1) % max(1, len(self._replicas))
+        for i in range(len(self._replicas)):
+            replica = self._replicas[(inicio + i) % len(self._replicas)]
+            with self._lock:
+                medir = time.monotonic() - replica['medido'] >= self.lag_check_interval
+                if not medir and not replica['en_rotacion']:
+                    continue
+                if medir:
+                    replica['medido'] = time.monotonic()  # evita que varios hilos midan a la vez
+            try:
+                conn = replica['pool'].get_connection()
+            except Error as e:
+                self._fuera(replica, None, f"no responde ({e})")
+                continue
+            if medir:
+                lag = self._medir_lag(conn)
+                if lag is None or lag > self.max_lag:
+                    conn.close()
+                    self._fuera(replica, lag, "replicación detenida" if lag is None else f"retraso de {lag} s")
+                    continue
+                with self._lock:
+                    replica['lag'] = lag
+                    replica['en_rotacion'] = True
+            with self._lock:
+                replica['lecturas'] += 1
+            return conn
+        return None
+
+    def _fuera(self, replica: Dict[str, Any], lag, motivo: str):
+        with self._lock:
+            avisar = replica['en_rotacion']
+            replica['en_rotacion'] = False
+            replica['lag'] = lag
+        if avisar:
+            print(f"⚠️ Réplica {replica['nombre']} fuera de rotación: {motivo}")
+
+    @staticmethod
+    def _medir_lag(conn) -> Optional[float]:
+        """Seconds_Behind_Source (o _Master en versiones viejas); None si no replica."""
+        cursor = conn.cursor(dictionary=True)
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except Error:
+                cursor.execute("SHOW SLAVE STATUS")
+            fila = cursor.fetchone()
+            cursor.fetchall()
+        except Error:
+            return None
+        finally:
+            cursor.close()
+        if not fila:
+            return None
+        lag = fila.get('Seconds_Behind_Source', fila.get('Seconds_Behind_Master'))
+        return float(lag) if lag is not None else None
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [{'replica': r['nombre'], 'en_rotacion': r['en_rotacion'], 'lag': r['lag'],
+                     'lecturas': r['lecturas'], 'pool': r['pool'].stats()} for r in self._replicas]
+
+    def close_all(self):
+        for replica in self._replicas:
+            replica['pool'].close_all()
+
+
+_replicas: Optional[ReplicaSet] = None
+
+
+def get_replicas() -> Optional[ReplicaSet]:
+    """Retorna el conjunto de réplicas global (None si REPLICA_CONFIGS está vacío)."""
+    global _replicas
+    if _replicas is None and REPLICA_CONFIGS:
+        with _pool_lock:
+            if _replicas is None:
+                _replicas = ReplicaSet(REPLICA_CONFIGS, POOL_CONFIG, ROUTING_CONFIG['max_lag'],
+                                       ROUTING_CONFIG['lag_check_interval'])
+    return _replicas
+
+
+def configure_replicas(configs: List[Dict[str, Any]], **kwargs) -> Optional[ReplicaSet]:
+    """Reemplaza las réplicas (y opcionalmente ROUTING_CONFIG); cierra las anteriores."""
+    global _replicas
+    with _pool_lock:
+        if _replicas is not None:
+            _replicas.close_all()
+        REPLICA_CONFIGS[:] = configs
+        ROUTING_CONFIG.update(kwargs)
+        _replicas = None
+    return get_replicas()
+
+
+def replica_stats() -> List[Dict[str, Any]]:
+    replicas = get_replicas()
+    return replicas.stats() if replicas else []
+
+
+def get_read_connection() -> Optional[PooledConnection]:
+    """Conexión para una lectura fuera de transacción.
+
+    Va a una réplica salvo que no haya ninguna sana, que la sesión haya escrito hace
+    menos de sticky_seconds o que se esté dentro de primary_reads().
+    """
+    replicas = get_replicas()
+    if (replicas is not None and not _force_primary.get()
+            and time.monotonic() - _last_write.get() >= ROUTING_CONFIG['sticky_seconds']):
+        conn = replicas.get_connection()
+        if conn is not None:
+            return conn
+    return get_db_connection()
@@ -1,73 +1,664 @@
 # cruds.py
+import base64
+import itertools
+import json
+import re
+import time
+from contextlib import contextmanager
+
 import mysql.connector
 from mysql.connector import Error
-from typing import Optional, Dict, Any, List, Tuple
-from conecction import get_db_connection
+from typing import Optional, Dict, Any, List, Tuple, Iterable, Iterator
+from conecction import get_db_connection, get_read_connection, mark_write, primary_reads, PREPARED_CONFIG
+from cache import LRUCache
+import filas as formatos
+import instrumentacion
+from instrumentacion import INSTRUMENTACION_CONFIG
 
 
 # ----------------------------------------------------------------------
 # UTILITY FUNCTIONS
 # ----------------------------------------------------------------------
 
-def execute_query(query: str, params: Tuple = None, commit: bool = False, fetch_one: bool = False) -> Any:
-    """Función genérica para ejecutar consultas."""
-    conn = get_db_connection()
-    if not conn: return None
+_SAVEPOINT_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]{0,63}$')
+
+
+class Transaction:
+    """Unidad de trabajo: varias sentencias en una sola conexión y un solo commit.
+
+    Uso:
+        with Transaction() as tx:
+            id_club = crear_club(..., tx=tx)
+            crear_usuario_club(id_admin, id_club, 'aceptado', tx=tx)
+
+    Al salir del bloque se hace commit; si se lanza una excepción, rollback.
+    Dentro de la transacción los errores de DB se propagan (no se retorna -1)
+    para que el bloque `with` pueda deshacer todo.
+    Con consistent_snapshot=True la vista de lectura se fija al empezar (START
+    TRANSACTION WITH CONSISTENT SNAPSHOT) y no en la primera lectura.
+    Con use_replica=True (solo de lectura) la conexión sale de get_read_connection(),
+    con las mismas reglas que las lecturas sueltas; si no, siempre es del primario.
+    """
+
+    def __init__(self, isolation_level: Optional[str] = None, read_only: bool = False,
+                 consistent_snapshot: bool = False, use_replica: bool = False):
+        if use_replica and not read_only:
+            raise ValueError("use_replica=True requiere read_only=True")
+        self.isolation_level = isolation_level
+        self.read_only = read_only
+        self.consistent_snapshot = consistent_snapshot
+        self.use_replica = use_replica
+        self.conn = None
+        self._savepoints = 0
+        self._al_terminar = []
+
+    def __enter__(self) -> 'Transaction':
+        self.conn = get_read_connection() if self.use_replica else get_db_connection()
+        if not self.conn:
+            raise Error(msg="No se pudo obtener una conexión para la transacción")
+        try:
+            self.conn.start_transaction(consistent_snapshot=self.consistent_snapshot,
+                                        isolation_level=self.isolation_level, readonly=self.read_only)
+        except Error:
+            self.conn.close()
+            self.conn = None
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.conn is None:
+            return False
+        try:
+            if exc_type is None:
+                self.conn.commit()
+                if not self.read_only:
+                    mark_write()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
+            self.conn = None
+            for callback in self._al_terminar:
+                callback()
+            self._al_terminar = []
+        return False
+
+    def on_finish(self, callback):
+        """Registra una función a ejecutar al terminar la transacción (commit o rollback)."""
+        self._al_terminar.append(callback)
+
+    def execute(self, query: str, params: Tuple = None, commit: bool = False, fetch_one: bool = False,
+                prepared: Optional[bool] = None, formato: str = 'dict') -> Any:
+        """Ejecuta una sentencia en la conexión de la transacción (sin hacer commit)."""
+        if self.conn is None:
+            raise Error(msg="La transacción no está activa")
+        try:
+            return _ejecutar(self.conn, query, params, commit, fetch_one, prepared, formato=formato)
+        except Error as e:
+            print(f"❌ Error DB en transacción: {e}")
+            raise
+
+    # -- savepoints ----------------------------------------------------------
+
+    def savepoint(self, name: Optional[str] = None) -> str:
+        """Crea un savepoint y retorna su nombre."""
+        if name is None:
+            self._savepoints += 1
+            name = f"sp_{self._savepoints}"
+        if not _SAVEPOINT_RE.match(name):
+            raise ValueError(f"Nombre de savepoint inválido: {name!r}")
+        self.execute(f"SAVEPOINT {name}", commit=True, prepared=False)
+        return name
+
+    def rollback_to(self, name: str):
+        if not _SAVEPOINT_RE.match(name):
+            raise ValueError(f"Nombre de savepoint inválido: {name!r}")
+        self.execute(f"ROLLBACK TO SAVEPOINT {name}", commit=True, prepared=False)
+
+    def release(self, name: str):
+        if not _SAVEPOINT_RE.match(name):
+            raise ValueError(f"Nombre de savepoint inválido: {name!r}")
+        self.execute(f"RELEASE SAVEPOINT {name}", commit=True, prepared=False)
+
+    @contextmanager
+    def nested(self, name: Optional[str] = None):
+        """Bloque anidado: si falla se deshace solo hasta el savepoint y se relanza el error."""
+        sp = self.savepoint(name)
+        try:
+            yield self
+        except BaseException:
+            self.rollback_to(sp)
+            raise
+        else:
+            self.release(sp)
 
-    result = None
+
+def _ejecutar(conn, query: str, params: Tuple, commit: bool, fetch_one: bool,
+              prepared: Optional[bool], espera: float = 0.0, formato: str = 'dict') -> Any:
+    """Ejecuta una sentencia en `conn` sin hacer commit ni devolver la conexión.
+
+    Con prepared=True usa un cursor preparado de la caché de la conexión
+    (ver conecction.StatementCache); con None se usa PREPARED_CONFIG['enabled'].
+    Si la instrumentación está activa registra tiempo, filas y `espera` (segundos
+    esperando la conexión del pool).
+    """
+    if not INSTRUMENTACION_CONFIG['enabled']:
+        return _ejecutar_cursor(conn, query, params, commit, fetch_one, prepared, formato)[0]
+
+    inicio = time.perf_counter()
+    filas, error = 0, None
+    try:
+        resultado, filas = _ejecutar_cursor(conn, query, params, commit, fetch_one, prepared, formato)
+        return resultado
+    except Error as e:
+        error = e
+        raise
+    finally:
+        instrumentacion.registrar(query, params, time.perf_counter() - inicio, filas, espera, error)
+
+
+def _ejecutar_cursor(conn, query: str, params: Tuple, commit: bool, fetch_one: bool,
+                     prepared: Optional[bool], formato: str = 'dict') -> Tuple[Any, int]:
+    """Cuerpo de _ejecutar; retorna (resultado, filas leídas o afectadas).
+
+    Las lecturas se arman en `formato` (ver filas.py); fuera de 'dict' el cursor
+    entrega tuplas y los nombres de columna se guardan una sola vez.
+    """
+    if prepared is None:
+        prepared = PREPARED_CONFIG['enabled']
+
+    if prepared:
+        cursor = conn.statement_cache().cursor_for(query)
+        try:
+            cursor.execute(query, params)
+            if commit:
+                return _resultado_escritura(cursor, query), cursor.rowcount
+            columnas = cursor.column_names
+            filas = cursor.fetchall()
+            if fetch_one:
+                return formatos.convertir_una(columnas, filas[0] if filas else None, formato), len(filas)
+            return formatos.convertir(columnas, filas, formato), len(filas)
+        except Error:
+            conn.statement_cache().discard(query)
+            raise
+
+    como_dict = formato == 'dict'
+    cursor = conn.cursor(dictionary=como_dict)
     try:
-        cursor = conn.cursor(dictionary=True)
         cursor.execute(query, params)
-
         if commit:
-            conn.commit()
-            result = cursor.lastrowid if 'INSERT' in query.upper() else cursor.rowcount
+            return _resultado_escritura(cursor, query), cursor.rowcount
         elif fetch_one:
-            result = cursor.fetchone()
-        else:
-            result = cursor.fetchall()
+            fila = cursor.fetchone()
+            resto = cursor.fetchall()  # descarta filas restantes para poder reutilizar la conexión
+            while cursor.nextset():  # y los demás resultados (un CALL deja al menos su estado)
+                if cursor.with_rows:
+                    cursor.fetchall()
+            if not como_dict:
+                fila = formatos.convertir_una(cursor.column_names, fila, formato)
+            return fila, (fila is not None) + len(resto)
+        filas = cursor.fetchall()
+        if not como_dict:
+            return formatos.convertir(cursor.column_names, filas, formato), len(filas)
+        return filas, len(filas)
+    finally:
+        try:
+            cursor.close()
+        except Error:
+            pass
+
 
+def _resultado_escritura(cursor, query: str) -> int:
+    return cursor.lastrowid if 'INSERT' in query.upper() else cursor.rowcount
+
+
+def execute_query(query: str, params: Tuple = None, commit: bool = False, fetch_one: bool = False,
+                  tx: Optional[Transaction] = None, prepared: Optional[bool] = None,
+                  formato: str = 'dict') -> Any:
+    """Función genérica para ejecutar consultas.
+
+    La conexión se toma prestada del pool de conecction.py y se devuelve al terminar.
+    Si se pasa `tx`, la sentencia corre dentro de esa transacción y no se hace commit.
+    `prepared=True` usa sentencias preparadas del servidor (opt-in, ver PREPARED_CONFIG).
+    Las escrituras (commit=True) van al primario; las lecturas, a una réplica si hay
+    (ver conecction.get_read_connection).
+    `formato` elige cómo se arman las filas leídas: 'dict', 'tupla', 'registro' o
+    'columnas' (ver filas.py).
+    """
+    if not commit:
+        formatos.validar(formato)
+    if tx is not None:
+        return tx.execute(query, params, commit=commit, fetch_one=fetch_one, prepared=prepared, formato=formato)
+
+    conn = get_db_connection() if commit else get_read_connection()
+    if not conn: return None
+
+    result = None
+    try:
+        result = _ejecutar(conn, query, params, commit, fetch_one, prepared, conn.wait_time, formato)
+        if commit:
+            conn.commit()
+            mark_write()
     except Error as e:
         print(f"❌ Error DB en ejecución: {e}")
         if commit: conn.rollback()
         result = -1 if commit else []
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        # Devuelve la conexión al pool (el pool descarta las que estén caídas).
+        conn.close()
     return result
 
 
+STREAM_BATCH_SIZE = 500
+
+
+def stream_query(query: str, params: Tuple = None, batch_size: int = STREAM_BATCH_SIZE,
+                 tx: Optional[Transaction] = None, formato: str = 'dict') -> Iterator[Any]:
+    """Ejecuta un SELECT con cursor sin buffer y produce las filas por lotes de fetchmany.
+
+    Solo hay `batch_size` filas en memoria a la vez. La conexión se devuelve al pool
+    cuando el generador se agota o se cierra (close(), break o recolección).
+    Con instrumentación activa se mide solo el tiempo dentro de execute/fetchmany,
+    no el que el consumidor tarda procesando cada lote.
+    Con formato='registro' las filas son namedtuples en vez de dicts.
+    Un error de la base se propaga siempre (también sin `tx`): quien consume el
+    generador no tiene otra forma de saber que el resultado quedó incompleto.
+    """
+    formatos.validar(formato, stream=True)
+    conn = tx.conn if tx is not None else get_read_connection()
+    if not conn:
+        raise Error(msg="No se pudo conectar a la base de datos")
+
+    medir = INSTRUMENTACION_CONFIG['enabled']
+    segundos, leidas, error = 0.0, 0, None
+    cursor = None
+    agotado = False
+    try:
+        inicio = time.perf_counter() if medir else 0.0
+        cursor = conn.cursor(dictionary=formato == 'dict', buffered=False)
+        cursor.execute(query, params)
+        armar = formatos.clase_registro(tuple(cursor.column_names))._make if formato == 'registro' else None
+        while True:
+            filas = cursor.fetchmany(batch_size)
+            if medir:
+                segundos += time.perf_counter() - inicio
+                leidas += len(filas)
+            if not filas:
+                break
+            yield from (map(armar, filas) if armar else filas)
+            if medir:
+                inicio = time.perf_counter()
+        agotado = True
+    except Error as e:
+        error = e
+        if medir:
+            segundos += time.perf_counter() - inicio
+        print(f"❌ Error DB en lectura por streaming: {e}")
+        raise
+    finally:
+        if medir:
+            instrumentacion.registrar(query, params, segundos, leidas,
+                                      0.0 if tx is not None else conn.wait_time, error)
+        if agotado or cursor is None:
+            if cursor is not None:
+                cursor.close()
+            if tx is None:
+                conn.close()
+        elif tx is not None:
+            # La transacción sigue usando la conexión: hay que leer lo que quede.
+            try:
+                cursor.fetchall()
+                cursor.close()
+            except Error:
+                pass
+        else:
+            # Leer el resto del resultado puede costar más que abrir otra conexión.
+            conn.invalidate()
+
+
+def _leer(query: str, params: Tuple = None, stream: bool = False,
+          tx: Optional[Transaction] = None, formato: str = 'dict') -> Iterable[Any]:
+    """Lectura común de los leer_*: lista completa o generador si stream=True.
+
+    `formato` se valida aquí y no al primer next() del generador (ver filas.py).
+    """
+    formatos.validar(formato, stream)
+    if stream:
+        return stream_query(query, params, tx=tx, formato=formato)
+    return execute_query(query, params, commit=False, tx=tx, formato=formato)
+
+
+# Orden de paginación por keyset de cada tabla; cada tupla es el prefijo de un índice
+# (la PK o un índice secundario, que en InnoDB incluye la PK al final).
+_CLAVES_KEYSET = {
+    'usuario': ('id_usuario',),
+    'libro': ('id_libro',),
+    'club_lectura': ('id_club',),
+    'usuario_club': ('id_club', 'id_usuario'),
+    'resena': ('id_resena',),
+    'orden_compra': ('id_orden',),
+    'intercambio': ('id_intercambio',),
+    'leer_libros': ('id_club', 'id_libro', 'id_usuario'),
+    'reunion': ('id_club', 'fecha_reunion', 'id_reunion'),
+}
+
+
+def _leer_tabla(tabla: str, condiciones: List[str] = (), params: List = (), after_id=None,
+                limit: Optional[int] = None, stream: bool = False,
+                tx: Optional[Transaction] = None, formato: str = 'dict',
+                fields: Optional[Iterable[str]] = None, lazy: bool = False) -> Iterable[Any]:
+    """Ejecuta el SELECT de un leer_* (ver _sql_leer_tabla y _proyeccion)."""
+    columnas, diferidas = _proyeccion(tabla, fields, lazy)
+    if diferidas and formato != 'dict':
+        raise ValueError("lazy=True solo se puede usar con formato='dict'")
+    query, params = _sql_leer_tabla(tabla, condiciones, params, after_id, limit, columnas)
+    filas = _leer(query, params, stream=stream, tx=tx, formato=formato)
+    if not diferidas:
+        return filas
+    if stream:
+        # El cursor sin buffer ocupa la conexión de `tx`: las columnas diferidas se leen aparte.
+        return _diferir_stream(tabla, diferidas, filas)
+    return _diferir(tabla, diferidas, filas or [], tx)
+
+
+def _sql_leer_tabla(tabla: str, condiciones: List[str] = (), params: List = (), after_id=None,
+                    limit: Optional[int] = None,
+                    columnas: Optional[List[str]] = None) -> Tuple[str, Optional[Tuple]]:
+    """Arma el SELECT de un leer_* y sus parámetros.
+
+    Con `after_id` y/o `limit` la lectura es paginada por keyset: se ordena por las
+    columnas de _CLAVES_KEYSET[tabla] y se continúa después de `after_id` (un valor,
+    o una tupla si la clave es compuesta). Así la página N cuesta lo mismo que la 1.
+    `columnas` (ya validadas) reemplaza el SELECT *.
+    """
+    condiciones = list(condiciones)
+    params = list(params)
+    paginado = after_id is not None or limit is not None
+    claves = _CLAVES_KEYSET[tabla]
+
+    if after_id is not None:
+        valores = tuple(after_id) if isinstance(after_id, (tuple, list)) else (after_id,)
+        if len(valores) != len(claves):
+            raise ValueError(f"after_id para {tabla} debe tener {len(claves)} valor(es): {claves}")
+        # Forma expandida, no (a, b) > (%s, %s): cada término usa un prefijo del índice
+        # y el optimizador arma rangos sobre él. a > ? OR (a = ? AND b > ?) OR ...
+        terminos = []
+        for i, clave in enumerate(claves):
+            terminos.append(" AND ".join([f"{c} = %s" for c in claves[:i]] + [f"{clave} > %s"]))
+            params.extend(valores[:i + 1])
+        condiciones.append(terminos[0] if len(terminos) == 1 else
+                           "(" + " OR ".join(f"({t})" for t in terminos) + ")")
+
+    query = f"SELECT {', '.join(columnas) if columnas else '*'} FROM {tabla}"
+    if condiciones:
+        query += " WHERE " + " AND ".join(condiciones)
+    if paginado:
+        query += " ORDER BY " + ", ".join(claves)
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(int(limit))
+    return query, tuple(params) or None
+
+
+# ----------------------------------------------------------------------
+# PROYECCIÓN DE COLUMNAS Y COLUMNAS DIFERIDAS
+# ----------------------------------------------------------------------
+
+# leer_libros(fields=['titulo', 'autor']) trae solo esas columnas (más la clave);
+# leer_libros(lazy=True) trae todo menos los TEXT/BLOB/JSON, que se leen al usarlos.
+
+# Tipos que no conviene traer en los listados: se pueden diferir con lazy=True.
+_TIPOS_PESADOS = ('text', 'mediumtext', 'longtext', 'blob', 'mediumblob', 'longblob', 'json')
+
+_columnas_tablas: Dict[str, Dict[str, str]] = {}
+
+
+def columnas_tabla(tabla: str) -> Dict[str, str]:
+    """{columna: tipo} de `tabla` en el orden de la tabla.
+
+    Se lee una vez por proceso de information_schema; así también cuentan las columnas
+    agregadas por resumenes.sql (rating_*).
+    """
+    if tabla not in _CLAVES_KEYSET:
+        raise ValueError(f"Tabla desconocida: {tabla}")
+    columnas = _columnas_tablas.get(tabla)
+    if columnas is None:
+        filas = execute_query("""
+            SELECT COLUMN_NAME AS columna, DATA_TYPE AS tipo
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY ORDINAL_POSITION
+        """, (tabla,), commit=False)
+        if not filas:
+            raise ValueError(f"No se pudieron leer las columnas de {tabla}")
+        columnas = {f['columna']: f['tipo'].lower() for f in filas}
+        _columnas_tablas[tabla] = columnas
+    return columnas
+
+
+def _validar_columnas(tabla: str, columnas: Iterable[str]):
+    validas = columnas_tabla(tabla)
+    desconocidas = [str(c) for c in columnas if c not in validas]
+    if desconocidas:
+        raise ValueError(f"Columna(s) inválida(s) para {tabla}: {', '.join(desconocidas)}")
+
+
+def _condicion(tabla: str, campo: str) -> str:
+    """`campo = %s` con el nombre de columna validado (va interpolado en el SQL)."""
+    _validar_columnas(tabla, [campo])
+    return f"{campo} = %s"
+
+
+def _proyeccion(tabla: str, fields: Optional[Iterable[str]],
+                lazy: bool) -> Tuple[Optional[List[str]], Tuple[str, ...]]:
+    """(columnas del SELECT o None para *, columnas diferidas).
+
+    Las columnas de _CLAVES_KEYSET[tabla] se agregan siempre: las usan la paginación
+    por keyset y la carga de las columnas diferidas.
+    """
+    if fields is None and not lazy:
+        return None, ()
+    if isinstance(fields, str):
+        fields = [fields]
+    columnas = list(dict.fromkeys(fields)) if fields is not None else list(columnas_tabla(tabla))
+    _validar_columnas(tabla, columnas)
+    columnas = [c for c in _CLAVES_KEYSET[tabla] if c not in columnas] + columnas
+    if not lazy:
+        return columnas, ()
+    tipos = columnas_tabla(tabla)
+    diferidas = tuple(c for c in columnas if tipos[c] in _TIPOS_PESADOS)
+    return [c for c in columnas if c not in diferidas], diferidas
+
+
+class FilaDiferida(dict):
+    """Fila de una lectura con lazy=True.
+
+    Las columnas pesadas no vienen en el SELECT: la primera vez que se pide una
+    (fila['resumen'] o fila.get('resumen')) se leen con un solo IN para todas las
+    filas de la misma lectura. Hasta entonces no aparecen en keys() ni en dict(fila).
+    """
+    __slots__ = ('_carga',)
+
+    def __missing__(self, columna):
+        carga = self._carga
+        if carga is None or columna not in carga.columnas:
+            raise KeyError(columna)
+        carga.cargar()
+        return dict.__getitem__(self, columna)
+
+    def get(self, columna, default=None):
+        try:
+            return self[columna]
+        except KeyError:
+            return default
+
+
+class _CargaDiferida:
+    """Columnas pendientes de un grupo de FilaDiferida; se leen todas juntas."""
+    __slots__ = ('tabla', 'columnas', 'filas', 'tx')
+
+    def __init__(self, tabla: str, columnas: Tuple[str, ...], filas: List[FilaDiferida],
+                 tx: Optional[Transaction]):
+        self.tabla = tabla
+        self.columnas = columnas
+        self.filas = filas
+        self.tx = tx
+
+    def cargar(self):
+        filas, self.filas = self.filas, []
+        claves = _CLAVES_KEYSET[self.tabla]
+        # Si la transacción ya terminó se lee fuera de ella.
+        tx = self.tx if self.tx is not None and self.tx.conn is not None else None
+        for i in range(0, len(filas), LOADER_CHUNK_SIZE):
+            bloque = filas[i:i + LOADER_CHUNK_SIZE]
+            if len(claves) == 1:
+                condicion = f"{claves[0]} IN ({', '.join(['%s'] * len(bloque))})"
+                params = [f[claves[0]] for f in bloque]
+            else:
+                tupla = f"({', '.join(['%s'] * len(claves))})"
+                condicion = f"({', '.join(claves)}) IN ({', '.join([tupla] * len(bloque))})"
+                params = [f[c] for f in bloque for c in claves]
+            leidas = execute_query(f"SELECT {', '.join(claves + self.columnas)} FROM {self.tabla} "
+                                   f"WHERE {condicion}", tuple(params), commit=False, tx=tx) or []
+            por_clave = {tuple(l[c] for c in claves): l for l in leidas}
+            for fila in bloque:
+                # Una fila borrada entretanto queda con None en las columnas diferidas.
+                leida = por_clave.get(tuple(fila[c] for c in claves), {})
+                dict.update(fila, {c: leida.get(c) for c in self.columnas})
+                fila._carga = None
+
+
+def _diferir(tabla: str, diferidas: Tuple[str, ...], filas: Iterable[Dict[str, Any]],
+             tx: Optional[Transaction]) -> List[FilaDiferida]:
+    resultado = [FilaDiferida(f) for f in filas]
+    carga = _CargaDiferida(tabla, diferidas, resultado, tx)
+    for fila in resultado:
+        fila._carga = carga
+    return resultado
+
+
+def _diferir_stream(tabla: str, diferidas: Tuple[str, ...], filas) -> Iterator[FilaDiferida]:
+    """Agrupa el stream en bloques de LOADER_CHUNK_SIZE; cada bloque carga por separado."""
+    filas = iter(filas)
+    try:
+        while True:
+            bloque = list(itertools.islice(filas, LOADER_CHUNK_SIZE))
+            if not bloque:
+                return
+            yield from _diferir(tabla, diferidas, bloque, None)
+    finally:
+        if hasattr(filas, 'close'):
+            filas.close()
+
+
+# ----------------------------------------------------------------------
+# CACHÉ DE ENTIDADES (lecturas por clave primaria o única)
+# ----------------------------------------------------------------------
+
+ENTITY_CACHE_CONFIG = {
+    'maxsize': 4096,  # entradas
+    'ttl': 60,        # segundos
+}
+
+# tabla -> (clave primaria, columnas únicas por las que se puede cachear)
+_CLAVES_CACHEABLES = {
+    'usuario': ('id_usuario', ('id_usuario', 'email')),
+    'libro': ('id_libro', ('id_libro', 'isbn')),
+    'club_lectura': ('id_club', ('id_club',)),
+}
+
+entity_cache = LRUCache(**ENTITY_CACHE_CONFIG)
+
+
+def _leer_cacheado(tabla: str, campo: str, valor,
+                   fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """Lectura read-through por clave primaria o única.
+
+    Las entradas se etiquetan con (tabla, pk) para que actualizar_*/borrar_* invaliden
+    a la vez la clave por id y por email/isbn. Los resultados vacíos no se cachean,
+    así un crear_* posterior no necesita invalidar nada.
+    En caché está la fila completa: `fields` se aplica en memoria y lazy no hace falta.
+    """
+    clave = (tabla, campo, str(valor))
+    filas = entity_cache.get(clave, None)
+    if filas is None:
+        # Si una escritura invalida mientras se lee, lo leído puede ser la versión previa.
+        generacion = entity_cache.generation()
+        # Del primario: una réplica atrasada dejaría en caché la versión previa a una escritura.
+        with primary_reads():
+            filas = _leer_tabla(tabla, [f"{campo} = %s"], [valor]) or []  # None: sin conexión
+        if filas:
+            pk = _CLAVES_CACHEABLES[tabla][0]
+            entity_cache.set(clave, filas, tags=[(tabla, str(fila[pk])) for fila in filas],
+                             generation=generacion)
+    if fields is not None:
+        columnas, _ = _proyeccion(tabla, fields, False)
+        return [{c: fila[c] for c in columnas} for fila in filas]
+    # Copias: quien llama puede modificar los dicts sin ensuciar la caché.
+    return [dict(fila) for fila in filas]
+
+
+def _puede_cachear(tabla: str, campo, valor, after_id, limit, stream, tx, formato='dict') -> bool:
+    return (bool(campo and valor) and campo in _CLAVES_CACHEABLES[tabla][1]
+            and after_id is None and limit is None and not stream and tx is None and formato == 'dict')
+
+
+def _invalidar(tabla: str, pk, tx: Optional[Transaction] = None):
+    """Invalida la fila cacheada; dentro de una transacción también al terminarla.
+
+    Sin transacción, una lectura que empezó antes del commit no vuelve a cachear la
+    versión previa: _leer_cacheado compara entity_cache.generation() antes de guardar.
+    """
+    tag = (tabla, str(pk))
+    entity_cache.invalidate_tag(tag)
+    if tx is not None:
+        # Otro hilo pudo cachear la versión previa antes del commit.
+        tx.on_finish(lambda: entity_cache.invalidate_tag(tag))
+
+
+def cache_stats() -> Dict[str, Any]:
+    return entity_cache.stats()
+
+
 # ----------------------------------------------------------------------
 # 1. CRUD USUARIO
 # ----------------------------------------------------------------------
 
-def crear_usuario(nombre, email, password_hash, ciudad, telefono, rol='usuario') -> Optional[int]:
+def crear_usuario(nombre, email, password_hash, ciudad, telefono, rol='usuario', tx=None) -> Optional[int]:
     query = """INSERT INTO usuario (nombre, email, password_hash, ciudad, telefono, rol)
                VALUES (%s, %s, %s, %s, %s, %s)"""
-    return execute_query(query, (nombre, email, password_hash, ciudad, telefono, rol), commit=True)
+    return execute_query(query, (nombre, email, password_hash, ciudad, telefono, rol), commit=True, tx=tx)
 
 
-def leer_usuarios(campo: str = None, valor: str = None) -> List[Dict[str, Any]]:
+def leer_usuarios(campo: str = None, valor: str = None, after_id=None, limit: Optional[int] = None,
+                  stream: bool = False, tx=None, formato: str = 'dict',
+                  fields: Optional[Iterable[str]] = None, lazy: bool = False) -> Iterable[Dict[str, Any]]:
+    if _puede_cachear('usuario', campo, valor, after_id, limit, stream, tx, formato):
+        return _leer_cacheado('usuario', campo, valor, fields)
     if campo and valor:
-        query = f"SELECT * FROM usuario WHERE {campo} = %s"
-        return execute_query(query, (valor,), commit=False)
+        return _leer_tabla('usuario', [_condicion('usuario', campo)], [valor], after_id, limit, stream, tx, formato,
+                           fields, lazy)
     else:
-        return execute_query("SELECT * FROM usuario", commit=False)
+        return _leer_tabla('usuario', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                           fields=fields, lazy=lazy)
 
 
-def actualizar_usuario(user_id, **kwargs) -> int:
+def actualizar_usuario(user_id, *, tx=None, **kwargs) -> int:
     set_clauses = [f"{k} = %s" for k in kwargs.keys()]
     values = list(kwargs.values())
     if not set_clauses: return 0
 
     query = f"UPDATE usuario SET {', '.join(set_clauses)} WHERE id_usuario = %s"
     params = tuple(values + [user_id])
-    return execute_query(query, params, commit=True)
+    filas = execute_query(query, params, commit=True, tx=tx)
+    _invalidar('usuario', user_id, tx)
+    return filas
 
 
-def borrar_usuario(user_id: int) -> int:
-    return execute_query("DELETE FROM usuario WHERE id_usuario = %s", (user_id,), commit=True)
+def borrar_usuario(user_id: int, tx=None) -> int:
+    filas = execute_query("DELETE FROM usuario WHERE id_usuario = %s", (user_id,), commit=True, tx=tx)
+    _invalidar('usuario', user_id, tx)
+    return filas
 
 
 # ----------------------------------------------------------------------
@@ -76,34 +667,105 @@ def borrar_usuario(user_id: int) -> int:
 
 def crear_libro(titulo, autor, id_propietario, isbn=None, genero=None, resumen=None, anio_publicacion=None,
                 editorial=None, paginas=None, idioma=None, estado_fisico=None, en_catalogo=0,
-                modalidad_publicacion='visible', precio_venta=None) -> Optional[int]:
+                modalidad_publicacion='visible', precio_venta=None, tx=None) -> Optional[int]:
     query = """INSERT INTO libro (titulo, autor, id_propietario, isbn, genero, resumen, anio_publicacion, editorial, paginas, idioma, estado_fisico, en_catalogo, modalidad_publicacion, precio_venta)
                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
     params = (titulo, autor, id_propietario, isbn, genero, resumen, anio_publicacion, editorial, paginas, idioma,
               estado_fisico, en_catalogo, modalidad_publicacion, precio_venta)
-    return execute_query(query, params, commit=True)
+    return execute_query(query, params, commit=True, tx=tx)
 
 
-def leer_libros(campo: str = None, valor: str = None) -> List[Dict[str, Any]]:
+def leer_libros(campo: str = None, valor: str = None, after_id=None, limit: Optional[int] = None,
+                stream: bool = False, tx=None, formato: str = 'dict',
+                fields: Optional[Iterable[str]] = None, lazy: bool = False) -> Iterable[Dict[str, Any]]:
+    if _puede_cachear('libro', campo, valor, after_id, limit, stream, tx, formato):
+        return _leer_cacheado('libro', campo, valor, fields)
     if campo and valor:
-        query = f"SELECT * FROM libro WHERE {campo} = %s"
-        return execute_query(query, (valor,), commit=False)
+        return _leer_tabla('libro', [_condicion('libro', campo)], [valor], after_id, limit, stream, tx, formato,
+                           fields, lazy)
     else:
-        return execute_query("SELECT * FROM libro", commit=False)
-
-
-def actualizar_libro(id_libro: int, **kwargs) -> int:
+        return _leer_tabla('libro', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                           fields=fields, lazy=lazy)
+
+
+# Palabras más cortas que innodb_ft_min_token_size (3 por defecto) no entran al índice FULLTEXT.
+FULLTEXT_MIN_TOKEN = 3
+
+_MODOS_FULLTEXT = {
+    'natural': 'IN NATURAL LANGUAGE MODE',
+    'booleano': 'IN BOOLEAN MODE',
+}
+
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def buscar_libros(termino: str, modo: str = 'natural', limit: int = 20, offset: int = 0,
+                  tx=None) -> List[Dict[str, Any]]:
+    """Busca libros con el índice FULLTEXT ftx_libro_busqueda, ordenados por relevancia.
+
+    modo: 'natural' o 'booleano' (+palabra -palabra "frase" prefijo*).
+    Si todas las palabras del término son más cortas que FULLTEXT_MIN_TOKEN, el índice
+    no las contiene y se busca con LIKE 'termino%' en título y autor (relevancia 0).
+    Los resultados se paginan con limit/offset porque el orden lo da el puntaje.
+    """
+    sql = _sql_buscar_libros(termino, modo, limit, offset)
+    if sql is None:
+        return []
+    return execute_query(*sql, commit=False, tx=tx)
+
+
+def _sql_buscar_libros(termino: str, modo: str, limit: int, offset: int) -> Optional[Tuple[str, Tuple]]:
+    """(query, params) de buscar_libros, o None si el término está vacío."""
+    termino = termino.strip()
+    if not termino:
+        return None
+    if modo not in _MODOS_FULLTEXT:
+        raise ValueError(f"Modo de búsqueda inválido: {modo!r}")
+
+    palabras = re.findall(r'\w+', termino)
+    if all(len(p) < FULLTEXT_MIN_TOKEN for p in palabras):
+        prefijo = _escapar_like(termino) + '%'
+        query = """SELECT l.id_libro, l.titulo, l.autor, l.genero,
+                          u.nombre AS propietario, u.email AS email_propietario,
+                          0 AS relevancia
+                   FROM libro l
+                   JOIN usuario u ON l.id_propietario = u.id_usuario
+                   WHERE l.titulo LIKE %s OR l.autor LIKE %s
+                   ORDER BY l.id_libro
+                   LIMIT %s OFFSET %s"""
+        return query, (prefijo, prefijo, int(limit), int(offset))
+
+    # MATCH debe listar exactamente las columnas del índice para poder usarlo.
+    match = f"MATCH(l.titulo, l.autor, l.genero, l.resumen) AGAINST (%s {_MODOS_FULLTEXT[modo]})"
+    query = f"""SELECT l.id_libro, l.titulo, l.autor, l.genero,
+                       u.nombre AS propietario, u.email AS email_propietario,
+                       {match} AS relevancia
+                FROM libro l
+                JOIN usuario u ON l.id_propietario = u.id_usuario
+                WHERE {match}
+                ORDER BY relevancia DESC, l.id_libro
+                LIMIT %s OFFSET %s"""
+    return query, (termino, termino, int(limit), int(offset))
+
+
+def actualizar_libro(id_libro: int, *, tx=None, **kwargs) -> int:
     set_clauses = [f"{k} = %s" for k in kwargs.keys()]
     values = list(kwargs.values())
     if not set_clauses: return 0
 
     query = f"UPDATE libro SET {', '.join(set_clauses)} WHERE id_libro = %s"
     params = tuple(values + [id_libro])
-    return execute_query(query, params, commit=True)
+    filas = execute_query(query, params, commit=True, tx=tx)
+    _invalidar('libro', id_libro, tx)
+    return filas
 
 
-def borrar_libro(id_libro: int) -> int:
-    return execute_query("DELETE FROM libro WHERE id_libro = %s", (id_libro,), commit=True)
+def borrar_libro(id_libro: int, tx=None) -> int:
+    filas = execute_query("DELETE FROM libro WHERE id_libro = %s", (id_libro,), commit=True, tx=tx)
+    _invalidar('libro', id_libro, tx)
+    return filas
 
 
 # ----------------------------------------------------------------------
@@ -115,23 +777,28 @@ def borrar_libro(id_libro: int) -> int:
 # ======================================================================
 
 def crear_club(nombre_club, fecha_inicio, id_libro, id_administrador, max_miembros, descripcion=None, fecha_fin=None,
-               estado='activo') -> Optional[int]:
+               estado='activo', tx=None) -> Optional[int]:
     query = """INSERT INTO club_lectura (nombre_club, descripcion, fecha_inicio, fecha_fin, estado, id_libro, id_administrador, max_miembros)
                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"""
     params = (nombre_club, descripcion, fecha_inicio, fecha_fin, estado, id_libro, id_administrador, max_miembros)
-    return execute_query(query, params, commit=True)
+    return execute_query(query, params, commit=True, tx=tx)
 
 
-def leer_clubes(campo: str = None, valor: str = None) -> List[Dict[str, Any]]:
+def leer_clubes(campo: str = None, valor: str = None, after_id=None, limit: Optional[int] = None,
+                stream: bool = False, tx=None, formato: str = 'dict',
+                fields: Optional[Iterable[str]] = None, lazy: bool = False) -> Iterable[Dict[str, Any]]:
+    if _puede_cachear('club_lectura', campo, valor, after_id, limit, stream, tx, formato):
+        return _leer_cacheado('club_lectura', campo, valor, fields)
     if campo and valor:
-        query = f"SELECT * FROM club_lectura WHERE {campo} = %s"
-        return execute_query(query, (valor,), commit=False)
+        return _leer_tabla('club_lectura', [_condicion('club_lectura', campo)], [valor], after_id, limit, stream,
+                           tx, formato, fields, lazy)
     else:
-        return execute_query("SELECT * FROM club_lectura", commit=False)
+        return _leer_tabla('club_lectura', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                           fields=fields, lazy=lazy)
 
 
 
-def actualizar_club(id_club: int, **kwargs) -> int:
+def actualizar_club(id_club: int, *, tx=None, **kwargs) -> int:
     """Actualiza campos de un club por su ID."""
     set_clauses = [f"{k} = %s" for k in kwargs.keys()]
     values = list(kwargs.values())
@@ -139,31 +806,57 @@ def actualizar_club(id_club: int, **kwargs) -> int:
 
     query = f"UPDATE club_lectura SET {', '.join(set_clauses)} WHERE id_club = %s"
     params = tuple(values + [id_club])
-    return execute_query(query, params, commit=True)
+    filas = execute_query(query, params, commit=True, tx=tx)
+    _invalidar('club_lectura', id_club, tx)
+    return filas
 
 
 
-def borrar_club(id_club: int) -> int:
+def borrar_club(id_club: int, tx=None) -> int:
     """Borra un club por su ID."""
-    return execute_query("DELETE FROM club_lectura WHERE id_club = %s", (id_club,), commit=True)
+    filas = execute_query("DELETE FROM club_lectura WHERE id_club = %s", (id_club,), commit=True, tx=tx)
+    _invalidar('club_lectura', id_club, tx)
+    return filas
+
+
+def crear_club_con_administrador(nombre_club, fecha_inicio, id_libro, id_administrador, max_miembros,
+                                 descripcion=None, fecha_fin=None, estado='activo', tx=None) -> int:
+    """Crea el club, afilia al administrador y registra su lectura del libro en una sola transacción.
+
+    Si se pasa `tx` se usa esa transacción (el commit lo hace quien la abrió).
+    """
+    if tx is None:
+        with Transaction() as nueva_tx:
+            return crear_club_con_administrador(nombre_club, fecha_inicio, id_libro, id_administrador,
+                                                max_miembros, descripcion, fecha_fin, estado, tx=nueva_tx)
+
+    id_club = crear_club(nombre_club, fecha_inicio, id_libro, id_administrador, max_miembros,
+                         descripcion, fecha_fin, estado, tx=tx)
+    crear_usuario_club(id_administrador, id_club, 'aceptado', tx=tx)
+    crear_leer_libros(id_administrador, id_club, id_libro, fecha_inicio, tx=tx)
+    return id_club
 
 
 # ----------------------------------------------------------------------
 # 4. CRUD USUARIO_CLUB
 # ----------------------------------------------------------------------
 
-def crear_usuario_club(id_usuario, id_club, estado_miembro='pendiente') -> Optional[int]:
+def crear_usuario_club(id_usuario, id_club, estado_miembro='pendiente', tx=None) -> Optional[int]:
     query = """INSERT INTO usuario_club (id_usuario, id_club, estado_miembro)
                VALUES (%s, %s, %s)"""
     # Nota: Esta tabla no tiene un auto_increment, lastrowid puede no ser útil.
-    return execute_query(query, (id_usuario, id_club, estado_miembro), commit=True)
+    return execute_query(query, (id_usuario, id_club, estado_miembro), commit=True, tx=tx)
 
 
-def leer_usuarios_club(id_club: Optional[int] = None) -> List[Dict[str, Any]]:
+def leer_usuarios_club(id_club: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                       stream: bool = False, tx=None, formato: str = 'dict',
+                       fields: Optional[Iterable[str]] = None, lazy: bool = False) -> Iterable[Dict[str, Any]]:
     if id_club:
-        return execute_query("SELECT * FROM usuario_club WHERE id_club = %s", (id_club,), commit=False)
+        return _leer_tabla('usuario_club', ["id_club = %s"], [id_club], after_id, limit, stream, tx, formato,
+                           fields, lazy)
     else:
-        return execute_query("SELECT * FROM usuario_club", commit=False)
+        return _leer_tabla('usuario_club', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                           fields=fields, lazy=lazy)
 
 
 # (Implementaciones de Actualizar/Borrar usuario_club serían similares)
@@ -173,39 +866,83 @@ def leer_usuarios_club(id_club: Optional[int] = None) -> List[Dict[str, Any]]:
 # 5. CRUD RESENA
 # ----------------------------------------------------------------------
 
-def crear_resena(contenido, calificacion, id_usuario, id_libro, id_resena_padre=None) -> Optional[int]:
+def _invalidar_calificacion(id_usuario, id_libro, tx: Optional[Transaction] = None):
+    """Una reseña cambia rating_sum/rating_count de su libro y de quien la escribe
+    (triggers de resumenes.sql), así que ambas filas cacheadas quedan viejas."""
+    if id_libro is not None:
+        _invalidar('libro', id_libro, tx)
+    if id_usuario is not None:
+        _invalidar('usuario', id_usuario, tx)
+
+
+def crear_resena(contenido, calificacion, id_usuario, id_libro, id_resena_padre=None, tx=None) -> Optional[int]:
     query = """INSERT INTO resena (contenido, calificacion, id_usuario, id_libro, id_resena_padre)
                VALUES (%s, %s, %s, %s, %s)"""
-    return execute_query(query, (contenido, calificacion, id_usuario, id_libro, id_resena_padre), commit=True)
+    resena_id = execute_query(query, (contenido, calificacion, id_usuario, id_libro, id_resena_padre),
+                              commit=True, tx=tx)
+    _invalidar_calificacion(id_usuario, id_libro, tx)
+    return resena_id
 
 
-def leer_resenas(id_libro: Optional[int] = None) -> List[Dict[str, Any]]:
+def leer_resenas(id_libro: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                 stream: bool = False, tx=None, formato: str = 'dict',
+                 fields: Optional[Iterable[str]] = None, lazy: bool = False) -> Iterable[Dict[str, Any]]:
     if id_libro:
-        return execute_query("SELECT * FROM resena WHERE id_libro = %s", (id_libro,), commit=False)
+        return _leer_tabla('resena', ["id_libro = %s"], [id_libro], after_id, limit, stream, tx, formato,
+                           fields, lazy)
     else:
-        return execute_query("SELECT * FROM resena", commit=False)
+        return _leer_tabla('resena', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                           fields=fields, lazy=lazy)
+
+
+def _autores_resena(resena_id, tx=None) -> Optional[Dict[str, Any]]:
+    return execute_query("SELECT id_usuario, id_libro FROM resena WHERE id_resena = %s",
+                         (resena_id,), commit=False, fetch_one=True, tx=tx)
+
+
+def actualizar_resena(resena_id, *, tx=None, **kwargs) -> int:
+    set_clauses = [f"{k} = %s" for k in kwargs.keys()]
+    values = list(kwargs.values())
+    if not set_clauses: return 0
 
+    anterior = _autores_resena(resena_id, tx)
+    query = f"UPDATE resena SET {', '.join(set_clauses)} WHERE id_resena = %s"
+    filas = execute_query(query, tuple(values + [resena_id]), commit=True, tx=tx)
+    if anterior:
+        _invalidar_calificacion(anterior['id_usuario'], anterior['id_libro'], tx)
+    _invalidar_calificacion(kwargs.get('id_usuario'), kwargs.get('id_libro'), tx)
+    return filas
 
-# (Implementaciones de Actualizar/Borrar resena serían similares)
+
+def borrar_resena(resena_id, tx=None) -> int:
+    anterior = _autores_resena(resena_id, tx)
+    filas = execute_query("DELETE FROM resena WHERE id_resena = %s", (resena_id,), commit=True, tx=tx)
+    if anterior:
+        _invalidar_calificacion(anterior['id_usuario'], anterior['id_libro'], tx)
+    return filas
 
 
 # ----------------------------------------------------------------------
 # 6. CRUD ORDEN_COMPRA
 # ----------------------------------------------------------------------
 
-def crear_orden(precio_total, direccion_envio, metodo_pago, id_comprador, id_libro, estado_orden='pedido') -> Optional[
-    int]:
+def crear_orden(precio_total, direccion_envio, metodo_pago, id_comprador, id_libro, estado_orden='pedido',
+                tx=None) -> Optional[int]:
     query = """INSERT INTO orden_compra (precio_total, estado_orden, direccion_envio, metodo_pago, id_comprador, id_libro)
                VALUES (%s, %s, %s, %s, %s, %s)"""
     return execute_query(query, (precio_total, estado_orden, direccion_envio, metodo_pago, id_comprador, id_libro),
-                         commit=True)
+                         commit=True, tx=tx)
 
 
-def leer_ordenes(id_comprador: Optional[int] = None) -> List[Dict[str, Any]]:
+def leer_ordenes(id_comprador: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                 stream: bool = False, tx=None, formato: str = 'dict',
+                 fields: Optional[Iterable[str]] = None, lazy: bool = False) -> Iterable[Dict[str, Any]]:
     if id_comprador:
-        return execute_query("SELECT * FROM orden_compra WHERE id_comprador = %s", (id_comprador,), commit=False)
+        return _leer_tabla('orden_compra', ["id_comprador = %s"], [id_comprador], after_id, limit, stream, tx, formato,
+                           fields, lazy)
     else:
-        return execute_query("SELECT * FROM orden_compra", commit=False)
+        return _leer_tabla('orden_compra', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                           fields=fields, lazy=lazy)
 
 
 # (Implementaciones de Actualizar/Borrar orden_compra serían similares)
@@ -216,20 +953,24 @@ def leer_ordenes(id_comprador: Optional[int] = None) -> List[Dict[str, Any]]:
 # ----------------------------------------------------------------------
 
 def crear_intercambio(id_usuario_propone, id_usuario_recibe, id_libro_ofrecido, id_libro_solicitado,
-                      estado_intercambio='propuesto', mensaje_propuesta=None, condiciones=None) -> Optional[int]:
+                      estado_intercambio='propuesto', mensaje_propuesta=None, condiciones=None, tx=None) -> Optional[int]:
     query = """INSERT INTO intercambio (estado_intercambio, mensaje_propuesta, condiciones, id_usuario_propone, id_usuario_recibe, id_libro_ofrecido, id_libro_solicitado)
                VALUES (%s, %s, %s, %s, %s, %s, %s)"""
     params = (estado_intercambio, mensaje_propuesta, condiciones, id_usuario_propone, id_usuario_recibe,
               id_libro_ofrecido, id_libro_solicitado)
-    return execute_query(query, params, commit=True)
+    return execute_query(query, params, commit=True, tx=tx)
 
 
-def leer_intercambios(id_usuario: Optional[int] = None) -> List[Dict[str, Any]]:
+def leer_intercambios(id_usuario: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                      stream: bool = False, tx=None, formato: str = 'dict',
+                      fields: Optional[Iterable[str]] = None, lazy: bool = False) -> Iterable[Dict[str, Any]]:
     if id_usuario:
-        query = "SELECT * FROM intercambio WHERE id_usuario_propone = %s OR id_usuario_recibe = %s"
-        return execute_query(query, (id_usuario, id_usuario), commit=False)
+        condicion = "(id_usuario_propone = %s OR id_usuario_recibe = %s)"
+        return _leer_tabla('intercambio', [condicion], [id_usuario, id_usuario], after_id, limit, stream, tx, formato,
+                           fields, lazy)
     else:
-        return execute_query("SELECT * FROM intercambio", commit=False)
+        return _leer_tabla('intercambio', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                           fields=fields, lazy=lazy)
 
 
 # (Implementaciones de Actualizar/Borrar intercambio serían similares)
@@ -239,17 +980,21 @@ def leer_intercambios(id_usuario: Optional[int] = None) -> List[Dict[str, Any]]:
 # 8. CRUD LEER_LIBROS
 # ----------------------------------------------------------------------
 
-def crear_leer_libros(id_usuario, id_club, id_libro, fecha_inicio, fecha_fin=None) -> int:
+def crear_leer_libros(id_usuario, id_club, id_libro, fecha_inicio, fecha_fin=None, tx=None) -> int:
     query = """INSERT INTO leer_libros (id_usuario, id_club, id_libro, fecha_inicio, fecha_fin)
                VALUES (%s, %s, %s, %s, %s)"""
-    return execute_query(query, (id_usuario, id_club, id_libro, fecha_inicio, fecha_fin), commit=True)
+    return execute_query(query, (id_usuario, id_club, id_libro, fecha_inicio, fecha_fin), commit=True, tx=tx)
 
 
-def leer_registros_lectura(id_club: Optional[int] = None) -> List[Dict[str, Any]]:
+def leer_registros_lectura(id_club: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                           stream: bool = False, tx=None, formato: str = 'dict',
+                           fields: Optional[Iterable[str]] = None, lazy: bool = False) -> Iterable[Dict[str, Any]]:
     if id_club:
-        return execute_query("SELECT * FROM leer_libros WHERE id_club = %s", (id_club,), commit=False)
+        return _leer_tabla('leer_libros', ["id_club = %s"], [id_club], after_id, limit, stream, tx, formato,
+                           fields, lazy)
     else:
-        return execute_query("SELECT * FROM leer_libros", commit=False)
+        return _leer_tabla('leer_libros', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                           fields=fields, lazy=lazy)
 
 
 # (Implementaciones de Actualizar/Borrar leer_libros serían similares)
@@ -259,16 +1004,441 @@ def leer_registros_lectura(id_club: Optional[int] = None) -> List[Dict[str, Any]
 # 9. CRUD REUNION
 # ----------------------------------------------------------------------
 
-def crear_reunion(id_club, fecha_reunion, tema, descripcion=None, lugar=None) -> Optional[int]:
+def crear_reunion(id_club, fecha_reunion, tema, descripcion=None, lugar=None, tx=None) -> Optional[int]:
     query = """INSERT INTO reunion (id_club, fecha_reunion, tema, descripcion, lugar)
                VALUES (%s, %s, %s, %s, %s)"""
-    return execute_query(query, (id_club, fecha_reunion, tema, descripcion, lugar), commit=True)
+    return execute_query(query, (id_club, fecha_reunion, tema, descripcion, lugar), commit=True, tx=tx)
 
 
-def leer_reuniones(id_club: Optional[int] = None) -> List[Dict[str, Any]]:
+def leer_reuniones(id_club: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                   stream: bool = False, tx=None, formato: str = 'dict',
+                   fields: Optional[Iterable[str]] = None, lazy: bool = False) -> Iterable[Dict[str, Any]]:
     if id_club:
-        return execute_query("SELECT * FROM reunion WHERE id_club = %s", (id_club,), commit=False)
+        return _leer_tabla('reunion', ["id_club = %s"], [id_club], after_id, limit, stream, tx, formato,
+                           fields, lazy)
     else:
-        return execute_query("SELECT * FROM reunion", commit=False)
+        return _leer_tabla('reunion', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                           fields=fields, lazy=lazy)
+
+# (Implementaciones de Actualizar/Borrar reunion serían similares)
+
+# ----------------------------------------------------------------------
+# 10. CARGA MASIVA (INSERT multi-fila por bloques)
+# ----------------------------------------------------------------------
+
+_REQUERIDO = object()
+
+# Columnas en el mismo orden que los argumentos de cada crear_*, con su valor por defecto.
+_COLUMNAS_INSERT = {
+    'usuario': (('nombre', _REQUERIDO), ('email', _REQUERIDO), ('password_hash', _REQUERIDO),
+                ('ciudad', _REQUERIDO), ('telefono', _REQUERIDO), ('rol', 'usuario')),
+    'libro': (('titulo', _REQUERIDO), ('autor', _REQUERIDO), ('id_propietario', _REQUERIDO), ('isbn', None),
+              ('genero', None), ('resumen', None), ('anio_publicacion', None), ('editorial', None),
+              ('paginas', None), ('idioma', None), ('estado_fisico', None), ('en_catalogo', 0),
+              ('modalidad_publicacion', 'visible'), ('precio_venta', None)),
+    'club_lectura': (('nombre_club', _REQUERIDO), ('fecha_inicio', _REQUERIDO), ('id_libro', _REQUERIDO),
+                     ('id_administrador', _REQUERIDO), ('max_miembros', _REQUERIDO), ('descripcion', None),
+                     ('fecha_fin', None), ('estado', 'activo')),
+    'usuario_club': (('id_usuario', _REQUERIDO), ('id_club', _REQUERIDO), ('estado_miembro', 'pendiente')),
+    'resena': (('contenido', _REQUERIDO), ('calificacion', _REQUERIDO), ('id_usuario', _REQUERIDO),
+               ('id_libro', _REQUERIDO), ('id_resena_padre', None)),
+    'orden_compra': (('precio_total', _REQUERIDO), ('direccion_envio', _REQUERIDO), ('metodo_pago', _REQUERIDO),
+                     ('id_comprador', _REQUERIDO), ('id_libro', _REQUERIDO), ('estado_orden', 'pedido')),
+    'intercambio': (('id_usuario_propone', _REQUERIDO), ('id_usuario_recibe', _REQUERIDO),
+                    ('id_libro_ofrecido', _REQUERIDO), ('id_libro_solicitado', _REQUERIDO),
+                    ('estado_intercambio', 'propuesto'), ('mensaje_propuesta', None), ('condiciones', None)),
+    'leer_libros': (('id_usuario', _REQUERIDO), ('id_club', _REQUERIDO), ('id_libro', _REQUERIDO),
+                    ('fecha_inicio', _REQUERIDO), ('fecha_fin', None)),
+    'reunion': (('id_club', _REQUERIDO), ('fecha_reunion', _REQUERIDO), ('tema', _REQUERIDO),
+                ('descripcion', None), ('lugar', None)),
+}
+
+# Tablas sin AUTO_INCREMENT: no tienen rangos de ids generados.
+_TABLAS_SIN_AUTOINCREMENT = {'usuario_club', 'leer_libros'}
+
+# Fracción de max_allowed_packet que puede ocupar una sentencia (margen para el escape de valores).
+BULK_PACKET_FRACTION = 0.8
+
+
+def _normalizar_fila(tabla: str, fila) -> Tuple:
+    """Convierte un dict o una tupla posicional en la tupla de valores del INSERT."""
+    columnas = _COLUMNAS_INSERT[tabla]
+    if isinstance(fila, dict):
+        desconocidas = set(fila) - {c for c, _ in columnas}
+        if desconocidas:
+            raise ValueError(f"Columnas desconocidas para {tabla}: {sorted(desconocidas)}")
+        valores = tuple(fila.get(c, defecto) for c, defecto in columnas)
+    else:
+        fila = tuple(fila)
+        if len(fila) > len(columnas):
+            raise ValueError(f"Demasiados valores para {tabla}: {len(fila)}")
+        valores = fila + tuple(defecto for _, defecto in columnas[len(fila):])
+    for (columna, _), valor in zip(columnas, valores):
+        if valor is _REQUERIDO:
+            raise ValueError(f"Falta la columna requerida '{columna}' en {tabla}")
+    return valores
+
+
+def _estimar_bytes(valores: Tuple) -> int:
+    """Cota superior del tamaño de la fila ya escapada dentro del INSERT."""
+    total = 4  # paréntesis y comas
+    for v in valores:
+        if v is None:
+            total += 5
+        elif isinstance(v, str):
+            total += 2 * len(v.encode('utf-8')) + 3
+        elif isinstance(v, (bytes, bytearray)):
+            total += 2 * len(v) + 3
+        else:
+            total += len(str(v)) + 3
+    return total
+
+
+def _max_allowed_packet(conn) -> int:
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT @@SESSION.max_allowed_packet")
+        return int(cursor.fetchone()[0])
+    finally:
+        cursor.close()
+
+
+def _insert_bulk(tabla: str, filas: Iterable, chunk_size: int = 1000, tx: Optional[Transaction] = None,
+                 max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """Inserta `filas` en bloques de INSERT multi-fila, con un commit por bloque.
+
+    Acepta cualquier iterable (incluidos generadores) de dicts o tuplas en el orden de
+    los argumentos del crear_* correspondiente. Cada bloque se corta al llegar a
+    `chunk_size` filas o al acercarse a max_allowed_packet. Un bloque que falla se
+    deshace y se registra en 'errores'; la carga continúa con el siguiente.
+    Con `tx`, cada bloque usa un savepoint y el commit lo hace quien abrió la transacción.
+
+    Los rangos de ids asumen que InnoDB asigna ids consecutivos a un INSERT multi-fila
+    ("simple insert"), que es lo que hace con innodb_autoinc_lock_mode 0, 1 y 2.
+    """
+    columnas = [c for c, _ in _COLUMNAS_INSERT[tabla]]
+    prefijo = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES "
+    marcador = "(" + ", ".join(["%s"] * len(columnas)) + ")"
+    autoincrement = tabla not in _TABLAS_SIN_AUTOINCREMENT
+
+    resultado = {'filas_insertadas': 0, 'chunks': 0, 'rangos_id': [], 'errores': []}
+    conn = tx.conn if tx is not None else get_db_connection()
+    if not conn:
+        resultado['errores'].append({'chunk': None, 'desde_fila': 0, 'filas': 0,
+                                     'error': "No se pudo conectar a la base de datos"})
+        return resultado
+
+    def enviar(valores: List[Tuple], desde_fila: int):
+        numero = resultado['chunks']
+        resultado['chunks'] += 1
+        sql = prefijo + ", ".join([marcador] * len(valores))
+        params = tuple(v for fila in valores for v in fila)
+        sp = tx.savepoint() if tx is not None else None
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params)
+            if tx is not None:
+                tx.release(sp)
+            else:
+                conn.commit()
+                mark_write()
+            resultado['filas_insertadas'] += cursor.rowcount
+            if autoincrement:
+                resultado['rangos_id'].append((cursor.lastrowid, cursor.lastrowid + len(valores) - 1))
+        except Error as e:
+            print(f"❌ Error DB en bloque {numero} de {tabla}: {e}")
+            if tx is not None:
+                tx.rollback_to(sp)
+            else:
+                conn.rollback()
+            resultado['errores'].append({'chunk': numero, 'desde_fila': desde_fila,
+                                         'filas': len(valores), 'error': str(e)})
+        finally:
+            cursor.close()
+
+    try:
+        limite = max_bytes or int(_max_allowed_packet(conn) * BULK_PACKET_FRACTION)
+        bloque: List[Tuple] = []
+        tam_bloque = len(prefijo)
+        desde_fila = 0
+        for i, fila in enumerate(filas):
+            valores = _normalizar_fila(tabla, fila)
+            tam_fila = _estimar_bytes(valores)
+            if bloque and (len(bloque) >= chunk_size or tam_bloque + tam_fila > limite):
+                enviar(bloque, desde_fila)
+                bloque, tam_bloque, desde_fila = [], len(prefijo), i
+            bloque.append(valores)
+            tam_bloque += tam_fila
+        if bloque:
+            enviar(bloque, desde_fila)
+    finally:
+        if tx is None:
+            conn.close()
+    return resultado
+
+
+def crear_usuario_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return _insert_bulk('usuario', filas, chunk_size, tx)
+
+
+def crear_libro_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return _insert_bulk('libro', filas, chunk_size, tx)
+
+
+def crear_club_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return _insert_bulk('club_lectura', filas, chunk_size, tx)
+
+
+def crear_usuario_club_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return _insert_bulk('usuario_club', filas, chunk_size, tx)
+
+
+def crear_resena_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    resultado = _insert_bulk('resena', filas, chunk_size, tx)
+    # Cambian los rating_* de muchos libros y usuarios: más simple vaciar la caché.
+    entity_cache.clear()
+    if tx is not None:
+        tx.on_finish(entity_cache.clear)
+    return resultado
+
+
+def crear_orden_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return _insert_bulk('orden_compra', filas, chunk_size, tx)
+
+
+def crear_intercambio_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return _insert_bulk('intercambio', filas, chunk_size, tx)
+
+
+def crear_leer_libros_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return _insert_bulk('leer_libros', filas, chunk_size, tx)
 
-# (Implementaciones de Actualizar/Borrar reunion serían similares)
\ No newline at end of file
+
+def crear_reunion_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return _insert_bulk('reunion', filas, chunk_size, tx)
+
+
+# ----------------------------------------------------------------------
+# 11. PAGINACIÓN CON CURSOR OPACO
+# ----------------------------------------------------------------------
+
+_LECTORES = {
+    'usuario': leer_usuarios,
+    'libro': leer_libros,
+    'club_lectura': leer_clubes,
+    'usuario_club': leer_usuarios_club,
+    'resena': leer_resenas,
+    'orden_compra': leer_ordenes,
+    'intercambio': leer_intercambios,
+    'leer_libros': leer_registros_lectura,
+    'reunion': leer_reuniones,
+}
+
+
+def _codificar_cursor(tabla: str, valores: Tuple) -> str:
+    datos = json.dumps({'t': tabla, 'k': list(valores)}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(datos.encode('utf-8')).decode('ascii')
+
+
+def _decodificar_cursor(tabla: str, cursor: str) -> Tuple:
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor de paginación inválido")
+    if datos.get('t') != tabla:
+        raise ValueError(f"El cursor no corresponde a la tabla {tabla}")
+    return tuple(datos['k'])
+
+
+def leer_pagina(tabla: str, cursor: Optional[str] = None, limit: int = 20, tx=None,
+                **filtros) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Retorna (filas, siguiente_cursor) de `tabla` paginando por keyset.
+
+    `filtros` se pasan al leer_* de la tabla (p.ej. id_club=3). `siguiente_cursor`
+    es None en la última página.
+    """
+    lector = _LECTORES[tabla]
+    claves = _CLAVES_KEYSET[tabla]
+    after_id = _decodificar_cursor(tabla, cursor) if cursor else None
+    if after_id is not None and len(claves) == 1:
+        after_id = after_id[0]
+
+    # Se pide una fila de más para saber si hay otra página sin una consulta extra.
+    filas = lector(after_id=after_id, limit=limit + 1, tx=tx, **filtros)
+    if len(filas) <= limit:
+        return filas, None
+    filas = filas[:limit]
+    ultima = filas[-1]
+    return filas, _codificar_cursor(tabla, tuple(ultima[c] for c in claves))
+
+
+# ----------------------------------------------------------------------
+# 12. CARGA DE ENTIDADES RELACIONADAS (evita N+1)
+# ----------------------------------------------------------------------
+
+# columna que referencia -> tabla referenciada (por su clave primaria)
+_RELACIONES = {
+    'id_usuario': 'usuario',
+    'id_comprador': 'usuario',
+    'id_propietario': 'usuario',
+    'id_administrador': 'usuario',
+    'id_usuario_propone': 'usuario',
+    'id_usuario_recibe': 'usuario',
+    'id_libro': 'libro',
+    'id_libro_ofrecido': 'libro',
+    'id_libro_solicitado': 'libro',
+    'id_club': 'club_lectura',
+}
+
+LOADER_CHUNK_SIZE = 500  # ids por cada WHERE ... IN (...)
+
+
+def leer_por_ids(tabla: str, ids: Iterable, chunk_size: int = LOADER_CHUNK_SIZE,
+                 tx: Optional[Transaction] = None) -> Dict[Any, Dict[str, Any]]:
+    """Retorna {id: fila} de `tabla` (usuario, libro o club_lectura) con un IN por bloque.
+
+    Sin `tx`, primero busca en la caché de entidades (mismas claves que leer_*(campo=pk))
+    y guarda ahí lo que lee. Los ids que no existen simplemente no aparecen.
+    """
+    pk = _CLAVES_CACHEABLES[tabla][0]
+    encontradas: Dict[Any, Dict[str, Any]] = {}
+    faltan = []
+    for valor in dict.fromkeys(v for v in ids if v is not None):
+        filas = entity_cache.get((tabla, pk, str(valor)), None) if tx is None else None
+        if filas:
+            encontradas[valor] = dict(filas[0])
+        else:
+            faltan.append(valor)
+
+    for i in range(0, len(faltan), chunk_size):
+        bloque = faltan[i:i + chunk_size]
+        query = f"SELECT * FROM {tabla} WHERE {pk} IN ({', '.join(['%s'] * len(bloque))})"
+        generacion = entity_cache.generation()
+        with primary_reads():  # lo leído se guarda en la caché (ver _leer_cacheado)
+            filas = execute_query(query, tuple(bloque), commit=False, tx=tx) or []
+        for fila in filas:
+            if tx is None:
+                entity_cache.set((tabla, pk, str(fila[pk])), [fila], tags=[(tabla, str(fila[pk]))],
+                                 generation=generacion)
+            encontradas[fila[pk]] = dict(fila)
+    return encontradas
+
+
+def _adjuntar(filas: List[Dict[str, Any]], columnas: List[str], tx) -> List[Dict[str, Any]]:
+    ids_por_tabla: Dict[str, set] = {}
+    for columna in columnas:
+        ids_por_tabla.setdefault(_RELACIONES[columna], set()).update(f.get(columna) for f in filas)
+    entidades = {tabla: leer_por_ids(tabla, ids, tx=tx) for tabla, ids in ids_por_tabla.items()}
+    for fila in filas:
+        for columna in columnas:
+            fila[columna[3:]] = entidades[_RELACIONES[columna]].get(fila.get(columna))
+    return filas
+
+
+def cargar_relacionados(filas: Iterable[Dict[str, Any]], columnas: Optional[Iterable[str]] = None,
+                        tx: Optional[Transaction] = None) -> Iterable[Dict[str, Any]]:
+    """Adjunta a cada fila las entidades que referencia, con una consulta por tabla.
+
+        ordenes = cargar_relacionados(leer_ordenes(limit=20))
+        ordenes[0]['comprador']['nombre'], ordenes[0]['libro']['titulo']
+
+    La entidad queda en la columna sin el prefijo id_ (id_usuario_propone ->
+    usuario_propone); None si no existe. `columnas` por defecto son todas las de
+    _RELACIONES presentes en la primera fila. Con una lista retorna la misma lista;
+    con un generador (stream=True) retorna otro que carga por bloques de STREAM_BATCH_SIZE.
+    """
+    if isinstance(filas, list):
+        if not filas:
+            return filas
+        columnas = list(columnas) if columnas is not None else [c for c in filas[0] if c in _RELACIONES]
+        return _adjuntar(filas, columnas, tx)
+    return _cargar_relacionados_stream(filas, columnas, tx)
+
+
+def _cargar_relacionados_stream(filas, columnas, tx) -> Iterator[Dict[str, Any]]:
+    filas = iter(filas)
+    try:
+        while True:
+            bloque = list(itertools.islice(filas, STREAM_BATCH_SIZE))
+            if not bloque:
+                return
+            yield from cargar_relacionados(bloque, columnas, tx)
+    finally:
+        if hasattr(filas, 'close'):
+            filas.close()
+
+
+# ----------------------------------------------------------------------
+# 13. FLUJOS DEL MERCADO (procedimientos de flujos.sql)
+# ----------------------------------------------------------------------
+
+def _sql_llamar(procedimiento: str, params: Tuple, confirmar: bool) -> Tuple[str, Tuple]:
+    """(CALL, parámetros); el último es p_confirmar (ver el encabezado de flujos.sql)."""
+    params = tuple(params) + (confirmar,)
+    return f"CALL {procedimiento}({', '.join(['%s'] * len(params))})", params
+
+
+def _llamar(procedimiento: str, params: Tuple,
+            tx: Optional[Transaction] = None) -> Optional[Dict[str, Any]]:
+    """Ejecuta un procedimiento de flujos.sql; retorna su fila de salidas o None si falló.
+
+    Sin `tx` el procedimiento confirma su propia transacción y devuelve las salidas
+    en el mismo CALL: una sola ida y vuelta, y los candados duran solo eso.
+    Dentro de `tx` se une a ella y los errores se propagan como en Transaction.execute.
+    """
+    if tx is not None:
+        sentencia, params = _sql_llamar(procedimiento, params, False)
+        return tx.execute(sentencia, params, fetch_one=True, prepared=False)
+
+    sentencia, params = _sql_llamar(procedimiento, params, True)
+    conn = get_db_connection()
+    if not conn: return None
+    try:
+        salidas = _ejecutar(conn, sentencia, params, False, True, False, conn.wait_time)
+    except Error as e:
+        print(f"❌ Error DB en {procedimiento}: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+    mark_write()
+    return salidas
+
+
+def comprar_libro(id_libro, id_comprador, direccion_envio, metodo_pago, tx=None) -> Optional[int]:
+    """Crea la orden ('pedido', al precio de venta vigente) y saca el libro del catálogo.
+
+    Retorna el id de la orden, o -1 si el libro no está a la venta o hubo un error.
+    """
+    salidas = _llamar('sp_comprar_libro', (id_libro, id_comprador, direccion_envio, metodo_pago), tx)
+    _invalidar('libro', id_libro, tx)
+    return -1 if salidas is None else salidas['id_orden']
+
+
+def avanzar_orden(id_orden, estado: str, tx=None) -> int:
+    """Pasa la orden a 'pagado', 'enviado', 'recibido' o 'cancelado' (ver sp_avanzar_orden).
+
+    Al cancelar, el libro vuelve al catálogo; al recibirlo, pasa a ser del comprador.
+    Retorna 1, o -1 si la transición no es válida o hubo un error.
+    """
+    salidas = _llamar('sp_avanzar_orden', (id_orden, estado), tx)
+    if salidas is None:
+        return -1
+    if salidas['id_libro'] is not None:
+        _invalidar('libro', salidas['id_libro'], tx)
+    return 1
+
+
+def completar_intercambio(id_intercambio, tx=None) -> int:
+    """Completa un intercambio aceptado: los dos libros cambian de dueño y salen del catálogo.
+
+    Retorna 1, o -1 si el intercambio no está aceptado, algún libro cambió de dueño
+    o tiene una compra en curso, o hubo un error.
+    """
+    salidas = _llamar('sp_completar_intercambio', (id_intercambio,), tx)
+    if salidas is None:
+        return -1
+    for id_libro in salidas.values():
+        if id_libro is not None:
+            _invalidar('libro', id_libro, tx)
+    return 1
@@ -0,0 +1,1029 @@
+# cruds_async.py
+"""Versión asyncio de cruds.py sobre un pool de aiomysql (dependencia opcional).
+
+Mismas funciones, argumentos y formas de retorno que cruds.py, pero cada una es una
+corrutina:
+
+    filas = await leer_usuarios(campo='ciudad', valor='Cali')
+    async with AsyncTransaction() as tx:
+        id_club = await crear_club(..., tx=tx)
+
+Con stream=True los leer_* retornan un generador asíncrono (`async for`).
+`formato` y `fields` funcionan igual que en cruds.py; `lazy` no existe aquí: las
+columnas diferidas se cargan al leer fila['resumen'], y ese acceso no puede esperar
+una corrutina. Para no traer las columnas pesadas, pase `fields`.
+La caché de entidades es la misma de cruds.py, así que las escrituras de una versión
+invalidan las lecturas cacheadas de la otra. aiomysql no tiene sentencias preparadas
+del servidor: el argumento `prepared` se acepta por compatibilidad y se ignora.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator, Iterable
+
+try:
+    import aiomysql
+except ImportError:  # pip install aiomysql
+    aiomysql = None
+
+import filas as formatos
+import instrumentacion
+from conecction import DB_CONFIG, POOL_CONFIG
+from instrumentacion import INSTRUMENTACION_CONFIG
+from cruds import (
+    STREAM_BATCH_SIZE, _SAVEPOINT_RE, _CLAVES_KEYSET, _CLAVES_CACHEABLES,
+    _sql_leer_tabla, _resultado_escritura, _puede_cachear, _invalidar, _invalidar_calificacion,
+    _codificar_cursor, _decodificar_cursor, entity_cache, _RELACIONES, LOADER_CHUNK_SIZE, _sql_llamar,
+    _columnas_tablas, _condicion, _proyeccion, _sql_buscar_libros,
+    _COLUMNAS_INSERT, _TABLAS_SIN_AUTOINCREMENT, BULK_PACKET_FRACTION, _normalizar_fila, _estimar_bytes,
+)
+
+# `except ()` no atrapa nada: sin aiomysql, get_async_pool() ya falló con ImportError.
+_ERRORES_DB = (aiomysql.Error,) if aiomysql is not None else ()
+
+_NIVELES_AISLAMIENTO = {'READ UNCOMMITTED', 'READ COMMITTED', 'REPEATABLE READ', 'SERIALIZABLE'}
+
+
+# ----------------------------------------------------------------------
+# POOL ASÍNCRONO
+# ----------------------------------------------------------------------
+
+_pool_tarea: Optional['asyncio.Task'] = None
+_pool_loop = None
+
+
+async def _crear_pool():
+    return await aiomysql.create_pool(
+        host=DB_CONFIG['host'],
+        port=DB_CONFIG.get('port', 3306),
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        db=DB_CONFIG['database'],
+        minsize=POOL_CONFIG['pool_size'],
+        maxsize=POOL_CONFIG['pool_size'] + POOL_CONFIG['max_overflow'],
+        pool_recycle=POOL_CONFIG['idle_timeout'],
+        # Cada sentencia suelta se confirma sola; AsyncTransaction usa START TRANSACTION.
+        # Con autocommit apagado un SELECT deja la conexión "en transacción" y el pool la cierra.
+        autocommit=True,
+        charset='utf8mb4',
+    )
+
+
+async def get_async_pool():
+    """Pool del event loop actual (se crea en el primer uso; uno por loop)."""
+    global _pool_tarea, _pool_loop
+    if aiomysql is None:
+        raise ImportError("cruds_async necesita aiomysql: pip install aiomysql")
+    loop = asyncio.get_running_loop()
+    if _pool_tarea is None or _pool_loop is not loop:
+        # Una sola tarea: las corrutinas que llegan a la vez esperan el mismo pool.
+        _pool_tarea = loop.create_task(_crear_pool())
+        _pool_loop = loop
+    try:
+        return await asyncio.shield(_pool_tarea)
+    except Exception:
+        if _pool_tarea.done():
+            _pool_tarea = None  # reintentar en la próxima llamada
+        raise
+
+
+async def close_async_pool():
+    """Cierra las conexiones del pool del loop actual."""
+    global _pool_tarea, _pool_loop
+    if _pool_tarea is None:
+        return
+    tarea, _pool_tarea, _pool_loop = _pool_tarea, None, None
+    pool = await tarea
+    pool.close()
+    await pool.wait_closed()
+
+
+async def _tomar_conexion() -> Tuple[Any, Any, float]:
+    """(pool, conexión, segundos de espera) o (pool, None, 0.0) si no se pudo conectar."""
+    pool = await get_async_pool()
+    inicio = time.monotonic()
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), POOL_CONFIG['checkout_timeout'])
+    except (asyncio.TimeoutError, *_ERRORES_DB) as e:
+        print(f"❌ Error al conectar a MySQL: {e}")
+        return pool, None, 0.0
+    return pool, conn, time.monotonic() - inicio
+
+
+def _devolver_conexion(pool, conn, descartar: bool = False):
+    if descartar:
+        conn.close()  # el pool no reutiliza conexiones cerradas
+    pool.release(conn)
+
+
+def _registrar(query: str, params, segundos: float, filas: int, espera: float, error):
+    # El slow log hace EXPLAIN con una conexión síncrona: se manda a un hilo para no
+    # bloquear el event loop.
+    if segundos * 1000 >= INSTRUMENTACION_CONFIG['slow_ms']:
+        asyncio.get_running_loop().run_in_executor(
+            None, instrumentacion.registrar, query, params, segundos, filas, espera, error)
+    else:
+        instrumentacion.registrar(query, params, segundos, filas, espera, error)
+
+
+# ----------------------------------------------------------------------
+# UTILITY FUNCTIONS
+# ----------------------------------------------------------------------
+
+class AsyncTransaction:
+    """Igual que cruds.Transaction, con `async with`."""
+
+    def __init__(self, isolation_level: Optional[str] = None, read_only: bool = False):
+        if isolation_level is not None and isolation_level.upper() not in _NIVELES_AISLAMIENTO:
+            raise ValueError(f"Nivel de aislamiento inválido: {isolation_level!r}")
+        self.isolation_level = isolation_level
+        self.read_only = read_only
+        self.conn = None
+        self._pool = None
+        self._savepoints = 0
+        self._al_terminar = []
+
+    async def __aenter__(self) -> 'AsyncTransaction':
+        self._pool, self.conn, _ = await _tomar_conexion()
+        if not self.conn:
+            raise ConnectionError("No se pudo obtener una conexión para la transacción")
+        try:
+            if self.isolation_level:
+                await _ejecutar(self.conn, f"SET TRANSACTION ISOLATION LEVEL {self.isolation_level.upper()}",
+                                None, True, False)
+            await _ejecutar(self.conn, "START TRANSACTION READ ONLY" if self.read_only else "START TRANSACTION",
+                            None, True, False)
+        except _ERRORES_DB:
+            _devolver_conexion(self._pool, self.conn, descartar=True)
+            self.conn = None
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.conn is None:
+            return False
+        descartar = False
+        try:
+            if exc_type is None:
+                await self.conn.commit()
+            else:
+                await self.conn.rollback()
+        except BaseException:
+            descartar = True
+            raise
+        finally:
+            _devolver_conexion(self._pool, self.conn, descartar)
+            self.conn = None
+            for callback in self._al_terminar:
+                callback()
+            self._al_terminar = []
+        return False
+
+    def on_finish(self, callback):
+        """Registra una función a ejecutar al terminar la transacción (commit o rollback)."""
+        self._al_terminar.append(callback)
+
+    async def execute(self, query: str, params: Tuple = None, commit: bool = False, fetch_one: bool = False,
+                      prepared: Optional[bool] = None, formato: str = 'dict') -> Any:
+        """Ejecuta una sentencia en la conexión de la transacción (sin hacer commit)."""
+        if self.conn is None:
+            raise RuntimeError("La transacción no está activa")
+        try:
+            return await _ejecutar(self.conn, query, params, commit, fetch_one, formato=formato)
+        except _ERRORES_DB as e:
+            print(f"❌ Error DB en transacción: {e}")
+            raise
+
+    # -- savepoints ----------------------------------------------------------
+
+    async def savepoint(self, name: Optional[str] = None) -> str:
+        """Crea un savepoint y retorna su nombre."""
+        if name is None:
+            self._savepoints += 1
+            name = f"sp_{self._savepoints}"
+        if not _SAVEPOINT_RE.match(name):
+            raise ValueError(f"Nombre de savepoint inválido: {name!r}")
+        await self.execute(f"SAVEPOINT {name}", commit=True)
+        return name
+
+    async def rollback_to(self, name: str):
+        if not _SAVEPOINT_RE.match(name):
+            raise ValueError(f"Nombre de savepoint inválido: {name!r}")
+        await self.execute(f"ROLLBACK TO SAVEPOINT {name}", commit=True)
+
+    async def release(self, name: str):
+        if not _SAVEPOINT_RE.match(name):
+            raise ValueError(f"Nombre de savepoint inválido: {name!r}")
+        await self.execute(f"RELEASE SAVEPOINT {name}", commit=True)
+
+    @asynccontextmanager
+    async def nested(self, name: Optional[str] = None):
+        """Bloque anidado: si falla se deshace solo hasta el savepoint y se relanza el error."""
+        sp = await self.savepoint(name)
+        try:
+            yield self
+        except BaseException:
+            await self.rollback_to(sp)
+            raise
+        else:
+            await self.release(sp)
+
+
+async def _ejecutar(conn, query: str, params: Tuple, commit: bool, fetch_one: bool,
+                    espera: float = 0.0, formato: str = 'dict') -> Any:
+    """Ejecuta una sentencia en `conn` sin hacer commit ni devolver la conexión."""
+    if not INSTRUMENTACION_CONFIG['enabled']:
+        return (await _ejecutar_cursor(conn, query, params, commit, fetch_one, formato))[0]
+
+    inicio = time.perf_counter()
+    filas, error = 0, None
+    try:
+        resultado, filas = await _ejecutar_cursor(conn, query, params, commit, fetch_one, formato)
+        return resultado
+    except _ERRORES_DB as e:
+        error = e
+        raise
+    finally:
+        _registrar(query, params, time.perf_counter() - inicio, filas, espera, error)
+
+
+async def _ejecutar_cursor(conn, query: str, params: Tuple, commit: bool,
+                           fetch_one: bool, formato: str = 'dict') -> Tuple[Any, int]:
+    como_dict = formato == 'dict'
+    async with conn.cursor(aiomysql.DictCursor if como_dict else aiomysql.Cursor) as cursor:
+        await cursor.execute(query, params)
+        if commit:
+            return _resultado_escritura(cursor, query), cursor.rowcount
+        elif fetch_one:
+            fila = await cursor.fetchone()
+            resto = await cursor.fetchall()
+            if not como_dict:
+                fila = formatos.convertir_una(_columnas_cursor(cursor), fila, formato)
+            return fila, (fila is not None) + len(resto)
+        filas = list(await cursor.fetchall())
+        if not como_dict:
+            return formatos.convertir(_columnas_cursor(cursor), filas, formato), len(filas)
+        return filas, len(filas)
+
+
+def _columnas_cursor(cursor) -> Tuple[str, ...]:
+    return tuple(d[0] for d in cursor.description or ())
+
+
+async def execute_query(query: str, params: Tuple = None, commit: bool = False, fetch_one: bool = False,
+                        tx: Optional[AsyncTransaction] = None, prepared: Optional[bool] = None,
+                        formato: str = 'dict') -> Any:
+    """Función genérica para ejecutar consultas (ver cruds.execute_query)."""
+    if tx is not None:
+        return await tx.execute(query, params, commit=commit, fetch_one=fetch_one, formato=formato)
+
+    pool, conn, espera = await _tomar_conexion()
+    if not conn: return None
+
+    result = None
+    descartar = False
+    try:
+        result = await _ejecutar(conn, query, params, commit, fetch_one, espera, formato)
+        if commit:
+            await conn.commit()
+    except _ERRORES_DB as e:
+        print(f"❌ Error DB en ejecución: {e}")
+        if commit:
+            try:
+                await conn.rollback()
+            except _ERRORES_DB:
+                descartar = True
+        result = -1 if commit else []
+    except asyncio.CancelledError:
+        # La respuesta pudo quedar a medio leer en el socket.
+        descartar = True
+        raise
+    finally:
+        _devolver_conexion(pool, conn, descartar)
+    return result
+
+
+async def stream_query(query: str, params: Tuple = None, batch_size: int = STREAM_BATCH_SIZE,
+                       tx: Optional[AsyncTransaction] = None, formato: str = 'dict') -> AsyncIterator[Any]:
+    """SELECT con cursor sin buffer (SSDictCursor); produce las filas por lotes de fetchmany.
+
+    Igual que cruds.stream_query, los errores de la base siempre se propagan y
+    formato='registro' produce namedtuples.
+    """
+    formatos.validar(formato, stream=True)
+    if tx is not None:
+        pool, conn, espera = None, tx.conn, 0.0
+    else:
+        pool, conn, espera = await _tomar_conexion()
+    if not conn:
+        raise aiomysql.Error("No se pudo conectar a la base de datos")
+
+    medir = INSTRUMENTACION_CONFIG['enabled']
+    segundos, leidas, error = 0.0, 0, None
+    cursor = None
+    agotado = False
+    try:
+        inicio = time.perf_counter() if medir else 0.0
+        cursor = await conn.cursor(aiomysql.SSDictCursor if formato == 'dict' else aiomysql.SSCursor)
+        await cursor.execute(query, params)
+        armar = formatos.clase_registro(_columnas_cursor(cursor))._make if formato == 'registro' else None
+        while True:
+            filas = await cursor.fetchmany(batch_size)
+            if medir:
+                segundos += time.perf_counter() - inicio
+                leidas += len(filas)
+            if not filas:
+                break
+            for fila in (map(armar, filas) if armar else filas):
+                yield fila
+            if medir:
+                inicio = time.perf_counter()
+        agotado = True
+    except _ERRORES_DB as e:
+        error = e
+        if medir:
+            segundos += time.perf_counter() - inicio
+        print(f"❌ Error DB en lectura por streaming: {e}")
+        raise
+    finally:
+        if medir:
+            _registrar(query, params, segundos, leidas, espera, error)
+        if agotado or cursor is None:
+            if cursor is not None:
+                await cursor.close()
+            if tx is None:
+                _devolver_conexion(pool, conn)
+        elif tx is not None:
+            # La transacción sigue usando la conexión: hay que leer lo que quede.
+            try:
+                await cursor.fetchall()
+                await cursor.close()
+            except _ERRORES_DB:
+                pass
+        else:
+            # Leer el resto del resultado puede costar más que abrir otra conexión.
+            _devolver_conexion(pool, conn, descartar=True)
+
+
+async def _leer(query: str, params: Tuple = None, stream: bool = False,
+                tx: Optional[AsyncTransaction] = None, formato: str = 'dict'):
+    """Lectura común de los leer_*: lista completa o generador asíncrono si stream=True."""
+    formatos.validar(formato, stream)
+    if stream:
+        return stream_query(query, params, tx=tx, formato=formato)
+    return await execute_query(query, params, commit=False, tx=tx, formato=formato)
+
+
+async def columnas_tabla(tabla: str) -> Dict[str, str]:
+    """Igual que cruds.columnas_tabla y con el mismo registro por proceso: una vez
+    cargada, _condicion y _proyeccion de cruds.py ya no consultan la base."""
+    if tabla not in _CLAVES_KEYSET:
+        raise ValueError(f"Tabla desconocida: {tabla}")
+    columnas = _columnas_tablas.get(tabla)
+    if columnas is None:
+        filas = await execute_query("""
+            SELECT COLUMN_NAME AS columna, DATA_TYPE AS tipo
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY ORDINAL_POSITION
+        """, (tabla,), commit=False)
+        if not filas:
+            raise ValueError(f"No se pudieron leer las columnas de {tabla}")
+        columnas = {f['columna']: f['tipo'].lower() for f in filas}
+        _columnas_tablas[tabla] = columnas
+    return columnas
+
+
+async def _condicion_campo(tabla: str, campo: str) -> str:
+    """cruds._condicion (`campo` va interpolado en el SQL) con las columnas ya cargadas."""
+    await columnas_tabla(tabla)
+    return _condicion(tabla, campo)
+
+
+async def _leer_tabla(tabla: str, condiciones: List[str] = (), params: List = (), after_id=None,
+                      limit: Optional[int] = None, stream: bool = False,
+                      tx: Optional[AsyncTransaction] = None, formato: str = 'dict',
+                      fields: Optional[Iterable[str]] = None):
+    if fields is not None:
+        await columnas_tabla(tabla)
+    columnas, _ = _proyeccion(tabla, fields, False)
+    query, params = _sql_leer_tabla(tabla, condiciones, params, after_id, limit, columnas)
+    return await _leer(query, params, stream=stream, tx=tx, formato=formato)
+
+
+async def _leer_cacheado(tabla: str, campo: str, valor,
+                         fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """Lectura read-through por clave primaria o única (misma caché que cruds.py)."""
+    clave = (tabla, campo, str(valor))
+    filas = entity_cache.get(clave, None)
+    if filas is None:
+        generacion = entity_cache.generation()  # ver cruds._leer_cacheado
+        filas = await _leer_tabla(tabla, [f"{campo} = %s"], [valor]) or []  # None: sin conexión
+        if filas:
+            pk = _CLAVES_CACHEABLES[tabla][0]
+            entity_cache.set(clave, filas, tags=[(tabla, str(fila[pk])) for fila in filas],
+                             generation=generacion)
+    if fields is not None:
+        columnas, _ = _proyeccion(tabla, fields, False)
+        return [{c: fila[c] for c in columnas} for fila in filas]
+    return [dict(fila) for fila in filas]
+
+
+# ----------------------------------------------------------------------
+# 1. CRUD USUARIO
+# ----------------------------------------------------------------------
+
+async def crear_usuario(nombre, email, password_hash, ciudad, telefono, rol='usuario', tx=None) -> Optional[int]:
+    query = """INSERT INTO usuario (nombre, email, password_hash, ciudad, telefono, rol)
+               VALUES (%s, %s, %s, %s, %s, %s)"""
+    return await execute_query(query, (nombre, email, password_hash, ciudad, telefono, rol), commit=True, tx=tx)
+
+
+async def leer_usuarios(campo: str = None, valor: str = None, after_id=None, limit: Optional[int] = None,
+                        stream: bool = False, tx=None, formato: str = 'dict',
+                        fields: Optional[Iterable[str]] = None):
+    if _puede_cachear('usuario', campo, valor, after_id, limit, stream, tx, formato):
+        return await _leer_cacheado('usuario', campo, valor, fields)
+    if campo and valor:
+        condicion = await _condicion_campo('usuario', campo)
+        return await _leer_tabla('usuario', [condicion], [valor], after_id, limit, stream, tx, formato, fields)
+    else:
+        return await _leer_tabla('usuario', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                                 fields=fields)
+
+
+async def actualizar_usuario(user_id, *, tx=None, **kwargs) -> int:
+    set_clauses = [f"{k} = %s" for k in kwargs.keys()]
+    values = list(kwargs.values())
+    if not set_clauses: return 0
+
+    query = f"UPDATE usuario SET {', '.join(set_clauses)} WHERE id_usuario = %s"
+    params = tuple(values + [user_id])
+    filas = await execute_query(query, params, commit=True, tx=tx)
+    _invalidar('usuario', user_id, tx)
+    return filas
+
+
+async def borrar_usuario(user_id: int, tx=None) -> int:
+    filas = await execute_query("DELETE FROM usuario WHERE id_usuario = %s", (user_id,), commit=True, tx=tx)
+    _invalidar('usuario', user_id, tx)
+    return filas
+
+
+# ----------------------------------------------------------------------
+# 2. CRUD LIBRO
+# ----------------------------------------------------------------------
+
+async def crear_libro(titulo, autor, id_propietario, isbn=None, genero=None, resumen=None, anio_publicacion=None,
+                      editorial=None, paginas=None, idioma=None, estado_fisico=None, en_catalogo=0,
+                      modalidad_publicacion='visible', precio_venta=None, tx=None) -> Optional[int]:
+    query = """INSERT INTO libro (titulo, autor, id_propietario, isbn, genero, resumen, anio_publicacion, editorial, paginas, idioma, estado_fisico, en_catalogo, modalidad_publicacion, precio_venta)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+    params = (titulo, autor, id_propietario, isbn, genero, resumen, anio_publicacion, editorial, paginas, idioma,
+              estado_fisico, en_catalogo, modalidad_publicacion, precio_venta)
+    return await execute_query(query, params, commit=True, tx=tx)
+
+
+async def leer_libros(campo: str = None, valor: str = None, after_id=None, limit: Optional[int] = None,
+                      stream: bool = False, tx=None, formato: str = 'dict',
+                      fields: Optional[Iterable[str]] = None):
+    if _puede_cachear('libro', campo, valor, after_id, limit, stream, tx, formato):
+        return await _leer_cacheado('libro', campo, valor, fields)
+    if campo and valor:
+        condicion = await _condicion_campo('libro', campo)
+        return await _leer_tabla('libro', [condicion], [valor], after_id, limit, stream, tx, formato, fields)
+    else:
+        return await _leer_tabla('libro', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                                 fields=fields)
+
+
+async def buscar_libros(termino: str, modo: str = 'natural', limit: int = 20, offset: int = 0,
+                        tx=None) -> List[Dict[str, Any]]:
+    """Búsqueda FULLTEXT por relevancia (ver cruds.buscar_libros)."""
+    sql = _sql_buscar_libros(termino, modo, limit, offset)
+    if sql is None:
+        return []
+    return await execute_query(*sql, commit=False, tx=tx)
+
+
+async def actualizar_libro(id_libro: int, *, tx=None, **kwargs) -> int:
+    set_clauses = [f"{k} = %s" for k in kwargs.keys()]
+    values = list(kwargs.values())
+    if not set_clauses: return 0
+
+    query = f"UPDATE libro SET {', '.join(set_clauses)} WHERE id_libro = %s"
+    params = tuple(values + [id_libro])
+    filas = await execute_query(query, params, commit=True, tx=tx)
+    _invalidar('libro', id_libro, tx)
+    return filas
+
+
+async def borrar_libro(id_libro: int, tx=None) -> int:
+    filas = await execute_query("DELETE FROM libro WHERE id_libro = %s", (id_libro,), commit=True, tx=tx)
+    _invalidar('libro', id_libro, tx)
+    return filas
+
+
+# ----------------------------------------------------------------------
+# 3. CRUD CLUB_LECTURA
+# ----------------------------------------------------------------------
+
+async def crear_club(nombre_club, fecha_inicio, id_libro, id_administrador, max_miembros, descripcion=None,
+                     fecha_fin=None, estado='activo', tx=None) -> Optional[int]:
+    query = """INSERT INTO club_lectura (nombre_club, descripcion, fecha_inicio, fecha_fin, estado, id_libro, id_administrador, max_miembros)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"""
+    params = (nombre_club, descripcion, fecha_inicio, fecha_fin, estado, id_libro, id_administrador, max_miembros)
+    return await execute_query(query, params, commit=True, tx=tx)
+
+
+async def leer_clubes(campo: str = None, valor: str = None, after_id=None, limit: Optional[int] = None,
+                      stream: bool = False, tx=None, formato: str = 'dict',
+                      fields: Optional[Iterable[str]] = None):
+    if _puede_cachear('club_lectura', campo, valor, after_id, limit, stream, tx, formato):
+        return await _leer_cacheado('club_lectura', campo, valor, fields)
+    if campo and valor:
+        condicion = await _condicion_campo('club_lectura', campo)
+        return await _leer_tabla('club_lectura', [condicion], [valor], after_id, limit, stream, tx, formato, fields)
+    else:
+        return await _leer_tabla('club_lectura', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                                 fields=fields)
+
+
+async def actualizar_club(id_club: int, *, tx=None, **kwargs) -> int:
+    """Actualiza campos de un club por su ID."""
+    set_clauses = [f"{k} = %s" for k in kwargs.keys()]
+    values = list(kwargs.values())
+    if not set_clauses: return 0
+
+    query = f"UPDATE club_lectura SET {', '.join(set_clauses)} WHERE id_club = %s"
+    params = tuple(values + [id_club])
+    filas = await execute_query(query, params, commit=True, tx=tx)
+    _invalidar('club_lectura', id_club, tx)
+    return filas
+
+
+async def borrar_club(id_club: int, tx=None) -> int:
+    """Borra un club por su ID."""
+    filas = await execute_query("DELETE FROM club_lectura WHERE id_club = %s", (id_club,), commit=True, tx=tx)
+    _invalidar('club_lectura', id_club, tx)
+    return filas
+
+
+async def crear_club_con_administrador(nombre_club, fecha_inicio, id_libro, id_administrador, max_miembros,
+                                       descripcion=None, fecha_fin=None, estado='activo', tx=None) -> int:
+    """Crea el club, afilia al administrador y registra su lectura del libro en una sola transacción."""
+    if tx is None:
+        async with AsyncTransaction() as nueva_tx:
+            return await crear_club_con_administrador(nombre_club, fecha_inicio, id_libro, id_administrador,
+                                                      max_miembros, descripcion, fecha_fin, estado, tx=nueva_tx)
+
+    id_club = await crear_club(nombre_club, fecha_inicio, id_libro, id_administrador, max_miembros,
+                               descripcion, fecha_fin, estado, tx=tx)
+    await crear_usuario_club(id_administrador, id_club, 'aceptado', tx=tx)
+    await crear_leer_libros(id_administrador, id_club, id_libro, fecha_inicio, tx=tx)
+    return id_club
+
+
+# ----------------------------------------------------------------------
+# 4. CRUD USUARIO_CLUB
+# ----------------------------------------------------------------------
+
+async def crear_usuario_club(id_usuario, id_club, estado_miembro='pendiente', tx=None) -> Optional[int]:
+    query = """INSERT INTO usuario_club (id_usuario, id_club, estado_miembro)
+               VALUES (%s, %s, %s)"""
+    return await execute_query(query, (id_usuario, id_club, estado_miembro), commit=True, tx=tx)
+
+
+async def leer_usuarios_club(id_club: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                             stream: bool = False, tx=None, formato: str = 'dict',
+                             fields: Optional[Iterable[str]] = None):
+    if id_club:
+        return await _leer_tabla('usuario_club', ["id_club = %s"], [id_club], after_id, limit, stream, tx,
+                                 formato, fields)
+    else:
+        return await _leer_tabla('usuario_club', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                                 fields=fields)
+
+
+# ----------------------------------------------------------------------
+# 5. CRUD RESENA
+# ----------------------------------------------------------------------
+
+async def crear_resena(contenido, calificacion, id_usuario, id_libro, id_resena_padre=None,
+                       tx=None) -> Optional[int]:
+    query = """INSERT INTO resena (contenido, calificacion, id_usuario, id_libro, id_resena_padre)
+               VALUES (%s, %s, %s, %s, %s)"""
+    resena_id = await execute_query(query, (contenido, calificacion, id_usuario, id_libro, id_resena_padre),
+                                    commit=True, tx=tx)
+    _invalidar_calificacion(id_usuario, id_libro, tx)
+    return resena_id
+
+
+async def leer_resenas(id_libro: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                       stream: bool = False, tx=None, formato: str = 'dict',
+                       fields: Optional[Iterable[str]] = None):
+    if id_libro:
+        return await _leer_tabla('resena', ["id_libro = %s"], [id_libro], after_id, limit, stream, tx, formato, fields)
+    else:
+        return await _leer_tabla('resena', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                                 fields=fields)
+
+
+async def _autores_resena(resena_id, tx=None) -> Optional[Dict[str, Any]]:
+    return await execute_query("SELECT id_usuario, id_libro FROM resena WHERE id_resena = %s",
+                               (resena_id,), commit=False, fetch_one=True, tx=tx)
+
+
+async def actualizar_resena(resena_id, *, tx=None, **kwargs) -> int:
+    set_clauses = [f"{k} = %s" for k in kwargs.keys()]
+    values = list(kwargs.values())
+    if not set_clauses: return 0
+
+    anterior = await _autores_resena(resena_id, tx)
+    query = f"UPDATE resena SET {', '.join(set_clauses)} WHERE id_resena = %s"
+    filas = await execute_query(query, tuple(values + [resena_id]), commit=True, tx=tx)
+    if anterior:
+        _invalidar_calificacion(anterior['id_usuario'], anterior['id_libro'], tx)
+    _invalidar_calificacion(kwargs.get('id_usuario'), kwargs.get('id_libro'), tx)
+    return filas
+
+
+async def borrar_resena(resena_id, tx=None) -> int:
+    anterior = await _autores_resena(resena_id, tx)
+    filas = await execute_query("DELETE FROM resena WHERE id_resena = %s", (resena_id,), commit=True, tx=tx)
+    if anterior:
+        _invalidar_calificacion(anterior['id_usuario'], anterior['id_libro'], tx)
+    return filas
+
+
+# ----------------------------------------------------------------------
+# 6. CRUD ORDEN_COMPRA
+# ----------------------------------------------------------------------
+
+async def crear_orden(precio_total, direccion_envio, metodo_pago, id_comprador, id_libro, estado_orden='pedido',
+                      tx=None) -> Optional[int]:
+    query = """INSERT INTO orden_compra (precio_total, estado_orden, direccion_envio, metodo_pago, id_comprador, id_libro)
+               VALUES (%s, %s, %s, %s, %s, %s)"""
+    return await execute_query(query, (precio_total, estado_orden, direccion_envio, metodo_pago, id_comprador,
+                                       id_libro), commit=True, tx=tx)
+
+
+async def leer_ordenes(id_comprador: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                       stream: bool = False, tx=None, formato: str = 'dict',
+                       fields: Optional[Iterable[str]] = None):
+    if id_comprador:
+        return await _leer_tabla('orden_compra', ["id_comprador = %s"], [id_comprador], after_id, limit, stream, tx,
+                                 formato, fields)
+    else:
+        return await _leer_tabla('orden_compra', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                                 fields=fields)
+
+
+# ----------------------------------------------------------------------
+# 7. CRUD INTERCAMBIO
+# ----------------------------------------------------------------------
+
+async def crear_intercambio(id_usuario_propone, id_usuario_recibe, id_libro_ofrecido, id_libro_solicitado,
+                            estado_intercambio='propuesto', mensaje_propuesta=None, condiciones=None,
+                            tx=None) -> Optional[int]:
+    query = """INSERT INTO intercambio (estado_intercambio, mensaje_propuesta, condiciones, id_usuario_propone, id_usuario_recibe, id_libro_ofrecido, id_libro_solicitado)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)"""
+    params = (estado_intercambio, mensaje_propuesta, condiciones, id_usuario_propone, id_usuario_recibe,
+              id_libro_ofrecido, id_libro_solicitado)
+    return await execute_query(query, params, commit=True, tx=tx)
+
+
+async def leer_intercambios(id_usuario: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                            stream: bool = False, tx=None, formato: str = 'dict',
+                            fields: Optional[Iterable[str]] = None):
+    if id_usuario:
+        condicion = "(id_usuario_propone = %s OR id_usuario_recibe = %s)"
+        return await _leer_tabla('intercambio', [condicion], [id_usuario, id_usuario], after_id, limit, stream, tx,
+                                 formato, fields)
+    else:
+        return await _leer_tabla('intercambio', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                                 fields=fields)
+
+
+# ----------------------------------------------------------------------
+# 8. CRUD LEER_LIBROS
+# ----------------------------------------------------------------------
+
+async def crear_leer_libros(id_usuario, id_club, id_libro, fecha_inicio, fecha_fin=None, tx=None) -> int:
+    query = """INSERT INTO leer_libros (id_usuario, id_club, id_libro, fecha_inicio, fecha_fin)
+               VALUES (%s, %s, %s, %s, %s)"""
+    return await execute_query(query, (id_usuario, id_club, id_libro, fecha_inicio, fecha_fin), commit=True, tx=tx)
+
+
+async def leer_registros_lectura(id_club: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                                 stream: bool = False, tx=None, formato: str = 'dict',
+                                 fields: Optional[Iterable[str]] = None):
+    if id_club:
+        return await _leer_tabla('leer_libros', ["id_club = %s"], [id_club], after_id, limit, stream, tx,
+                                 formato, fields)
+    else:
+        return await _leer_tabla('leer_libros', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                                 fields=fields)
+
+
+# ----------------------------------------------------------------------
+# 9. CRUD REUNION
+# ----------------------------------------------------------------------
+
+async def crear_reunion(id_club, fecha_reunion, tema, descripcion=None, lugar=None, tx=None) -> Optional[int]:
+    query = """INSERT INTO reunion (id_club, fecha_reunion, tema, descripcion, lugar)
+               VALUES (%s, %s, %s, %s, %s)"""
+    return await execute_query(query, (id_club, fecha_reunion, tema, descripcion, lugar), commit=True, tx=tx)
+
+
+async def leer_reuniones(id_club: Optional[int] = None, after_id=None, limit: Optional[int] = None,
+                         stream: bool = False, tx=None, formato: str = 'dict',
+                         fields: Optional[Iterable[str]] = None):
+    if id_club:
+        return await _leer_tabla('reunion', ["id_club = %s"], [id_club], after_id, limit, stream, tx, formato, fields)
+    else:
+        return await _leer_tabla('reunion', after_id=after_id, limit=limit, stream=stream, tx=tx, formato=formato,
+                                 fields=fields)
+
+
+# ----------------------------------------------------------------------
+# 10. CARGA MASIVA (INSERT multi-fila por bloques)
+# ----------------------------------------------------------------------
+
+async def _max_allowed_packet(conn) -> int:
+    async with conn.cursor() as cursor:
+        await cursor.execute("SELECT @@SESSION.max_allowed_packet")
+        return int((await cursor.fetchone())[0])
+
+
+async def _insert_bulk(tabla: str, filas: Iterable, chunk_size: int = 1000,
+                       tx: Optional[AsyncTransaction] = None, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """Igual que cruds._insert_bulk: bloques de INSERT multi-fila con un commit por bloque
+    (un savepoint por bloque dentro de `tx`), y el mismo diccionario de resultado."""
+    columnas = [c for c, _ in _COLUMNAS_INSERT[tabla]]
+    prefijo = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES "
+    marcador = "(" + ", ".join(["%s"] * len(columnas)) + ")"
+    autoincrement = tabla not in _TABLAS_SIN_AUTOINCREMENT
+
+    resultado = {'filas_insertadas': 0, 'chunks': 0, 'rangos_id': [], 'errores': []}
+    if tx is not None:
+        pool, conn = None, tx.conn
+    else:
+        pool, conn, _ = await _tomar_conexion()
+    if not conn:
+        resultado['errores'].append({'chunk': None, 'desde_fila': 0, 'filas': 0,
+                                     'error': "No se pudo conectar a la base de datos"})
+        return resultado
+
+    async def enviar(valores: List[Tuple], desde_fila: int):
+        numero = resultado['chunks']
+        resultado['chunks'] += 1
+        sql = prefijo + ", ".join([marcador] * len(valores))
+        params = tuple(v for fila in valores for v in fila)
+        sp = await tx.savepoint() if tx is not None else None
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                if tx is not None:
+                    await tx.release(sp)
+                else:
+                    await conn.commit()
+                resultado['filas_insertadas'] += cursor.rowcount
+                if autoincrement:
+                    resultado['rangos_id'].append((cursor.lastrowid, cursor.lastrowid + len(valores) - 1))
+        except _ERRORES_DB as e:
+            print(f"❌ Error DB en bloque {numero} de {tabla}: {e}")
+            if tx is not None:
+                await tx.rollback_to(sp)
+            else:
+                await conn.rollback()
+            resultado['errores'].append({'chunk': numero, 'desde_fila': desde_fila,
+                                         'filas': len(valores), 'error': str(e)})
+
+    descartar = False
+    try:
+        limite = max_bytes or int(await _max_allowed_packet(conn) * BULK_PACKET_FRACTION)
+        bloque: List[Tuple] = []
+        tam_bloque = len(prefijo)
+        desde_fila = 0
+        for i, fila in enumerate(filas):
+            valores = _normalizar_fila(tabla, fila)
+            tam_fila = _estimar_bytes(valores)
+            if bloque and (len(bloque) >= chunk_size or tam_bloque + tam_fila > limite):
+                await enviar(bloque, desde_fila)
+                bloque, tam_bloque, desde_fila = [], len(prefijo), i
+            bloque.append(valores)
+            tam_bloque += tam_fila
+        if bloque:
+            await enviar(bloque, desde_fila)
+    except asyncio.CancelledError:
+        descartar = True
+        raise
+    finally:
+        if tx is None:
+            _devolver_conexion(pool, conn, descartar)
+    return resultado
+
+
+async def crear_usuario_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return await _insert_bulk('usuario', filas, chunk_size, tx)
+
+
+async def crear_libro_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return await _insert_bulk('libro', filas, chunk_size, tx)
+
+
+async def crear_club_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return await _insert_bulk('club_lectura', filas, chunk_size, tx)
+
+
+async def crear_usuario_club_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return await _insert_bulk('usuario_club', filas, chunk_size, tx)
+
+
+async def crear_resena_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    resultado = await _insert_bulk('resena', filas, chunk_size, tx)
+    # Cambian los rating_* de muchos libros y usuarios: más simple vaciar la caché.
+    entity_cache.clear()
+    if tx is not None:
+        tx.on_finish(entity_cache.clear)
+    return resultado
+
+
+async def crear_orden_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return await _insert_bulk('orden_compra', filas, chunk_size, tx)
+
+
+async def crear_intercambio_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return await _insert_bulk('intercambio', filas, chunk_size, tx)
+
+
+async def crear_leer_libros_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return await _insert_bulk('leer_libros', filas, chunk_size, tx)
+
+
+async def crear_reunion_bulk(filas: Iterable, chunk_size: int = 1000, tx=None) -> Dict[str, Any]:
+    return await _insert_bulk('reunion', filas, chunk_size, tx)
+
+
+# ----------------------------------------------------------------------
+# 11. PAGINACIÓN CON CURSOR OPACO
+# ----------------------------------------------------------------------
+
+_LECTORES = {
+    'usuario': leer_usuarios,
+    'libro': leer_libros,
+    'club_lectura': leer_clubes,
+    'usuario_club': leer_usuarios_club,
+    'resena': leer_resenas,
+    'orden_compra': leer_ordenes,
+    'intercambio': leer_intercambios,
+    'leer_libros': leer_registros_lectura,
+    'reunion': leer_reuniones,
+}
+
+
+async def leer_pagina(tabla: str, cursor: Optional[str] = None, limit: int = 20, tx=None,
+                      **filtros) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Retorna (filas, siguiente_cursor); los cursores son compatibles con cruds.leer_pagina."""
+    lector = _LECTORES[tabla]
+    claves = _CLAVES_KEYSET[tabla]
+    after_id = _decodificar_cursor(tabla, cursor) if cursor else None
+    if after_id is not None and len(claves) == 1:
+        after_id = after_id[0]
+
+    filas = await lector(after_id=after_id, limit=limit + 1, tx=tx, **filtros)
+    if len(filas) <= limit:
+        return filas, None
+    filas = filas[:limit]
+    ultima = filas[-1]
+    return filas, _codificar_cursor(tabla, tuple(ultima[c] for c in claves))
+
+
+# ----------------------------------------------------------------------
+# 12. CARGA DE ENTIDADES RELACIONADAS (evita N+1)
+# ----------------------------------------------------------------------
+
+async def leer_por_ids(tabla: str, ids, chunk_size: int = LOADER_CHUNK_SIZE,
+                       tx: Optional[AsyncTransaction] = None) -> Dict[Any, Dict[str, Any]]:
+    """Retorna {id: fila} de `tabla` con un IN por bloque (ver cruds.leer_por_ids)."""
+    pk = _CLAVES_CACHEABLES[tabla][0]
+    encontradas: Dict[Any, Dict[str, Any]] = {}
+    faltan = []
+    for valor in dict.fromkeys(v for v in ids if v is not None):
+        filas = entity_cache.get((tabla, pk, str(valor)), None) if tx is None else None
+        if filas:
+            encontradas[valor] = dict(filas[0])
+        else:
+            faltan.append(valor)
+
+    for i in range(0, len(faltan), chunk_size):
+        bloque = faltan[i:i + chunk_size]
+        query = f"SELECT * FROM {tabla} WHERE {pk} IN ({', '.join(['%s'] * len(bloque))})"
+        generacion = entity_cache.generation()
+        for fila in await execute_query(query, tuple(bloque), commit=False, tx=tx) or []:
+            if tx is None:
+                entity_cache.set((tabla, pk, str(fila[pk])), [fila], tags=[(tabla, str(fila[pk]))],
+                                 generation=generacion)
+            encontradas[fila[pk]] = dict(fila)
+    return encontradas
+
+
+async def _adjuntar(filas: List[Dict[str, Any]], columnas: List[str], tx) -> List[Dict[str, Any]]:
+    ids_por_tabla: Dict[str, set] = {}
+    for columna in columnas:
+        ids_por_tabla.setdefault(_RELACIONES[columna], set()).update(f.get(columna) for f in filas)
+    tablas = list(ids_por_tabla)
+    if tx is None:
+        resultados = await asyncio.gather(*(leer_por_ids(t, ids_por_tabla[t]) for t in tablas))
+    else:  # una transacción es una sola conexión: una consulta a la vez
+        resultados = [await leer_por_ids(t, ids_por_tabla[t], tx=tx) for t in tablas]
+    entidades = dict(zip(tablas, resultados))
+    for fila in filas:
+        for columna in columnas:
+            fila[columna[3:]] = entidades[_RELACIONES[columna]].get(fila.get(columna))
+    return filas
+
+
+async def cargar_relacionados(filas, columnas=None, tx: Optional[AsyncTransaction] = None):
+    """Como cruds.cargar_relacionados. Sin `tx` las tablas se leen en paralelo; con un
+    generador asíncrono (stream=True) retorna otro que carga por bloques."""
+    if isinstance(filas, list):
+        if not filas:
+            return filas
+        columnas = list(columnas) if columnas is not None else [c for c in filas[0] if c in _RELACIONES]
+        return await _adjuntar(filas, columnas, tx)
+    return _cargar_relacionados_stream(filas, columnas, tx)
+
+
+async def _cargar_relacionados_stream(filas, columnas, tx) -> AsyncIterator[Dict[str, Any]]:
+    bloque = []
+    try:
+        async for fila in filas:
+            bloque.append(fila)
+            if len(bloque) >= STREAM_BATCH_SIZE:
+                for f in await cargar_relacionados(bloque, columnas, tx):
+                    yield f
+                bloque = []
+        if bloque:
+            for f in await cargar_relacionados(bloque, columnas, tx):
+                yield f
+    finally:
+        await filas.aclose()
+
+
+# ----------------------------------------------------------------------
+# 13. FLUJOS DEL MERCADO (procedimientos de flujos.sql)
+# ----------------------------------------------------------------------
+
+async def _llamar(procedimiento: str, params: Tuple,
+                  tx: Optional[AsyncTransaction] = None) -> Optional[Dict[str, Any]]:
+    """Ver cruds._llamar: un solo CALL que confirma y devuelve las salidas."""
+    if tx is not None:
+        sentencia, params = _sql_llamar(procedimiento, params, False)
+        return await tx.execute(sentencia, params, fetch_one=True)
+
+    sentencia, params = _sql_llamar(procedimiento, params, True)
+    pool, conn, espera = await _tomar_conexion()
+    if not conn: return None
+    descartar = False
+    try:
+        try:
+            return await _ejecutar(conn, sentencia, params, False, True, espera)
+        except _ERRORES_DB as e:
+            print(f"❌ Error DB en {procedimiento}: {e}")
+            try:
+                await conn.rollback()
+            except _ERRORES_DB:
+                descartar = True
+            return None
+    except asyncio.CancelledError:
+        descartar = True
+        raise
+    finally:
+        _devolver_conexion(pool, conn, descartar)
+
+
+async def comprar_libro(id_libro, id_comprador, direccion_envio, metodo_pago, tx=None) -> Optional[int]:
+    salidas = await _llamar('sp_comprar_libro', (id_libro, id_comprador, direccion_envio, metodo_pago), tx)
+    _invalidar('libro', id_libro, tx)
+    return -1 if salidas is None else salidas['id_orden']
+
+
+async def avanzar_orden(id_orden, estado: str, tx=None) -> int:
+    salidas = await _llamar('sp_avanzar_orden', (id_orden, estado), tx)
+    if salidas is None:
+        return -1
+    if salidas['id_libro'] is not None:
+        _invalidar('libro', salidas['id_libro'], tx)
+    return 1
+
+
+async def completar_intercambio(id_intercambio, tx=None) -> int:
+    salidas = await _llamar('sp_completar_intercambio', (id_intercambio,), tx)
+    if salidas is None:
+        return -1
+    for id_libro in salidas.values():
+        if id_libro is not None:
+            _invalidar('libro', id_libro, tx)
+    return 1
@@ -0,0 +1,333 @@
+# exportar.py
+"""Exporta tablas (leer_*) y consultas (reportes.py) a CSV, NDJSON o Parquet.
+
+    python exportar.py tabla libro libros.csv.gz
+    python exportar.py tabla resena resenas.ndjson.zst --filtro id_libro=10
+    python exportar.py consulta 7 intercambios.parquet --compresion zstd
+
+Las filas se leen con un cursor sin buffer (stream=True) y se escriben por bloques de
+`chunk_size`, así la memoria no depende del tamaño de la tabla. El formato y la
+compresión se deducen de la extensión si no se indican.
+
+Dependencias opcionales: pyarrow (Parquet) y zstandard (compresión zstd de CSV/NDJSON).
+"""
+import argparse
+import csv
+import gzip
+import inspect
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pip install pyarrow
+    pa = pq = None
+
+try:
+    import zstandard
+except ImportError:  # pip install zstandard
+    zstandard = None
+
+from mysql.connector import Error
+
+import reportes
+from cruds import _LECTORES, execute_query
+
+FORMATOS = ('csv', 'ndjson', 'parquet')
+COMPRESIONES = (None, 'gzip', 'zstd')
+EXPORT_CHUNK_SIZE = 10_000
+
+_EXTENSIONES_FORMATO = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.parquet': 'parquet'}
+_EXTENSIONES_COMPRESION = {'.gz': 'gzip', '.zst': 'zstd'}
+
+
+def _deducir(ruta: str, formato: Optional[str], compresion: Optional[str]) -> Tuple[str, Optional[str]]:
+    base, ext = os.path.splitext(ruta.lower())
+    if ext in _EXTENSIONES_COMPRESION:
+        compresion = compresion or _EXTENSIONES_COMPRESION[ext]
+        base, ext = os.path.splitext(base)
+    formato = formato or _EXTENSIONES_FORMATO.get(ext)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato desconocido para {ruta!r}; use uno de {FORMATOS}")
+    if compresion not in COMPRESIONES:
+        raise ValueError(f"Compresión desconocida: {compresion!r}")
+    return formato, compresion
+
+
+def _bloques(filas: Iterable[Dict[str, Any]], tamano: int) -> Iterator[List[Dict[str, Any]]]:
+    filas = iter(filas)
+    while True:
+        bloque = list(itertools.islice(filas, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+def _valor_texto(valor) -> Any:
+    """Valores JSON/CSV: fechas en ISO 8601, decimales como texto exacto."""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, (Decimal, timedelta)):
+        return str(valor)
+    if isinstance(valor, (bytes, bytearray)):
+        return valor.decode('utf-8', errors='replace')
+    return valor
+
+
+# ----------------------------------------------------------------------
+# ESCRITORES
+# ----------------------------------------------------------------------
+
+def _abrir_texto(ruta: str, compresion: Optional[str]):
+    if compresion == 'gzip':
+        return gzip.open(ruta, 'wt', encoding='utf-8', newline='')
+    if compresion == 'zstd':
+        if zstandard is None:
+            raise ImportError("La compresión zstd necesita zstandard: pip install zstandard")
+        crudo = open(ruta, 'wb')
+        return io.TextIOWrapper(zstandard.ZstdCompressor().stream_writer(crudo, closefd=True),
+                                encoding='utf-8', newline='')
+    return open(ruta, 'w', encoding='utf-8', newline='')
+
+
+class _EscritorCSV:
+    def __init__(self, ruta: str, compresion: Optional[str]):
+        self._archivo = _abrir_texto(ruta, compresion)
+        self._csv = csv.writer(self._archivo)
+        self._columnas = None
+
+    def escribir(self, bloque: List[Dict[str, Any]]):
+        if self._columnas is None:
+            self._columnas = list(bloque[0].keys())
+            self._csv.writerow(self._columnas)
+        self._csv.writerows([_valor_texto(fila.get(c)) for c in self._columnas] for fila in bloque)
+
+    def cerrar(self):
+        self._archivo.close()
+
+
+class _EscritorNDJSON:
+    def __init__(self, ruta: str, compresion: Optional[str]):
+        self._archivo = _abrir_texto(ruta, compresion)
+
+    def escribir(self, bloque: List[Dict[str, Any]]):
+        self._archivo.write(''.join(
+            json.dumps({k: _valor_texto(v) for k, v in fila.items()}, ensure_ascii=False) + '\n'
+            for fila in bloque))
+
+    def cerrar(self):
+        self._archivo.close()
+
+
+_ENTEROS = ('tinyint', 'smallint', 'mediumint', 'int', 'bigint', 'year')
+_BINARIOS = ('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob')
+
+
+def _columnas_mysql(tabla: str) -> Dict[str, Dict[str, Any]]:
+    """Tipo, precisión y escala de cada columna de `tabla`, para el esquema Parquet."""
+    filas = execute_query("""
+        SELECT COLUMN_NAME AS columna, DATA_TYPE AS tipo, COLUMN_TYPE AS tipo_columna,
+               NUMERIC_PRECISION AS precision_num, NUMERIC_SCALE AS escala
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY ORDINAL_POSITION
+    """, (tabla,), commit=False)
+    return {f['columna']: f for f in filas or []}
+
+
+def _tipo_arrow(columna: Dict[str, Any]):
+    tipo = str(columna['tipo']).lower()
+    if tipo in _ENTEROS:
+        sin_signo = 'unsigned' in str(columna['tipo_columna']).lower()
+        return pa.uint64() if tipo == 'bigint' and sin_signo else pa.int64()
+    if tipo == 'decimal':
+        precision, escala = int(columna['precision_num']), int(columna['escala'])
+        return pa.decimal128(precision, escala) if precision <= 38 else pa.decimal256(precision, escala)
+    if tipo == 'float':
+        return pa.float32()
+    if tipo == 'double':
+        return pa.float64()
+    if tipo == 'date':
+        return pa.date32()
+    if tipo in ('datetime', 'timestamp'):
+        return pa.timestamp('us')
+    if tipo == 'time':
+        return pa.duration('us')
+    if tipo in _BINARIOS:
+        return pa.binary()
+    return pa.string()
+
+
+class _EscritorParquet:
+    """Un row group por bloque.
+
+    Con `tipos` (columnas de _columnas_mysql) el esquema sale de los tipos de MySQL.
+    Sin ellos (consultas) se infiere del primer bloque: los DECIMAL se guardan con
+    precisión 38, porque la inferida es la de los valores vistos y un valor posterior
+    con más dígitos no cabría, y las columnas que vienen todas en NULL, como texto.
+    Sin filas se escribe igual un archivo vacío con el esquema que se conozca.
+    """
+
+    def __init__(self, ruta: str, compresion: Optional[str], tipos: Optional[Dict[str, Dict[str, Any]]] = None):
+        if pa is None:
+            raise ImportError("La exportación a Parquet necesita pyarrow: pip install pyarrow")
+        self._ruta = ruta
+        self._compresion = compresion or 'snappy'
+        self._tipos = tipos or {}
+        self._escritor = None
+        self._esquema = None
+        self._como_texto = set()
+
+    def _abrir(self, bloque: List[Dict[str, Any]]):
+        inferido = pa.Table.from_pylist(bloque).schema if bloque else None
+        campos = []
+        for nombre in (bloque[0] if bloque else self._tipos):
+            if nombre in self._tipos:
+                tipo = _tipo_arrow(self._tipos[nombre])
+            else:
+                tipo = inferido.field(nombre).type
+                if pa.types.is_null(tipo):
+                    tipo = pa.string()
+                elif pa.types.is_decimal(tipo):
+                    tipo = pa.decimal128(38, tipo.scale)
+            if pa.types.is_string(tipo):
+                self._como_texto.add(nombre)  # JSON, SET o bytes de la conexión llegan como otros tipos
+            campos.append(pa.field(nombre, tipo))
+        self._esquema = pa.schema(campos)
+        self._escritor = pq.ParquetWriter(self._ruta, self._esquema, compression=self._compresion)
+
+    def escribir(self, bloque: List[Dict[str, Any]]):
+        if self._escritor is None:
+            self._abrir(bloque)
+        if self._como_texto:
+            bloque = [{k: (v if k not in self._como_texto or v is None or isinstance(v, str)
+                           else str(_valor_texto(v))) for k, v in fila.items()}
+                      for fila in bloque]
+        self._escritor.write_table(pa.Table.from_pylist(bloque, schema=self._esquema))
+
+    def cerrar(self):
+        if self._escritor is None:
+            self._abrir([])
+        self._escritor.close()
+
+
+_ESCRITORES = {'csv': _EscritorCSV, 'ndjson': _EscritorNDJSON, 'parquet': _EscritorParquet}
+
+
+# ----------------------------------------------------------------------
+# EXPORTACIÓN
+# ----------------------------------------------------------------------
+
+def exportar_filas(filas: Iterable[Dict[str, Any]], ruta: str, formato: Optional[str] = None,
+                   compresion: Optional[str] = None, chunk_size: int = EXPORT_CHUNK_SIZE,
+                   progreso: bool = False, tipos: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Escribe `filas` en `ruta` por bloques y retorna filas, bytes, tiempo y throughput.
+
+    `tipos` (ver _columnas_mysql) fija el esquema de Parquet; los otros formatos no lo usan.
+    Si la lectura o la escritura fallan a la mitad, se borra el archivo incompleto y
+    se propaga la excepción.
+    """
+    formato, compresion = _deducir(ruta, formato, compresion)
+    if formato == 'parquet':
+        escritor = _EscritorParquet(ruta, compresion, tipos)
+    else:
+        escritor = _ESCRITORES[formato](ruta, compresion)
+    inicio = time.perf_counter()
+    total, bloques = 0, 0
+    completo = False
+    try:
+        for bloque in _bloques(filas, chunk_size):
+            escritor.escribir(bloque)
+            total += len(bloque)
+            bloques += 1
+            if progreso:
+                print(f"  {total:>12,} filas  {total / (time.perf_counter() - inicio):>10,.0f} filas/s", end='\r')
+        completo = True
+    finally:
+        try:
+            escritor.cerrar()
+        finally:
+            if hasattr(filas, 'close'):
+                filas.close()  # libera la conexión si la exportación se cortó a la mitad
+            if not completo:
+                if progreso:
+                    print()
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+    segundos = time.perf_counter() - inicio
+    tamano = os.path.getsize(ruta)
+    if progreso:
+        print()
+    return {
+        'ruta': ruta,
+        'formato': formato,
+        'compresion': compresion,
+        'filas': total,
+        'bloques': bloques,
+        'bytes': tamano,
+        'segundos': round(segundos, 3),
+        'filas_por_s': round(total / segundos, 1) if segundos else None,
+        'mb_por_s': round(tamano / 1_048_576 / segundos, 2) if segundos else None,
+    }
+
+
+def exportar_tabla(tabla: str, ruta: str, formato: Optional[str] = None, compresion: Optional[str] = None,
+                   chunk_size: int = EXPORT_CHUNK_SIZE, progreso: bool = False, **filtros) -> Dict[str, Any]:
+    """Exporta una tabla completa (o filtrada con los argumentos de su leer_*)."""
+    if tabla not in _LECTORES:
+        raise ValueError(f"Tabla desconocida: {tabla!r}")
+    tipos = _columnas_mysql(tabla) if _deducir(ruta, formato, compresion)[0] == 'parquet' else None
+    filas = _LECTORES[tabla](stream=True, **filtros)
+    return exportar_filas(filas, ruta, formato, compresion, chunk_size, progreso, tipos)
+
+
+def exportar_consulta(numero: int, ruta: str, formato: Optional[str] = None, compresion: Optional[str] = None,
+                      chunk_size: int = EXPORT_CHUNK_SIZE, progreso: bool = False, **parametros) -> Dict[str, Any]:
+    """Exporta el resultado de una consulta de reportes.py (parámetros como en REPORTES)."""
+    funcion = reportes.REPORTES[numero][1]
+    if 'stream' in inspect.signature(funcion).parameters:
+        parametros['stream'] = True
+    return exportar_filas(funcion(**parametros), ruta, formato, compresion, chunk_size, progreso)
+
+
+def _filtros(pares: List[str]) -> Dict[str, Any]:
+    filtros = {}
+    for par in pares:
+        clave, _, valor = par.partition('=')
+        filtros[clave] = int(valor) if valor.isdigit() else valor
+    return filtros
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta tablas o consultas por bloques.")
+    parser.add_argument("origen", choices=["tabla", "consulta"])
+    parser.add_argument("nombre", help="Tabla (libro, resena...) o número de consulta (1-15).")
+    parser.add_argument("ruta")
+    parser.add_argument("--formato", choices=FORMATOS)
+    parser.add_argument("--compresion", choices=[c for c in COMPRESIONES if c])
+    parser.add_argument("--chunk", type=int, default=EXPORT_CHUNK_SIZE)
+    parser.add_argument("--filtro", action="append", default=[], metavar="CLAVE=VALOR",
+                        help="Filtro del leer_* o parámetro de la consulta (repetible).")
+    args = parser.parse_args()
+
+    try:
+        if args.origen == "tabla":
+            resultado = exportar_tabla(args.nombre, args.ruta, args.formato, args.compresion, args.chunk,
+                                       progreso=True, **_filtros(args.filtro))
+        else:
+            resultado = exportar_consulta(int(args.nombre), args.ruta, args.formato, args.compresion, args.chunk,
+                                          progreso=True, **_filtros(args.filtro))
+    except Error:
+        # stream_query ya imprimió el error de la base.
+        print(f"❌ Exportación incompleta; no se dejó {args.ruta}")
+        sys.exit(1)
+    print(f"✅ {resultado['filas']:,} filas en {resultado['segundos']} s "
+          f"({resultado['filas_por_s']} filas/s, {resultado['mb_por_s']} MB/s) -> {resultado['ruta']}")
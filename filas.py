@@ -0,0 +1,117 @@
+# filas.py
+"""Formatos de resultado para las lecturas (parámetro `formato` de execute_query, _leer...).
+
+    'dict'      lista de dicts (por defecto). Cada fila repite los nombres de columna.
+    'tupla'     Filas: lista de tuplas con un solo encabezado compartido (.columnas).
+    'registro'  lista de namedtuples; la clase se genera una vez por combinación de columnas.
+    'columnas'  Columnas: una lista de valores por columna.
+
+Una fila de libro (16 columnas) como dict ocupa varias veces lo que ocupa como tupla;
+en lecturas grandes conviene 'tupla' o 'registro'. Con stream=True solo hay 'dict'
+y 'registro' (una tupla suelta no sabe a qué columna corresponde cada valor).
+"""
+import itertools
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+FORMATOS = ('dict', 'tupla', 'registro', 'columnas')
+FORMATOS_STREAM = ('dict', 'registro')
+
+
+def validar(formato: str, stream: bool = False):
+    permitidos = FORMATOS_STREAM if stream else FORMATOS
+    if formato not in permitidos:
+        raise ValueError(f"Formato inválido{' para stream' if stream else ''}: {formato!r} "
+                         f"(use {', '.join(permitidos)})")
+
+
+@lru_cache(maxsize=256)
+def clase_registro(columnas: Tuple[str, ...]):
+    """namedtuple para estas columnas (cacheada: una clase por forma de consulta).
+
+    Los nombres que no sirven como atributo (COUNT(*), repetidos...) se renombran a
+    _0, _1...; `_columnas` conserva los originales.
+    """
+    clase = namedtuple('Registro', columnas, rename=True)
+    clase._columnas = columnas
+    return clase
+
+
+class Filas(list):
+    """Lista de tuplas con los nombres de columna una sola vez, en `columnas`."""
+    __slots__ = ('columnas',)
+
+    def __init__(self, columnas: Sequence[str], filas: Iterable[tuple] = ()):
+        super().__init__(filas)
+        self.columnas = tuple(columnas)
+
+    def como_dicts(self) -> Iterator[Dict[str, Any]]:
+        return (dict(zip(self.columnas, fila)) for fila in self)
+
+
+class Columnas:
+    """Resultado orientado a columnas. resultado['precio_total'] es la lista de esa columna;
+    iterarlo produce las filas como tuplas."""
+    __slots__ = ('columnas', 'valores')
+
+    def __init__(self, columnas: Sequence[str], filas: Sequence[tuple] = ()):
+        self.columnas = tuple(columnas)
+        self.valores: List[list] = [list(c) for c in zip(*filas)] if filas else [[] for _ in self.columnas]
+
+    def __getitem__(self, columna: str) -> list:
+        try:
+            return self.valores[self.columnas.index(columna)]
+        except ValueError:
+            raise KeyError(columna) from None
+
+    def __len__(self) -> int:
+        return len(self.valores[0]) if self.valores else 0
+
+    def __iter__(self) -> Iterator[tuple]:
+        return zip(*self.valores)
+
+    def como_dicts(self) -> Iterator[Dict[str, Any]]:
+        return (dict(zip(self.columnas, fila)) for fila in self)
+
+
+def convertir(columnas: Sequence[str], filas: Sequence[tuple], formato: str):
+    """Arma el resultado de un fetchall() de tuplas en el formato pedido."""
+    columnas = tuple(columnas)
+    if formato == 'dict':
+        return [dict(zip(columnas, fila)) for fila in filas]
+    if formato == 'tupla':
+        return Filas(columnas, filas)
+    if formato == 'registro':
+        return list(map(clase_registro(columnas)._make, filas))
+    return Columnas(columnas, filas)
+
+
+def convertir_una(columnas: Sequence[str], fila: Optional[tuple], formato: str):
+    """Igual que convertir() para fetch_one: una fila suelta (o None).
+
+    Con 'columnas' se retorna un Columnas de una fila.
+    """
+    if fila is None:
+        return None
+    if formato == 'columnas':
+        return Columnas(columnas, [fila])
+    return convertir(columnas, [fila], formato)[0]
+
+
+def separar(items: Iterable) -> Tuple[Tuple[str, ...], Iterator[tuple]]:
+    """(columnas, filas como tuplas) de un resultado en cualquier formato, o de un
+    iterable de dicts/registros (stream). Para un iterable vacío, ((), vacío)."""
+    if isinstance(items, (Filas, Columnas)):
+        return items.columnas, iter(items)
+    filas = iter(items)
+    primera = next(filas, None)
+    if primera is None:
+        return (), iter(())
+    filas = itertools.chain([primera], filas)
+    if isinstance(primera, dict):
+        columnas = tuple(primera.keys())
+        return columnas, (tuple(f.get(c, 'N/A') for c in columnas) for f in filas)
+    if hasattr(primera, '_fields'):
+        return getattr(primera, '_columnas', primera._fields), filas
+    raise TypeError(f"Fila sin nombres de columna: {type(primera).__name__}")
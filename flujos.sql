@@ -0,0 +1,215 @@
+-- FLUJOS DEL MERCADO EN PROCEDIMIENTOS ALMACENADOS
+-- Se ejecuta después de entrega3.sql (y de resumenes.sql / particiones.sql si se usan).
+-- Cada flujo es un solo CALL: las validaciones, los candados y todas las escrituras
+-- ocurren en el servidor, sin idas y vueltas entre una sentencia y otra. Con
+-- p_confirmar = 1 el procedimiento abre y confirma su propia transacción (y la deshace
+-- si algo falla); con 0 se une a la de quien lo llama, que es como lo usan los wrappers
+-- de cruds.py (comprar_libro, avanzar_orden, completar_intercambio) dentro de una
+-- Transaction. Las salidas vuelven como último result set del CALL: el flujo completo
+-- es una sola ida y vuelta, sin COMMIT ni SELECT @variable aparte.
+--
+-- Todos toman los candados en el mismo orden para no bloquearse entre sí:
+--   intercambio  ->  libro (de menor a mayor id_libro)  ->  orden_compra
+-- Los errores de negocio se lanzan con SIGNAL SQLSTATE '45000'.
+
+USE libros_circulares;
+
+-- ===================================
+-- Intercambio
+-- ===================================
+
+-- Completa un intercambio aceptado: cada libro pasa al otro usuario y sale del catálogo
+-- (la publicación era del dueño anterior). Retorna los dos libros para invalidar cachés.
+DELIMITER //
+CREATE PROCEDURE sp_completar_intercambio(IN p_id_intercambio BIGINT UNSIGNED, IN p_confirmar BOOLEAN)
+BEGIN
+  DECLARE v_estado VARCHAR(20);
+  DECLARE v_propone BIGINT UNSIGNED;
+  DECLARE v_recibe BIGINT UNSIGNED;
+  DECLARE v_dueno_ofrecido BIGINT UNSIGNED;
+  DECLARE v_dueno_solicitado BIGINT UNSIGNED;
+  DECLARE v_ordenes INT DEFAULT 0;
+  DECLARE v_libro_ofrecido BIGINT UNSIGNED;
+  DECLARE v_libro_solicitado BIGINT UNSIGNED;
+  DECLARE EXIT HANDLER FOR SQLEXCEPTION
+  BEGIN
+    IF p_confirmar THEN ROLLBACK; END IF;
+    RESIGNAL;
+  END;
+
+  IF p_confirmar THEN START TRANSACTION; END IF;
+
+  SELECT estado_intercambio, id_usuario_propone, id_usuario_recibe, id_libro_ofrecido, id_libro_solicitado
+  INTO v_estado, v_propone, v_recibe, v_libro_ofrecido, v_libro_solicitado
+  FROM intercambio
+  WHERE id_intercambio = p_id_intercambio
+  FOR UPDATE;
+
+  IF v_estado IS NULL THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'El intercambio no existe';
+  END IF;
+  IF v_estado <> 'aceptado' THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Solo se puede completar un intercambio aceptado';
+  END IF;
+
+  -- En orden de id: dos intercambios que comparten libros no se bloquean en cruz.
+  IF v_libro_ofrecido < v_libro_solicitado THEN
+    SELECT id_propietario INTO v_dueno_ofrecido FROM libro WHERE id_libro = v_libro_ofrecido FOR UPDATE;
+    SELECT id_propietario INTO v_dueno_solicitado FROM libro WHERE id_libro = v_libro_solicitado FOR UPDATE;
+  ELSE
+    SELECT id_propietario INTO v_dueno_solicitado FROM libro WHERE id_libro = v_libro_solicitado FOR UPDATE;
+    SELECT id_propietario INTO v_dueno_ofrecido FROM libro WHERE id_libro = v_libro_ofrecido FOR UPDATE;
+  END IF;
+
+  IF v_dueno_ofrecido IS NULL OR v_dueno_ofrecido <> v_propone THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'El libro ofrecido ya no pertenece a quien propone';
+  END IF;
+  IF v_dueno_solicitado IS NULL OR v_dueno_solicitado <> v_recibe THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'El libro solicitado ya no pertenece a quien recibe';
+  END IF;
+
+  -- Lectura con candado: ve también las compras confirmadas después de empezar la transacción.
+  SELECT COUNT(*) INTO v_ordenes
+  FROM orden_compra
+  WHERE id_libro IN (v_libro_ofrecido, v_libro_solicitado)
+    AND estado_orden IN ('pedido', 'pagado', 'enviado')
+  FOR SHARE;
+  IF v_ordenes > 0 THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'Uno de los libros tiene una compra en curso';
+  END IF;
+
+  UPDATE libro
+  SET id_propietario = v_recibe, en_catalogo = 0, modalidad_publicacion = 'visible'
+  WHERE id_libro = v_libro_ofrecido;
+
+  UPDATE libro
+  SET id_propietario = v_propone, en_catalogo = 0, modalidad_publicacion = 'visible'
+  WHERE id_libro = v_libro_solicitado;
+
+  UPDATE intercambio
+  SET estado_intercambio = 'completado', fecha_intercambio = NOW()
+  WHERE id_intercambio = p_id_intercambio;
+
+  IF p_confirmar THEN COMMIT; END IF;
+  SELECT v_libro_ofrecido AS libro_ofrecido, v_libro_solicitado AS libro_solicitado;
+END//
+DELIMITER ;
+
+
+-- ===================================
+-- Compra
+-- ===================================
+
+-- Crea la orden al precio de venta vigente (no al que vio el comprador) y saca el
+-- libro del catálogo, así dos compradores simultáneos no pueden comprar el mismo libro.
+DELIMITER //
+CREATE PROCEDURE sp_comprar_libro(IN p_id_libro BIGINT UNSIGNED, IN p_id_comprador BIGINT UNSIGNED,
+                                  IN p_direccion_envio VARCHAR(300), IN p_metodo_pago VARCHAR(60),
+                                  IN p_confirmar BOOLEAN)
+BEGIN
+  DECLARE v_propietario BIGINT UNSIGNED;
+  DECLARE v_en_catalogo TINYINT;
+  DECLARE v_modalidad VARCHAR(20);
+  DECLARE v_precio DECIMAL(12,2);
+  DECLARE v_id_orden BIGINT UNSIGNED;
+  DECLARE EXIT HANDLER FOR SQLEXCEPTION
+  BEGIN
+    IF p_confirmar THEN ROLLBACK; END IF;
+    RESIGNAL;
+  END;
+
+  IF p_confirmar THEN START TRANSACTION; END IF;
+
+  SELECT id_propietario, en_catalogo, modalidad_publicacion, precio_venta
+  INTO v_propietario, v_en_catalogo, v_modalidad, v_precio
+  FROM libro
+  WHERE id_libro = p_id_libro
+  FOR UPDATE;
+
+  IF v_propietario IS NULL THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'El libro no existe';
+  END IF;
+  IF v_en_catalogo = 0 OR v_modalidad <> 'venta' THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'El libro no está a la venta';
+  END IF;
+  IF v_propietario = p_id_comprador THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'No se puede comprar un libro propio';
+  END IF;
+
+  INSERT INTO orden_compra (precio_total, estado_orden, direccion_envio, metodo_pago, id_comprador, id_libro)
+  VALUES (v_precio, 'pedido', p_direccion_envio, p_metodo_pago, p_id_comprador, p_id_libro);
+  SET v_id_orden = LAST_INSERT_ID();
+
+  UPDATE libro SET en_catalogo = 0 WHERE id_libro = p_id_libro;
+
+  IF p_confirmar THEN COMMIT; END IF;
+  SELECT v_id_orden AS id_orden;
+END//
+DELIMITER ;
+
+-- Avanza la orden un paso: pedido -> pagado -> enviado -> recibido, o cancelado desde
+-- pedido o pagado. Fija la fecha del paso. Al cancelar, el libro vuelve al catálogo;
+-- al recibirlo, pasa a ser del comprador.
+DELIMITER //
+CREATE PROCEDURE sp_avanzar_orden(IN p_id_orden BIGINT UNSIGNED, IN p_estado VARCHAR(20),
+                                  IN p_confirmar BOOLEAN)
+BEGIN
+  DECLARE v_fecha_pedido DATETIME;
+  DECLARE v_estado VARCHAR(20);
+  DECLARE v_comprador BIGINT UNSIGNED;
+  DECLARE v_bloqueado BIGINT UNSIGNED;
+  DECLARE v_mensaje VARCHAR(128);
+  DECLARE v_id_libro BIGINT UNSIGNED;
+  DECLARE EXIT HANDLER FOR SQLEXCEPTION
+  BEGIN
+    IF p_confirmar THEN ROLLBACK; END IF;
+    RESIGNAL;
+  END;
+
+  IF p_confirmar THEN START TRANSACTION; END IF;
+
+  -- Sin candado: solo para saber qué libro bloquear antes que la orden (mismo orden que
+  -- sp_comprar_libro) y cuál es la PK completa de la orden.
+  SELECT id_libro, fecha_pedido INTO v_id_libro, v_fecha_pedido
+  FROM orden_compra
+  WHERE id_orden = p_id_orden;
+
+  IF v_id_libro IS NULL THEN
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = 'La orden no existe';
+  END IF;
+
+  SELECT id_libro INTO v_bloqueado FROM libro WHERE id_libro = v_id_libro FOR UPDATE;
+
+  -- Con (id_orden, fecha_pedido) es un candado de registro, sin bloquear huecos del índice
+  -- (que frenarían las órdenes nuevas) y con poda de particiones.
+  SELECT estado_orden, id_comprador INTO v_estado, v_comprador
+  FROM orden_compra
+  WHERE id_orden = p_id_orden AND fecha_pedido = v_fecha_pedido
+  FOR UPDATE;
+
+  IF NOT ((v_estado = 'pedido' AND p_estado IN ('pagado', 'cancelado'))
+          OR (v_estado = 'pagado' AND p_estado IN ('enviado', 'cancelado'))
+          OR (v_estado = 'enviado' AND p_estado = 'recibido')) THEN
+    SET v_mensaje = CONCAT('La orden no puede pasar de ', IFNULL(v_estado, '?'), ' a ', IFNULL(p_estado, '?'));
+    SIGNAL SQLSTATE '45000' SET MESSAGE_TEXT = v_mensaje;
+  END IF;
+
+  UPDATE orden_compra
+  SET estado_orden    = p_estado,
+      fecha_pago      = IF(p_estado = 'pagado', NOW(), fecha_pago),
+      fecha_envio     = IF(p_estado = 'enviado', NOW(), fecha_envio),
+      fecha_recepcion = IF(p_estado = 'recibido', NOW(), fecha_recepcion)
+  WHERE id_orden = p_id_orden AND fecha_pedido = v_fecha_pedido;
+
+  IF p_estado = 'cancelado' THEN
+    UPDATE libro SET en_catalogo = 1 WHERE id_libro = v_id_libro AND modalidad_publicacion = 'venta';
+  ELSEIF p_estado = 'recibido' THEN
+    UPDATE libro
+    SET id_propietario = v_comprador, en_catalogo = 0, modalidad_publicacion = 'visible'
+    WHERE id_libro = v_id_libro;
+  END IF;
+
+  IF p_confirmar THEN COMMIT; END IF;
+  SELECT v_id_libro AS id_libro;
+END//
+DELIMITER ;
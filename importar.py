@@ -0,0 +1,302 @@
+# importar.py
+"""Importación masiva de catálogos (libro, usuario) con LOAD DATA LOCAL INFILE.
+
+    python importar.py libro catalogo.csv
+    python importar.py usuario socios.csv --separador ';' --solo-validar
+
+1. El CSV (con encabezado) se carga tal cual en una tabla de staging con LOAD DATA
+   LOCAL INFILE: todo como texto, sin validar, una fila por línea.
+2. Las reglas se aplican con UPDATEs sobre la tabla completa (no fila por fila) y cada
+   fila inválida queda marcada con el primer motivo que falla: requeridos, tipos,
+   longitudes, chk_precio_modalidad, FK id_propietario, ISBN/email repetidos en el
+   archivo o ya existentes.
+3. Las filas válidas pasan a la tabla real con un solo INSERT ... SELECT dentro de
+   una transacción; las rechazadas se escriben en un CSV de rechazos.
+
+Requiere local_infile=ON en el servidor.
+"""
+import argparse
+import csv
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import mysql.connector
+from mysql.connector import Error
+
+from conecction import DB_CONFIG
+
+# Columnas que acepta el CSV, con su longitud máxima (None = no es texto acotado).
+_COLUMNAS = {
+    'libro': {
+        'titulo': 250, 'autor': 250, 'isbn': 20, 'genero': 120, 'resumen': None,
+        'anio_publicacion': None, 'editorial': 150, 'paginas': None, 'idioma': 80,
+        'estado_fisico': 100, 'id_propietario': None, 'en_catalogo': None,
+        'modalidad_publicacion': None, 'precio_venta': None,
+    },
+    'usuario': {
+        'nombre': 120, 'email': 190, 'password_hash': 255, 'ciudad': 120, 'telefono': 40, 'rol': None,
+    },
+}
+
+_REQUERIDAS = {
+    'libro': ('titulo', 'autor', 'id_propietario'),
+    'usuario': ('nombre', 'email', 'password_hash'),
+}
+
+# Columnas NOT NULL con DEFAULT: una celda vacía toma el valor por defecto de la tabla.
+_DEFECTOS = {
+    'libro': {'en_catalogo': '0', 'modalidad_publicacion': 'visible'},
+    'usuario': {'rol': 'usuario'},
+}
+
+# (motivo, condición sobre la fila `s` de staging) en orden; gana el primero que falla.
+# Solo comparaciones de texto y REGEXP: en modo estricto, convertir a número un texto
+# inválido dentro de un UPDATE es un error y no una advertencia.
+_REGLAS = {
+    'libro': [
+        ("id_propietario no es un entero", "s.id_propietario NOT REGEXP '^[0-9]{1,19}$'"),
+        ("resumen excede 65535 bytes", "LENGTH(s.resumen) > 65535"),
+        ("anio_publicacion inválido", "s.anio_publicacion IS NOT NULL AND (s.anio_publicacion NOT REGEXP '^[0-9]{4}$' "
+                                      "OR s.anio_publicacion NOT BETWEEN '1901' AND '2155')"),
+        ("paginas no es un entero", "s.paginas IS NOT NULL AND s.paginas NOT REGEXP '^[0-9]{1,9}$'"),
+        ("en_catalogo debe ser 0 o 1", "s.en_catalogo IS NOT NULL AND s.en_catalogo NOT IN ('0', '1')"),
+        ("modalidad_publicacion inválida", "s.modalidad_publicacion IS NOT NULL "
+                                           "AND s.modalidad_publicacion NOT IN ('visible', 'intercambio', 'venta')"),
+        ("precio_venta inválido", "s.precio_venta IS NOT NULL AND s.precio_venta NOT REGEXP '^[0-9]{1,10}([.][0-9]{1,2})?$'"),
+        ("chk_precio_modalidad: 'venta' exige precio > 0 y las demás modalidades no llevan precio",
+         "NOT ((COALESCE(s.modalidad_publicacion, 'visible') <> 'venta' AND s.precio_venta IS NULL) "
+         "OR (s.modalidad_publicacion = 'venta' AND s.precio_venta IS NOT NULL "
+         "AND s.precio_venta NOT REGEXP '^0+([.]0{1,2})?$'))"),
+    ],
+    'usuario': [
+        ("email con formato inválido", "s.email NOT REGEXP '^[^@[:space:]]+@[^@[:space:]]+[.][^@[:space:]]+$'"),
+        ("rol inválido", "s.rol IS NOT NULL AND s.rol NOT IN ('admin', 'usuario')"),
+    ],
+}
+
+# Columna única que se revisa contra el mismo archivo y contra la tabla real.
+_UNICAS = {'libro': 'isbn', 'usuario': 'email'}
+
+
+def _conectar():
+    # Conexión propia (no del pool): necesita allow_local_infile y dura toda la importación.
+    return mysql.connector.connect(**DB_CONFIG, allow_local_infile=True)
+
+
+def _leer_encabezado(ruta: str, separador: str) -> Tuple[List[str], str]:
+    with open(ruta, 'r', encoding='utf-8-sig', newline='') as f:
+        primera = f.readline()
+    fin_linea = '\r\n' if primera.endswith('\r\n') else '\n'
+    encabezado = next(csv.reader([primera.rstrip('\r\n')], delimiter=separador))
+    return [c.strip().lower() for c in encabezado], fin_linea
+
+
+def _ejecutar(cursor, sql: str, params: Optional[Tuple] = None) -> int:
+    cursor.execute(sql, params)
+    return cursor.rowcount
+
+
+def _crear_staging(cursor, tabla: str, staging: str):
+    columnas = []
+    # MEDIUMTEXT: LOAD DATA LOCAL recorta en silencio lo que no cabe en la columna, y un
+    # valor recortado pasaría la validación de longitud; así llega entero a _validar.
+    for columna in _COLUMNAS[tabla]:
+        columnas.append(f"{columna} MEDIUMTEXT NULL")
+    if tabla == 'libro':
+        # Copia numérica del propietario (solo para filas válidas) para el JOIN de la FK.
+        columnas.append("id_propietario_num BIGINT UNSIGNED NULL")
+    unica = _UNICAS[tabla]
+    _ejecutar(cursor, f"""
+        CREATE TABLE {staging} (
+            linea  INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            {', '.join(columnas)},
+            motivo VARCHAR(255) NULL,
+            KEY idx_{unica} ({unica}(255)),
+            KEY idx_motivo (motivo)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def _cargar(cursor, ruta: str, staging: str, tabla: str, encabezado: List[str], separador: str,
+            fin_linea: str) -> Tuple[int, int]:
+    """LOAD DATA del archivo completo; retorna (filas cargadas, advertencias)."""
+    variables, asignaciones = [], []
+    for i, columna in enumerate(encabezado):
+        if columna in _COLUMNAS[tabla]:
+            variables.append(f"@c{i}")
+            # Celda vacía = NULL; TRIM para tolerar espacios alrededor de los valores.
+            asignaciones.append(f"{columna} = NULLIF(TRIM(@c{i}), '')")
+        else:
+            variables.append("@descartada")
+    filas = _ejecutar(cursor, f"""
+        LOAD DATA LOCAL INFILE %s INTO TABLE {staging}
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY %s OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+        LINES TERMINATED BY %s
+        IGNORE 1 LINES
+        ({', '.join(variables)})
+        SET {', '.join(asignaciones)}
+    """, (os.path.abspath(ruta), separador, fin_linea))
+    cursor.execute("SELECT @@warning_count")
+    advertencias = cursor.fetchone()[0]
+    return filas, advertencias
+
+
+def _marcar(cursor, staging: str, motivo: str, condicion: str, join: str = "") -> int:
+    return _ejecutar(cursor, f"UPDATE {staging} s {join} SET s.motivo = %s WHERE s.motivo IS NULL AND ({condicion})",
+                     (motivo[:255],))
+
+
+def _validar(cursor, tabla: str, staging: str) -> Dict[str, int]:
+    """Aplica todas las reglas; retorna filas rechazadas por motivo (en este paso)."""
+    rechazos = {}
+
+    def marcar(motivo, condicion, join=""):
+        n = _marcar(cursor, staging, motivo, condicion, join)
+        if n:
+            rechazos[motivo] = rechazos.get(motivo, 0) + n
+
+    for columna in _REQUERIDAS[tabla]:
+        marcar(f"{columna} es requerido", f"s.{columna} IS NULL")
+    for columna, maximo in _COLUMNAS[tabla].items():
+        if maximo is not None:
+            marcar(f"{columna} excede {maximo} caracteres", f"CHAR_LENGTH(s.{columna}) > {maximo}")
+    for motivo, condicion in _REGLAS[tabla]:
+        marcar(motivo, condicion)
+
+    if tabla == 'libro':
+        # El WHERE se evalúa antes del SET: solo se convierten textos ya validados.
+        _ejecutar(cursor, f"UPDATE {staging} SET id_propietario_num = id_propietario WHERE motivo IS NULL")
+        marcar("id_propietario no existe en usuario", "u.id_usuario IS NULL",
+               "LEFT JOIN usuario u ON u.id_usuario = s.id_propietario_num")
+
+    unica = _UNICAS[tabla]
+    # Repetidos en el archivo: se conserva la primera aparición válida.
+    marcar(f"{unica} repetido en el archivo", "s.linea > d.primera", f"""
+        JOIN (SELECT {unica}, MIN(linea) AS primera FROM {staging}
+              WHERE {unica} IS NOT NULL AND motivo IS NULL
+              GROUP BY {unica} HAVING COUNT(*) > 1) d ON d.{unica} = s.{unica}""")
+    marcar(f"{unica} ya existe en {tabla}", f"t.{unica} IS NOT NULL",
+           f"LEFT JOIN {tabla} t ON t.{unica} = s.{unica}")
+    return rechazos
+
+
+def _fusionar(cursor, tabla: str, staging: str) -> Tuple[int, Optional[int]]:
+    columnas = list(_COLUMNAS[tabla])
+    valores = [f"COALESCE(s.{c}, '{_DEFECTOS[tabla][c]}')" if c in _DEFECTOS[tabla] else f"s.{c}"
+               for c in columnas]
+    filas = _ejecutar(cursor, f"""
+        INSERT INTO {tabla} ({', '.join(columnas)})
+        SELECT {', '.join(valores)} FROM {staging} s
+        WHERE s.motivo IS NULL
+        ORDER BY s.linea
+    """)
+    return filas, (cursor.lastrowid or None)
+
+
+def _escribir_rechazos(conn, staging: str, encabezado_tabla: List[str], ruta: str) -> int:
+    cursor = conn.cursor(buffered=False)
+    total = 0
+    try:
+        cursor.execute(f"SELECT linea + 1, motivo, {', '.join(encabezado_tabla)} FROM {staging} "
+                       f"WHERE motivo IS NOT NULL ORDER BY linea")
+        with open(ruta, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(['linea_archivo', 'motivo'] + encabezado_tabla)
+            while True:
+                filas = cursor.fetchmany(5000)
+                if not filas:
+                    break
+                escritor.writerows(filas)
+                total += len(filas)
+    finally:
+        cursor.close()
+    return total
+
+
+def importar(tabla: str, ruta: str, ruta_rechazos: Optional[str] = None, separador: str = ',',
+             solo_validar: bool = False) -> Dict[str, Any]:
+    """Importa el CSV `ruta` a `tabla` ('libro' o 'usuario') y retorna las estadísticas.
+
+    Las filas válidas se insertan todas o ninguna (una transacción). Las rechazadas
+    van a `ruta_rechazos` (por defecto <ruta>.rechazos.csv) con la línea del archivo y
+    el motivo. Con solo_validar=True no se inserta nada.
+    """
+    if tabla not in _COLUMNAS:
+        raise ValueError(f"Solo se puede importar {', '.join(_COLUMNAS)}: {tabla!r}")
+    encabezado, fin_linea = _leer_encabezado(ruta, separador)
+    faltantes = [c for c in _REQUERIDAS[tabla] if c not in encabezado]
+    if faltantes:
+        raise ValueError(f"Al CSV le faltan columnas requeridas: {', '.join(faltantes)}")
+    ruta_rechazos = ruta_rechazos or os.path.splitext(ruta)[0] + '.rechazos.csv'
+    columnas_archivo = [c for c in encabezado if c in _COLUMNAS[tabla]]
+
+    estadisticas = {'tabla': tabla, 'archivo': ruta, 'columnas_ignoradas': [c for c in encabezado
+                                                                            if c not in _COLUMNAS[tabla]]}
+    staging = f"stg_{tabla}_{uuid.uuid4().hex[:12]}"
+    conn = _conectar()
+    cursor = conn.cursor()
+    try:
+        inicio = time.perf_counter()
+        _crear_staging(cursor, tabla, staging)
+        estadisticas['filas_leidas'], estadisticas['advertencias_carga'] = _cargar(
+            cursor, ruta, staging, tabla, encabezado, separador, fin_linea)
+        conn.commit()
+        estadisticas['segundos_carga'] = round(time.perf_counter() - inicio, 3)
+
+        # Validación y fusión en la misma transacción: los JOIN contra usuario/libro
+        # bloquean en modo compartido las filas que se validaron hasta el commit.
+        inicio = time.perf_counter()
+        conn.start_transaction()
+        try:
+            estadisticas['rechazos_por_motivo'] = _validar(cursor, tabla, staging)
+            estadisticas['segundos_validacion'] = round(time.perf_counter() - inicio, 3)
+            inicio = time.perf_counter()
+            if solo_validar:
+                estadisticas['filas_insertadas'], estadisticas['primer_id'] = 0, None
+            else:
+                estadisticas['filas_insertadas'], estadisticas['primer_id'] = _fusionar(cursor, tabla, staging)
+            conn.commit()
+        except Error:
+            conn.rollback()
+            raise
+        estadisticas['segundos_fusion'] = round(time.perf_counter() - inicio, 3)
+
+        estadisticas['filas_rechazadas'] = _escribir_rechazos(conn, staging, columnas_archivo, ruta_rechazos)
+        estadisticas['archivo_rechazos'] = ruta_rechazos if estadisticas['filas_rechazadas'] else None
+        if not estadisticas['filas_rechazadas']:
+            os.remove(ruta_rechazos)
+        total = sum(estadisticas[k] for k in ('segundos_carga', 'segundos_validacion', 'segundos_fusion'))
+        estadisticas['filas_por_s'] = round(estadisticas['filas_leidas'] / total, 1) if total else None
+        return estadisticas
+    finally:
+        try:
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        except Error as e:
+            print(f"❌ No se pudo borrar la tabla de staging {staging}: {e}")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa un CSV de libros o usuarios con LOAD DATA.")
+    parser.add_argument("tabla", choices=sorted(_COLUMNAS))
+    parser.add_argument("ruta")
+    parser.add_argument("--rechazos", help="CSV de filas rechazadas (por defecto <ruta>.rechazos.csv).")
+    parser.add_argument("--separador", default=',')
+    parser.add_argument("--solo-validar", action="store_true", help="Valida sin insertar.")
+    args = parser.parse_args()
+
+    try:
+        resultado = importar(args.tabla, args.ruta, args.rechazos, args.separador, args.solo_validar)
+    except (Error, ValueError, OSError) as e:
+        print(f"❌ Error en la importación: {e}")
+        raise SystemExit(1)
+    print(f"✅ {resultado['filas_insertadas']:,} de {resultado['filas_leidas']:,} filas insertadas "
+          f"({resultado['filas_por_s']} filas/s).")
+    for motivo, n in resultado['rechazos_por_motivo'].items():
+        print(f"   ❌ {n:,} × {motivo}")
+    if resultado['archivo_rechazos']:
+        print(f"   Rechazos en {resultado['archivo_rechazos']}")
@@ -0,0 +1,304 @@
+# instrumentacion.py
+"""Medición de las sentencias que pasan por execute_query / stream_query.
+
+Por cada sentencia normalizada (literales y placeholders como ?, listas IN y VALUES
+colapsadas) se acumulan llamadas, errores, filas, espera por conexión del pool y un
+histograma de latencias. Las sentencias que superan `slow_ms` se escriben en el
+slow log (una línea JSON por sentencia) junto con su plan EXPLAIN FORMAT=JSON, que
+captura un hilo aparte para no frenar ni pedir otra conexión en el hilo que la ejecutó.
+
+Desactivada por defecto: execute_query solo revisa INSTRUMENTACION_CONFIG['enabled'].
+"""
+import json
+import queue
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from mysql.connector import Error
+
+from conecction import get_db_connection
+
+INSTRUMENTACION_CONFIG = {
+    'enabled': False,                  # registrar tiempos de cada sentencia
+    'slow_ms': 200,                    # umbral del slow log (milisegundos)
+    'slow_log': 'slow_queries.log',    # archivo JSON lines; None = solo en memoria
+    'explain': True,                   # capturar EXPLAIN FORMAT=JSON de las sentencias lentas
+    'explain_intervalo': 300,          # segundos mínimos entre dos EXPLAIN de la misma sentencia
+}
+
+# Límites superiores (ms) de los buckets del histograma; el último bucket es "más de 10 s".
+BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+_EXPLICABLES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_lock = threading.Lock()
+_sentencias: Dict[str, Dict[str, Any]] = {}
+_lentas = deque(maxlen=100)
+_ultimo_explain: Dict[str, float] = {}
+_captura = threading.local()
+# Entradas del slow log esperando su EXPLAIN; con la cola llena se guardan sin plan.
+_pendientes = queue.Queue(maxsize=100)
+_trabajador: Optional[threading.Thread] = None
+
+_RE_CADENA = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_RE_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_RE_FILAS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalizar(query: str) -> str:
+    """Huella de la sentencia: misma forma para distintos valores o tamaños de lote."""
+    texto = _RE_CADENA.sub('?', query)
+    texto = _RE_PLACEHOLDER.sub('?', texto)
+    texto = _RE_NUMERO.sub('?', texto)
+    texto = _RE_LISTA.sub('(...)', texto)
+    texto = _RE_FILAS.sub('(...)', texto)
+    return _RE_ESPACIOS.sub(' ', texto).strip().rstrip(';')
+
+
+def configurar(**kwargs):
+    """Cambia INSTRUMENTACION_CONFIG (p.ej. configurar(enabled=True, slow_ms=50))."""
+    desconocidas = set(kwargs) - set(INSTRUMENTACION_CONFIG)
+    if desconocidas:
+        raise ValueError(f"Opciones desconocidas: {', '.join(sorted(desconocidas))}")
+    INSTRUMENTACION_CONFIG.update(kwargs)
+
+
+def activa() -> bool:
+    return INSTRUMENTACION_CONFIG['enabled']
+
+
+def registrar(query: str, params, segundos: float, filas: int = 0, espera: float = 0.0,
+              error: Optional[Exception] = None):
+    """Acumula una ejecución; si supera el umbral la manda al slow log."""
+    capturadas = getattr(_captura, 'sentencias', None)
+    if capturadas is not None:
+        capturadas.append((query, params))
+    huella = normalizar(query)
+    ms = segundos * 1000
+    bucket = _bucket(ms)
+    with _lock:
+        s = _sentencias.get(huella)
+        if s is None:
+            s = _sentencias[huella] = {
+                'llamadas': 0, 'errores': 0, 'filas': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'espera_ms': 0.0, 'buckets': [0] * (len(BUCKETS_MS) + 1),
+            }
+        s['llamadas'] += 1
+        s['filas'] += filas
+        s['total_ms'] += ms
+        s['espera_ms'] += espera * 1000
+        s['buckets'][bucket] += 1
+        if ms > s['max_ms']:
+            s['max_ms'] = ms
+        if error is not None:
+            s['errores'] += 1
+
+    if ms >= INSTRUMENTACION_CONFIG['slow_ms']:
+        _registrar_lenta(query, huella, params, ms, filas, espera, error)
+
+
+@contextmanager
+def capturar():
+    """Junta (query, params) de las sentencias que ejecute este hilo dentro del bloque.
+
+        with instrumentacion.capturar() as sentencias:
+            reportes.reporte_2_clubes_y_total_miembros()
+
+    Activa la instrumentación mientras dure el bloque (para todos los hilos).
+    """
+    sentencias: List[Tuple[str, Any]] = []
+    anterior = INSTRUMENTACION_CONFIG['enabled']
+    _captura.sentencias = sentencias
+    INSTRUMENTACION_CONFIG['enabled'] = True
+    try:
+        yield sentencias
+    finally:
+        _captura.sentencias = None
+        INSTRUMENTACION_CONFIG['enabled'] = anterior
+
+
+def _bucket(ms: float) -> int:
+    for i, limite in enumerate(BUCKETS_MS):
+        if ms <= limite:
+            return i
+    return len(BUCKETS_MS)
+
+
+def _percentil_buckets(buckets: List[int], p: float) -> Optional[float]:
+    """Percentil aproximado: límite superior del bucket donde cae (None si es > 10 s)."""
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    objetivo = p / 100 * total
+    acumulado = 0
+    for i, n in enumerate(buckets):
+        acumulado += n
+        if acumulado >= objetivo:
+            return BUCKETS_MS[i] if i < len(BUCKETS_MS) else None
+    return None
+
+
+# ----------------------------------------------------------------------
+# SLOW LOG
+# ----------------------------------------------------------------------
+
+def _registrar_lenta(query: str, huella: str, params, ms: float, filas: int, espera: float,
+                     error: Optional[Exception]):
+    entrada = {
+        'fecha': datetime.now().isoformat(timespec='milliseconds'),
+        'ms': round(ms, 3),
+        'espera_ms': round(espera * 1000, 3),
+        'filas': filas,
+        'sentencia': huella,
+        'error': str(error) if error is not None else None,
+        'plan': None,
+    }
+    if INSTRUMENTACION_CONFIG['explain'] and _toca_explicar(huella):
+        # El EXPLAIN necesita otra conexión del pool y quien llama aún tiene la suya:
+        # pedirla aquí podría agotar el pool. El trabajador guarda la entrada al terminar.
+        try:
+            _pendientes.put_nowait((entrada, query, params))
+        except queue.Full:
+            pass
+        else:
+            _iniciar_trabajador()
+            return
+    _guardar_lenta(entrada)
+
+
+def _guardar_lenta(entrada: Dict[str, Any]):
+    with _lock:
+        _lentas.append(entrada)
+    ruta = INSTRUMENTACION_CONFIG['slow_log']
+    if ruta:
+        try:
+            with _lock, open(ruta, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entrada, ensure_ascii=False, default=str) + '\n')
+        except OSError as e:
+            print(f"❌ Error escribiendo el slow log: {e}")
+
+
+def _toca_explicar(huella: str) -> bool:
+    """True si la sentencia admite EXPLAIN y no se explicó en el último intervalo."""
+    if not huella.upper().startswith(_EXPLICABLES):
+        return False
+    ahora = time.monotonic()
+    with _lock:
+        if ahora - _ultimo_explain.get(huella, float('-inf')) < INSTRUMENTACION_CONFIG['explain_intervalo']:
+            return False
+        _ultimo_explain[huella] = ahora
+    return True
+
+
+def _iniciar_trabajador():
+    global _trabajador
+    with _lock:
+        if _trabajador is None or not _trabajador.is_alive():
+            _trabajador = threading.Thread(target=_trabajar, name='instrumentacion-explain', daemon=True)
+            _trabajador.start()
+
+
+def _trabajar():
+    while True:
+        entrada, query, params = _pendientes.get()
+        try:
+            entrada['plan'] = _explicar(query, params)
+            _guardar_lenta(entrada)
+        finally:
+            _pendientes.task_done()
+
+
+def _explicar(query: str, params) -> Optional[Dict[str, Any]]:
+    """EXPLAIN FORMAT=JSON en otra conexión del pool (desde el hilo trabajador).
+
+    Usa un cursor directo, no execute_query, para que el EXPLAIN no se mida a sí mismo.
+    """
+    conn = get_db_connection()
+    if not conn: return None
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("EXPLAIN FORMAT=JSON " + query.strip().rstrip(';'), params)
+        fila = cursor.fetchone()
+        cursor.fetchall()
+        return json.loads(fila[0]) if fila else None
+    except (Error, ValueError) as e:
+        return {'error': str(e)}
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Error:
+                pass
+        conn.close()
+
+
+# ----------------------------------------------------------------------
+# REPORTE
+# ----------------------------------------------------------------------
+
+def estadisticas(orden: str = 'total_ms', limite: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Resumen por sentencia (llamadas, filas, media, p50/p95/p99 aproximados, espera)."""
+    with _lock:
+        copia = [(h, dict(s, buckets=list(s['buckets']))) for h, s in _sentencias.items()]
+
+    filas = []
+    for huella, s in copia:
+        llamadas = s['llamadas']
+        filas.append({
+            'sentencia': huella,
+            'llamadas': llamadas,
+            'errores': s['errores'],
+            'filas': s['filas'],
+            'total_ms': round(s['total_ms'], 3),
+            'media_ms': round(s['total_ms'] / llamadas, 3),
+            'max_ms': round(s['max_ms'], 3),
+            'p50_ms': _percentil_buckets(s['buckets'], 50),
+            'p95_ms': _percentil_buckets(s['buckets'], 95),
+            'p99_ms': _percentil_buckets(s['buckets'], 99),
+            'espera_media_ms': round(s['espera_ms'] / llamadas, 3),
+            'histograma': dict(zip([f"<={b}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"], s['buckets'])),
+        })
+    filas.sort(key=lambda f: f[orden], reverse=True)
+    return filas[:limite] if limite else filas
+
+
+def lentas() -> List[Dict[str, Any]]:
+    """Últimas sentencias lentas registradas (las mismas del slow log)."""
+    with _lock:
+        return list(_lentas)
+
+
+def volcar(ruta: Optional[str] = None, limite: int = 20) -> List[Dict[str, Any]]:
+    """Imprime las sentencias más costosas y, si se pasa `ruta`, guarda todo en JSON."""
+    filas = estadisticas()
+    if ruta:
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump({'sentencias': filas, 'lentas': lentas()}, f, indent=2, ensure_ascii=False, default=str)
+
+    if not filas:
+        print("ℹ️ No hay sentencias registradas (¿instrumentación desactivada?).")
+        return filas
+    print(f"{'llamadas':>8} {'total ms':>10} {'media':>8} {'p95':>7} {'espera':>7}  sentencia")
+    for f in filas[:limite]:
+        p95 = f"{f['p95_ms']:g}" if f['p95_ms'] is not None else ">10s"
+        print(f"{f['llamadas']:>8} {f['total_ms']:>10.1f} {f['media_ms']:>8.2f} {p95:>7} "
+              f"{f['espera_media_ms']:>7.2f}  {f['sentencia'][:100]}")
+    return filas
+
+
+def reiniciar():
+    with _lock:
+        _sentencias.clear()
+        _lentas.clear()
+        _ultimo_explain.clear()
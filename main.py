@@ -1,4 +1,8 @@
 # main.py
+import itertools
+import re
+import sys
+
 from cruds import (
     crear_usuario, leer_usuarios, actualizar_usuario, borrar_usuario,
     crear_libro, leer_libros, actualizar_libro, borrar_libro,
@@ -9,41 +13,113 @@ from cruds import (
     crear_intercambio, leer_intercambios,
     crear_leer_libros, leer_registros_lectura,
     crear_reunion, leer_reuniones,
-    execute_query,
+    execute_query, leer_pagina,
 )
+import reportes
+import filas as formatos
+import instrumentacion
 from conecction import get_db_connection
-from datetime import date 
+from mysql.connector import Error
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Optional
 
 
 # ----------------------------------------------------------------------
 # UTILITY FUNCTIONS (Se asume que la mayoría de los CRUDs no están completos)
 # ----------------------------------------------------------------------
 
-def display_results(items: list, title: str):
-    """Función genérica para mostrar resultados en formato tabular."""
-    if not items:
-        print(f"No se encontraron registros para {title}.")
-        return
+# Filas que se miran para calcular los anchos; las demás se ajustan a esos anchos.
+MUESTRA_ANCHOS = 50
+# Ancho máximo de una columna de texto; lo que sobra se corta con '…'.
+ANCHO_MAX_COLUMNA = 30
+# Ancho fijo por tipo: no hace falta mirar los valores.
+_ANCHOS_POR_TIPO = {datetime: 19, date: 10}
+# Formato de las filas que solo se muestran (ver filas.py): una tupla por fila en vez de un dict.
+FORMATO_PANTALLA = 'tupla'
 
-    print(f"\n--- Resultados: {title} ({len(items)} registros) ---")
 
-    # Obtener encabezados (claves del primer diccionario)
-    headers = list(items[0].keys())
+def _celda(valor) -> str:
+    if isinstance(valor, str):
+        return valor.replace('\r', ' ').replace('\n', ' ')
+    return str(valor)
 
-    # Definir anchos de columna fijos o basados en el contenido
-    widths = {h: max(len(h), max(len(str(item.get(h, ''))[:30]) for item in items)) + 2 for h in headers}
 
-    # Imprimir encabezados
-    header_line = " | ".join(h.ljust(widths.get(h, len(h))) for h in headers)
-    print(header_line)
-    print("-" * len(header_line))
+def _ancho_columna(encabezado: str, indice: int, muestra: list, ancho_max: int) -> int:
+    valores = [fila[indice] for fila in muestra]
+    for tipo, ancho in _ANCHOS_POR_TIPO.items():
+        if valores and all(v is None or isinstance(v, tipo) for v in valores) and any(v is not None for v in valores):
+            return max(len(encabezado), ancho)
+    return max(len(encabezado), min(ancho_max, max((len(_celda(v)) for v in valores), default=0)))
+
+
+def _ajustar(texto: str, ancho: int, numero: bool) -> str:
+    if len(texto) > ancho and not numero:
+        # Los números no se cortan: un id más largo que los de la muestra solo desalinea.
+        return texto[:ancho - 1] + '…'
+    return texto.ljust(ancho)
 
-    # Imprimir filas
-    for item in items:
-        row = " | ".join(str(item.get(h, 'N/A')).ljust(widths.get(h, len(h))) for h in headers)
-        print(row)
-    print("-" * len(header_line))
 
+def display_results(items: Iterable, title: str, page_size: Optional[int] = None,
+                    muestra: int = MUESTRA_ANCHOS, ancho_max: int = ANCHO_MAX_COLUMNA):
+    """Muestra resultados en formato tabular a medida que llegan.
+
+    Acepta listas o iterables (p.ej. leer_libros(stream=True)) en cualquier formato de
+    filas.py: dicts, registros, Filas o Columnas. Solo se guardan en memoria las
+    primeras `muestra` filas, que fijan los anchos de columna; el resto se imprime
+    fila por fila, cortando los textos largos (resumen, contenido...).
+    Con `page_size` se pausa cada tantas filas; si el usuario termina antes, se cierra
+    el iterable para liberar la conexión de streaming.
+    """
+    fuente = items if items is not None else ()
+    headers, filas = formatos.separar(fuente)
+    primeras = list(itertools.islice(filas, muestra))
+    if not primeras:
+        print(f"No se encontraron registros para {title}.")
+        return
+
+    print(f"\n--- Resultados: {title} ---")
+    widths = [_ancho_columna(h, i, primeras, ancho_max) for i, h in enumerate(headers)]
+    header_line = " | ".join(h.ljust(w) for h, w in zip(headers, widths))
+    separador = "-" * len(header_line)
+
+    print(header_line)
+    print(separador)
+    total = 0
+    for item in itertools.chain(primeras, filas):
+        if page_size and total and total % page_size == 0:
+            if input("Enter para más filas, 'q' para terminar: ").strip().lower() == 'q':
+                if hasattr(fuente, 'close'):
+                    fuente.close()
+                print(separador)
+                print(f"({total} registros mostrados)")
+                return
+            print(header_line)
+            print(separador)
+        print(" | ".join(_ajustar(_celda(valor), ancho, isinstance(valor, (int, float, Decimal)))
+                         for valor, ancho in zip(item, widths)))
+        total += 1
+    print(separador)
+    print(f"({total} registros)")
+
+
+PAGE_SIZE = 20
+
+
+def display_paginated(tabla: str, title: str, page_size: int = PAGE_SIZE, **filtros):
+    """Muestra `tabla` página por página (paginación por keyset en leer_pagina)."""
+    cursor = None
+    pagina = 1
+    while True:
+        filas, cursor = leer_pagina(tabla, cursor=cursor, limit=page_size, **filtros)
+        if not filas and pagina > 1:
+            break
+        display_results(filas, f"{title} - página {pagina}")
+        if cursor is None:
+            break
+        if input("Enter para la siguiente página, 'q' para terminar: ").strip().lower() == 'q':
+            break
+        pagina += 1
 
 
 # ----------------------------------------------------------------------
@@ -57,260 +133,105 @@ def consulta_1_miembros_por_club():
         print("ID de club inválido.")
         return
 
-    rows = execute_query("""
-        SELECT c.id_club,
-               c.nombre_club,
-               u.id_usuario,
-               u.nombre,
-               u.email
-        FROM usuario_club uc
-        JOIN usuario u      ON uc.id_usuario = u.id_usuario
-        JOIN club_lectura c ON uc.id_club    = c.id_club
-        WHERE uc.estado_miembro = 'aceptado'
-          AND c.id_club = %s;
-    """, (int(id_club),), commit=False)
+    rows = reportes.reporte_1_miembros_por_club(int(id_club), formato=FORMATO_PANTALLA)
     display_results(rows, f"Miembros del club {id_club}")
 
 
 def consulta_2_clubes_y_total_miembros():
     print("\n[Consulta 2] Clubs de lectura y total de miembros aceptados")
-    rows = execute_query("""
-        SELECT c.id_club,
-               c.nombre_club,
-               COUNT(CASE WHEN uc.estado_miembro = 'aceptado' THEN 1 END) AS total_miembros_aceptados
-        FROM club_lectura c
-        LEFT JOIN usuario_club uc ON c.id_club = uc.id_club
-        GROUP BY c.id_club, c.nombre_club
-        ORDER BY total_miembros_aceptados DESC;
-    """, commit=False)
+    rows = reportes.reporte_2_clubes_y_total_miembros(formato=FORMATO_PANTALLA)
     display_results(rows, "Clubs y total de miembros aceptados")
 
 
 def consulta_3_buscar_libros_propietario():
     print("\n[Consulta 3] Buscar libros por título o autor y mostrar propietario")
     termino = input("Ingrese parte del título o autor a buscar: ").strip()
-    like = f"%{termino}%"
-    rows = execute_query("""
-        SELECT l.id_libro,
-               l.titulo,
-               l.autor,
-               l.genero,
-               u.nombre  AS propietario,
-               u.email   AS email_propietario
-        FROM libro l
-        JOIN usuario u ON l.id_propietario = u.id_usuario
-        WHERE l.titulo LIKE %s
-           OR l.autor  LIKE %s;
-    """, (like, like), commit=False)
-    display_results(rows, f"Libros que coinciden con '{termino}'")
+    # Si el usuario escribe operadores (+palabra -palabra "frase" prefijo*) se usa el modo booleano.
+    modo = 'booleano' if re.search(r'(^|\s)[+\-~<>]|["*()]', termino) else 'natural'
+    offset = 0
+    while True:
+        rows = reportes.reporte_3_buscar_libros_propietario(termino, modo=modo, limit=PAGE_SIZE, offset=offset)
+        if not rows and offset:
+            break
+        display_results(rows, f"Libros que coinciden con '{termino}'")
+        if len(rows) < PAGE_SIZE:
+            break
+        if input("Enter para más resultados, 'q' para terminar: ").strip().lower() == 'q':
+            break
+        offset += PAGE_SIZE
 
 
 def consulta_4_buscar_usuarios_por_ciudad_y_club():
     print("\n[Consulta 4] Buscar usuarios por ciudad y club")
     ciudad = input("Ciudad (ej. Medellín): ").strip()
     filtro_club = input("Parte del nombre del club (o vacío para todos): ").strip()
-    params = [ciudad]
-    extra = ""
-    if filtro_club:
-        extra = "AND (c.nombre_club LIKE %s OR c.nombre_club IS NULL)"
-        params.append(f"%{filtro_club}%")
-
-    query = f"""
-        SELECT DISTINCT u.id_usuario,
-               u.nombre,
-               u.email,
-               u.ciudad,
-               c.nombre_club
-        FROM usuario u
-        LEFT JOIN usuario_club uc ON u.id_usuario = uc.id_usuario
-        LEFT JOIN club_lectura c  ON uc.id_club    = c.id_club
-        WHERE u.ciudad = %s
-        {extra}
-        ORDER BY u.nombre;
-    """
-    rows = execute_query(query, tuple(params), commit=False)
+    rows = reportes.reporte_4_usuarios_por_ciudad_y_club(ciudad, filtro_club, formato=FORMATO_PANTALLA)
     display_results(rows, f"Usuarios en {ciudad}")
 
 
 def consulta_5_ordenes_por_ciudad_y_mes():
     print("\n[Consulta 5] Indicador de órdenes y ventas por ciudad y mes")
-    rows = execute_query("""
-        SELECT u.ciudad,
-               YEAR(oc.fecha_pago)  AS anio,
-               MONTH(oc.fecha_pago) AS mes,
-               COUNT(oc.id_orden)   AS total_ordenes,
-               SUM(oc.precio_total) AS total_vendido
-        FROM orden_compra oc
-        JOIN usuario u ON oc.id_comprador = u.id_usuario
-        WHERE oc.estado_orden IN ('pagado','enviado','recibido')
-        GROUP BY u.ciudad, YEAR(oc.fecha_pago), MONTH(oc.fecha_pago)
-        ORDER BY u.ciudad, anio, mes;
-    """, commit=False)
+    rows = reportes.reporte_5_ordenes_por_ciudad_y_mes(formato=FORMATO_PANTALLA)
     display_results(rows, "Órdenes por ciudad y mes")
 
 
 def consulta_6_ventas_por_libro():
     print("\n[Consulta 6] Libros vendidos y total de ingresos por libro")
-    rows = execute_query("""
-        SELECT l.id_libro,
-               l.titulo,
-               COUNT(oc.id_orden)                 AS veces_vendido,
-               COALESCE(SUM(oc.precio_total), 0)  AS total_ingresos
-        FROM libro l
-        LEFT JOIN orden_compra oc
-               ON l.id_libro = oc.id_libro
-              AND oc.estado_orden IN ('pagado','enviado','recibido')
-        GROUP BY l.id_libro, l.titulo
-        ORDER BY veces_vendido DESC;
-    """, commit=False)
+    rows = reportes.reporte_6_ventas_por_libro(formato=FORMATO_PANTALLA)
     display_results(rows, "Ventas por libro")
 
 
 def consulta_7_detalle_intercambios():
     print("\n[Consulta 7] Detalle de intercambios entre usuarios")
-    rows = execute_query("""
-        SELECT i.id_intercambio,
-               u1.nombre AS usuario_propone,
-               u2.nombre AS usuario_recibe,
-               l1.titulo AS libro_ofrecido,
-               l2.titulo AS libro_solicitado,
-               i.estado_intercambio,
-               i.fecha_propuesta
-        FROM intercambio i
-        JOIN usuario u1 ON i.id_usuario_propone  = u1.id_usuario
-        JOIN usuario u2 ON i.id_usuario_recibe   = u2.id_usuario
-        JOIN libro   l1 ON i.id_libro_ofrecido   = l1.id_libro
-        JOIN libro   l2 ON i.id_libro_solicitado = l2.id_libro;
-    """, commit=False)
+    rows = reportes.reporte_7_detalle_intercambios(formato=FORMATO_PANTALLA)
     display_results(rows, "Intercambios entre usuarios")
 
 
 def consulta_8_intercambios_completados_por_usuario():
     print("\n[Consulta 8] Intercambios completados por usuario que propone")
-    rows = execute_query("""
-        SELECT u.id_usuario,
-               u.nombre,
-               COUNT(i.id_intercambio) AS intercambios_completados
-        FROM usuario u
-        JOIN intercambio i ON u.id_usuario = i.id_usuario_propone
-        WHERE i.estado_intercambio = 'completado'
-        GROUP BY u.id_usuario, u.nombre
-        ORDER BY intercambios_completados DESC;
-    """, commit=False)
+    rows = reportes.reporte_8_intercambios_completados_por_usuario(formato=FORMATO_PANTALLA)
     display_results(rows, "Intercambios completados por usuario")
 
 
 def consulta_9_promedio_calificacion_por_libro():
     print("\n[Consulta 9] Promedio de calificación por libro (>= 4)")
-    rows = execute_query("""
-        SELECT l.id_libro,
-               l.titulo,
-               ROUND(AVG(r.calificacion), 2) AS promedio_calificacion,
-               COUNT(r.id_resena)            AS total_resenas
-        FROM libro l
-        JOIN resena r ON l.id_libro = r.id_libro
-        GROUP BY l.id_libro, l.titulo
-        HAVING promedio_calificacion >= 4
-        ORDER BY promedio_calificacion DESC;
-    """, commit=False)
+    rows = reportes.reporte_9_promedio_calificacion_por_libro(formato=FORMATO_PANTALLA)
     display_results(rows, "Promedio de calificación por libro")
 
 
 def consulta_10_promedio_calificacion_por_usuario():
     print("\n[Consulta 10] Promedio de calificación dada por usuario")
-    rows = execute_query("""
-        SELECT u.id_usuario,
-               u.nombre,
-               ROUND(AVG(r.calificacion), 2) AS promedio_calificaciones_dadas,
-               COUNT(r.id_resena)            AS total_resenas
-        FROM usuario u
-        JOIN resena r ON u.id_usuario = r.id_usuario
-        GROUP BY u.id_usuario, u.nombre
-        ORDER BY promedio_calificaciones_dadas DESC;
-    """, commit=False)
+    rows = reportes.reporte_10_promedio_calificacion_por_usuario(formato=FORMATO_PANTALLA)
     display_results(rows, "Promedio de calificación dada por usuario")
 
 
 def consulta_11_proximas_reuniones():
     print("\n[Consulta 11] Próximas reuniones por club")
-    rows = execute_query("""
-        SELECT c.id_club,
-               c.nombre_club,
-               r.fecha_reunion,
-               r.tema,
-               r.lugar
-        FROM reunion r
-        JOIN club_lectura c ON r.id_club = c.id_club
-        WHERE r.fecha_reunion >= NOW()
-        ORDER BY r.fecha_reunion;
-    """, commit=False)
+    rows = reportes.reporte_11_proximas_reuniones(formato=FORMATO_PANTALLA)
     display_results(rows, "Próximas reuniones")
 
 
 def consulta_12_libros_en_lectura_por_club():
     print("\n[Consulta 12] Libros en lectura actual por club")
-    rows = execute_query("""
-        SELECT c.id_club,
-               c.nombre_club,
-               COUNT(ll.id_libro) AS libros_en_lectura_actual
-        FROM club_lectura c
-        LEFT JOIN leer_libros ll
-               ON c.id_club = ll.id_club
-              AND ll.fecha_fin IS NULL
-        GROUP BY c.id_club, c.nombre_club
-        ORDER BY libros_en_lectura_actual DESC;
-    """, commit=False)
+    rows = reportes.reporte_12_libros_en_lectura_por_club(formato=FORMATO_PANTALLA)
     display_results(rows, "Libros en lectura actual por club")
 
 
 def consulta_13_clubes_por_usuario():
     print("\n[Consulta 13] Número de clubes en los que participa cada usuario")
-    rows = execute_query("""
-        SELECT u.id_usuario,
-               u.nombre,
-               COUNT(CASE WHEN uc.estado_miembro = 'aceptado' THEN 1 END) AS clubes_aceptados
-        FROM usuario u
-        LEFT JOIN usuario_club uc ON u.id_usuario = uc.id_usuario
-        GROUP BY u.id_usuario, u.nombre
-        ORDER BY clubes_aceptados DESC;
-    """, commit=False)
+    rows = reportes.reporte_13_clubes_por_usuario(formato=FORMATO_PANTALLA)
     display_results(rows, "Clubes por usuario")
 
 
 def consulta_14_libros_clubes_y_lectores():
     print("\n[Consulta 14] Libros con clubes asociados y número de lectores actuales")
-    rows = execute_query("""
-        SELECT l.id_libro,
-               l.titulo,
-               COUNT(DISTINCT c.id_club)     AS num_clubes_asociados,
-               COUNT(DISTINCT ll.id_usuario) AS num_lectores_activos
-        FROM libro l
-        JOIN club_lectura c ON l.id_libro = c.id_libro
-        LEFT JOIN leer_libros ll
-               ON l.id_libro = ll.id_libro
-              AND ll.fecha_fin IS NULL
-        GROUP BY l.id_libro, l.titulo
-        ORDER BY num_lectores_activos DESC;
-    """, commit=False)
+    rows = reportes.reporte_14_libros_clubes_y_lectores(formato=FORMATO_PANTALLA)
     display_results(rows, "Libros, clubes y lectores activos")
 
 
 def consulta_15_usuarios_con_club_sin_compras():
     print("\n[Consulta 15] Usuarios con clubes aceptados pero sin compras")
-    rows = execute_query("""
-        SELECT DISTINCT u.id_usuario,
-               u.nombre,
-               u.email,
-               u.ciudad
-        FROM usuario u
-        JOIN usuario_club uc
-               ON u.id_usuario = uc.id_usuario
-              AND uc.estado_miembro = 'aceptado'
-        LEFT JOIN orden_compra oc
-               ON u.id_usuario = oc.id_comprador
-        WHERE oc.id_orden IS NULL
-        ORDER BY u.nombre;
-    """, commit=False)
+    rows = reportes.reporte_15_usuarios_con_club_sin_compras(formato=FORMATO_PANTALLA)
     display_results(rows, "Usuarios con clubes pero sin compras")
 
 
@@ -388,8 +309,7 @@ def menu_leer_usuarios():
         opcion_leer = input("Seleccione una opción (1-4): ")
 
         if opcion_leer == '1':
-            usuarios = leer_usuarios()
-            display_results(usuarios, "Usuarios")
+            display_paginated('usuario', "Usuarios")
             break
         elif opcion_leer == '2':
             valor = input("Ingrese el email del usuario: ")
@@ -497,7 +417,7 @@ def menu_crud_libro():
     while True:
         print("\n=== CRUD TABLA LIBRO ===")
         print("1. ➕ Crear nuevo libro (No implementado)")
-        print("2. 🔎 Leer/Listar libros (No implementado)")
+        print("2. 🔎 Listar libros")
         print("3. ✏️ Actualizar libro (No implementado)")
         print("4. 🗑️ Borrar libro (No implementado)")
         print("5. 🔙 Volver al menú principal")
@@ -507,7 +427,11 @@ def menu_crud_libro():
         if opcion == '1':
             print("Función de crear libro no implementada en el menú.")
         elif opcion == '2':
-            print("Función de leer libro no implementada en el menú.")
+            # Lectura por streaming: la memoria no depende de cuántos libros haya.
+            try:
+                display_results(leer_libros(stream=True, formato='registro'), "Libros", page_size=PAGE_SIZE)
+            except Error:
+                print("❌ La lista de libros quedó incompleta.")
         elif opcion == '3' or opcion == '4':
             print("❌ Función de Actualizar/Borrar no implementada para Libro en este menú.")
         elif opcion == '5':
@@ -554,8 +478,7 @@ def menu_crud_reunion():
         opcion = input("Seleccione una opción (1-4): ")
 
         if opcion == '1':
-            reuniones = leer_reuniones()
-            display_results(reuniones, "Reuniones")
+            display_paginated('reunion', "Reuniones")
         elif opcion == '2':
             id_club = input("Ingrese el ID del Club para ver sus reuniones: ")
             try:
@@ -588,8 +511,7 @@ def menu_crud_usuario_club():
         opcion = input("Seleccione una opción (1-4): ")
 
         if opcion == '1':
-            afiliaciones = leer_usuarios_club()
-            display_results(afiliaciones, "Afiliaciones a Clubes")
+            display_paginated('usuario_club', "Afiliaciones a Clubes")
         elif opcion == '2':
             id_club = input("Ingrese el ID del Club para ver sus miembros: ")
             try:
@@ -621,8 +543,7 @@ def menu_crud_leer_libros():
         opcion = input("Seleccione una opción (1-3): ")
 
         if opcion == '1':
-            registros = leer_registros_lectura()
-            display_results(registros, "Registros de Lectura")
+            display_paginated('leer_libros', "Registros de Lectura")
         elif opcion == '2':
             id_club = input("Ingrese el ID del Club: ")
             try:
@@ -663,9 +584,10 @@ def menu_principal():
         print("7. 👥 Miembros de Club (Ver/Buscar)")
         print("8. 🔖 Registros de Lectura (Ver/Buscar)")
         print("9. 📊 Consultas y Reportes (Entrega 3)")
-        print("10. 🚪 Salir")
+        print("10. ⏱️ Estadísticas de sentencias SQL")
+        print("11. 🚪 Salir")
 
-        opcion = input("Opción (1-10): ").strip()
+        opcion = input("Opción (1-11): ").strip()
 
         if opcion == '1':
             menu_crud_usuario()
@@ -686,6 +608,8 @@ def menu_principal():
         elif opcion == '9':
             menu_consultas()
         elif opcion == '10':
+            instrumentacion.volcar()
+        elif opcion == '11':
             print("¡Gracias por usar el gestor de libros circulares! 👋")
             break
         else:
@@ -693,4 +617,7 @@ def menu_principal():
 
 
 if __name__ == "__main__":
+    # python main.py --instrumentar  -> mide cada sentencia y escribe slow_queries.log
+    if '--instrumentar' in sys.argv[1:]:
+        instrumentacion.configurar(enabled=True)
     menu_principal()
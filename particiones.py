@@ -0,0 +1,151 @@
+# particiones.py
+"""Mantenimiento de las particiones mensuales de orden_compra (ver particiones.sql).
+
+    python particiones.py listar
+    python particiones.py mantener                    # crea los próximos 3 meses
+    python particiones.py mantener --retener 24       # y archiva los meses más viejos
+    python particiones.py mantener --retener 24 --borrar --simular
+
+La partición pAAAAMM guarda las órdenes con fecha_pedido en ese mes; pmax recibe lo
+que no tenga partición propia. Conviene correr `mantener` una vez al mes (cron).
+
+Archivar mueve el mes a la tabla orden_compra_archivo_AAAAMM con EXCHANGE PARTITION
+(no copia filas) y luego borra la partición vacía. Ni archivar ni borrar disparan los
+triggers: las tablas resumen conservan las ventas de esos meses, pero
+resumenes.py --verificar / reconstruir solo ven las órdenes que siguen en la tabla.
+"""
+import argparse
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from cruds import execute_query
+
+TABLA = 'orden_compra'
+MESES_FUTUROS = 3
+
+
+def _primer_dia(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _sumar_meses(d: date, meses: int) -> date:
+    total = d.year * 12 + d.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def _nombre(mes: date) -> str:
+    return f"p{mes:%Y%m}"
+
+
+def _hoy() -> date:
+    fila = execute_query("SELECT CURDATE() AS hoy", commit=False, fetch_one=True)
+    return fila['hoy'] if fila else date.today()
+
+
+def listar_particiones() -> List[Dict[str, Any]]:
+    """Particiones de orden_compra en orden: nombre, límite superior (None = MAXVALUE) y filas aprox."""
+    filas = execute_query("""
+        SELECT PARTITION_NAME AS nombre, PARTITION_DESCRIPTION AS descripcion, TABLE_ROWS AS filas
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (TABLA,), commit=False)
+    if not filas or filas[0]['nombre'] is None:
+        raise ValueError(f"{TABLA} no está particionada (ejecute particiones.sql)")
+    for f in filas:
+        descripcion = f.pop('descripcion')
+        f['limite'] = None if descripcion == 'MAXVALUE' else datetime.fromisoformat(descripcion.strip("'")).date()
+    return filas
+
+
+def _ejecutar(sentencias: List[str], simular: bool) -> bool:
+    for sql in sentencias:
+        print(("-- " if simular else "") + sql + ";")
+        if not simular and execute_query(sql, commit=True) == -1:
+            return False
+    return True
+
+
+def crear_particiones(meses_futuros: int = MESES_FUTUROS, simular: bool = False) -> List[str]:
+    """Divide pmax en particiones mensuales hasta `meses_futuros` después del mes actual.
+
+    La primera vez (solo existe pmax) arranca en el mes de la orden más antigua.
+    Retorna los nombres de las particiones creadas.
+    """
+    limites = [p['limite'] for p in listar_particiones() if p['limite'] is not None]
+    if limites:
+        inicio = max(limites)
+    else:
+        fila = execute_query(f"SELECT MIN(fecha_pedido) AS primera FROM {TABLA}", commit=False, fetch_one=True)
+        primera = fila['primera'] if fila else None
+        inicio = _primer_dia(primera.date() if primera else _hoy())
+    fin = _sumar_meses(_primer_dia(_hoy()), meses_futuros + 1)
+
+    meses = []
+    mes = inicio
+    while mes < fin:
+        meses.append(mes)
+        mes = _sumar_meses(mes, 1)
+    if not meses:
+        return []
+
+    nuevas = ",\n    ".join(f"PARTITION {_nombre(m)} VALUES LESS THAN ('{_sumar_meses(m, 1).isoformat()}')"
+                            for m in meses)
+    sql = (f"ALTER TABLE {TABLA} REORGANIZE PARTITION pmax INTO (\n    {nuevas},\n"
+           f"    PARTITION pmax VALUES LESS THAN (MAXVALUE))")
+    return [_nombre(m) for m in meses] if _ejecutar([sql], simular) else []
+
+
+def retirar_particiones(meses_retencion: int, archivar: bool = True, simular: bool = False) -> List[str]:
+    """Archiva (o borra) los meses anteriores a los últimos `meses_retencion` meses.
+
+    Retorna los nombres de las particiones retiradas.
+    """
+    if meses_retencion < 1:
+        raise ValueError("meses_retencion debe ser al menos 1")
+    corte = _sumar_meses(_primer_dia(_hoy()), -meses_retencion)
+    retiradas = []
+    for p in listar_particiones():
+        if p['limite'] is None or p['limite'] > corte:
+            continue
+        sentencias = []
+        if archivar:
+            archivo = f"{TABLA}_archivo_{p['nombre'][1:]}"
+            sentencias += [
+                f"CREATE TABLE {archivo} LIKE {TABLA}",
+                f"ALTER TABLE {archivo} REMOVE PARTITIONING",
+                f"ALTER TABLE {TABLA} EXCHANGE PARTITION {p['nombre']} WITH TABLE {archivo}",
+            ]
+        sentencias.append(f"ALTER TABLE {TABLA} DROP PARTITION {p['nombre']}")
+        if not _ejecutar(sentencias, simular):
+            break
+        retiradas.append(p['nombre'])
+    return retiradas
+
+
+def mantener(meses_futuros: int = MESES_FUTUROS, meses_retencion: Optional[int] = None,
+             archivar: bool = True, simular: bool = False) -> Dict[str, List[str]]:
+    """Crea los meses que faltan y, si se indica retención, retira los más viejos."""
+    resultado = {'creadas': crear_particiones(meses_futuros, simular), 'retiradas': []}
+    if meses_retencion is not None:
+        resultado['retiradas'] = retirar_particiones(meses_retencion, archivar, simular)
+    return resultado
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Particiones mensuales de orden_compra.")
+    parser.add_argument("accion", choices=["listar", "mantener"])
+    parser.add_argument("--futuros", type=int, default=MESES_FUTUROS, help="Meses a crear por adelantado.")
+    parser.add_argument("--retener", type=int, help="Meses a conservar; los anteriores se archivan.")
+    parser.add_argument("--borrar", action="store_true", help="Borrar los meses viejos en vez de archivarlos.")
+    parser.add_argument("--simular", action="store_true", help="Solo imprimir las sentencias.")
+    args = parser.parse_args()
+
+    if args.accion == "listar":
+        for p in listar_particiones():
+            limite = p['limite'].isoformat() if p['limite'] else 'MAXVALUE'
+            print(f"{p['nombre']:<10} < {limite:<10} {p['filas']:>12,} filas (aprox.)")
+    else:
+        resultado = mantener(args.futuros, args.retener, not args.borrar, args.simular)
+        print(f"✅ Creadas: {', '.join(resultado['creadas']) or 'ninguna'}; "
+              f"retiradas: {', '.join(resultado['retiradas']) or 'ninguna'}")
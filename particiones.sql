@@ -0,0 +1,110 @@
+-- PARTICIONADO MENSUAL DE orden_compra
+-- Se ejecuta después de entrega3.sql y resumenes.sql. Deja la tabla particionada por
+-- RANGE COLUMNS(fecha_pedido) con una sola partición pmax; `python particiones.py mantener`
+-- la divide en meses (desde la orden más antigua) y crea los meses futuros.
+--
+-- Restricciones de MySQL para tablas particionadas:
+--   * Toda clave única debe incluir la columna de partición: la PK pasa a ser
+--     (id_orden, fecha_pedido). id_orden sigue siendo AUTO_INCREMENT y único en la práctica.
+--   * No admiten llaves foráneas: fk_orden_comprador y fk_orden_libro se reemplazan por
+--     los triggers de abajo (mismo comportamiento: RESTRICT al borrar, CASCADE al
+--     cambiar el id del usuario o del libro).
+
+USE libros_circulares;
+
+ALTER TABLE orden_compra
+  DROP FOREIGN KEY fk_orden_comprador,
+  DROP FOREIGN KEY fk_orden_libro;
+
+-- El índice que MySQL creó para fk_orden_libro se conserva con un nombre propio.
+ALTER TABLE orden_compra
+  RENAME INDEX fk_orden_libro TO idx_orden_libro,
+  DROP PRIMARY KEY,
+  ADD PRIMARY KEY (id_orden, fecha_pedido);
+
+ALTER TABLE orden_compra
+  PARTITION BY RANGE COLUMNS (fecha_pedido) (
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+  );
+
+
+-- ===================================
+-- Integridad referencial por triggers
+-- ===================================
+
+DELIMITER //
+CREATE TRIGGER trg_orden_fk_ins
+BEFORE INSERT ON orden_compra
+FOR EACH ROW
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM usuario WHERE id_usuario = NEW.id_comprador) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'fk_orden_comprador: el comprador no existe';
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM libro WHERE id_libro = NEW.id_libro) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'fk_orden_libro: el libro no existe';
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_orden_fk_upd
+BEFORE UPDATE ON orden_compra
+FOR EACH ROW
+BEGIN
+  IF NEW.id_comprador <> OLD.id_comprador
+     AND NOT EXISTS (SELECT 1 FROM usuario WHERE id_usuario = NEW.id_comprador) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'fk_orden_comprador: el comprador no existe';
+  END IF;
+  IF NEW.id_libro <> OLD.id_libro
+     AND NOT EXISTS (SELECT 1 FROM libro WHERE id_libro = NEW.id_libro) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'fk_orden_libro: el libro no existe';
+  END IF;
+END//
+DELIMITER ;
+
+-- ON DELETE RESTRICT. Si falla, el DELETE completo se revierte (incluidos los
+-- cambios de trg_usuario_resumen_del / trg_libro_resumen_del).
+DELIMITER //
+CREATE TRIGGER trg_usuario_fk_orden_del
+BEFORE DELETE ON usuario
+FOR EACH ROW
+BEGIN
+  IF EXISTS (SELECT 1 FROM orden_compra WHERE id_comprador = OLD.id_usuario) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'fk_orden_comprador: el usuario tiene órdenes de compra';
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_libro_fk_orden_del
+BEFORE DELETE ON libro
+FOR EACH ROW
+BEGIN
+  IF EXISTS (SELECT 1 FROM orden_compra WHERE id_libro = OLD.id_libro) THEN
+    SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'fk_orden_libro: el libro tiene órdenes de compra';
+  END IF;
+END//
+DELIMITER ;
+
+-- ON UPDATE CASCADE.
+DELIMITER //
+CREATE TRIGGER trg_usuario_fk_orden_upd
+AFTER UPDATE ON usuario
+FOR EACH ROW
+BEGIN
+  IF NEW.id_usuario <> OLD.id_usuario THEN
+    UPDATE orden_compra SET id_comprador = NEW.id_usuario WHERE id_comprador = OLD.id_usuario;
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_libro_fk_orden_upd
+AFTER UPDATE ON libro
+FOR EACH ROW
+BEGIN
+  IF NEW.id_libro <> OLD.id_libro THEN
+    UPDATE orden_compra SET id_libro = NEW.id_libro WHERE id_libro = OLD.id_libro;
+  END IF;
+END//
+DELIMITER ;
@@ -0,0 +1,347 @@
+# reportes.py
+"""SQL de las consultas y reportes de la Entrega 3, sin input() ni print().
+
+main.py pide los parámetros al usuario y muestra los resultados; este módulo solo
+ejecuta las consultas, así que también lo pueden usar el benchmark y los procesos
+sin interfaz. Con stream=True se retorna un generador sobre un cursor sin buffer
+(ver cruds.stream_query), para exportar resultados grandes en memoria constante.
+`formato` elige la representación de las filas ('dict', 'tupla', 'registro' o
+'columnas', ver filas.py); main.display_results acepta cualquiera.
+"""
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cruds import _leer, buscar_libros
+
+
+def reporte_1_miembros_por_club(id_club: int, stream: bool = False, tx=None,
+                                formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT c.id_club,
+               c.nombre_club,
+               u.id_usuario,
+               u.nombre,
+               u.email
+        FROM usuario_club uc
+        JOIN usuario u      ON uc.id_usuario = u.id_usuario
+        JOIN club_lectura c ON uc.id_club    = c.id_club
+        WHERE uc.estado_miembro = 'aceptado'
+          AND c.id_club = %s;
+    """, (int(id_club),), stream=stream, tx=tx, formato=formato)
+
+
+def reporte_2_clubes_y_total_miembros(stream: bool = False, tx=None, formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT c.id_club,
+               c.nombre_club,
+               COUNT(CASE WHEN uc.estado_miembro = 'aceptado' THEN 1 END) AS total_miembros_aceptados
+        FROM club_lectura c
+        LEFT JOIN usuario_club uc ON c.id_club = uc.id_club
+        GROUP BY c.id_club, c.nombre_club
+        ORDER BY total_miembros_aceptados DESC;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+def reporte_3_buscar_libros_propietario(termino: str, modo: str = 'natural', limit: int = 20,
+                                        offset: int = 0, tx=None) -> List[Dict[str, Any]]:
+    return buscar_libros(termino, modo=modo, limit=limit, offset=offset, tx=tx)
+
+
+def reporte_4_usuarios_por_ciudad_y_club(ciudad: str, filtro_club: Optional[str] = None,
+                                         stream: bool = False, tx=None,
+                                         formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    params = [ciudad]
+    extra = ""
+    if filtro_club:
+        extra = "AND (c.nombre_club LIKE %s OR c.nombre_club IS NULL)"
+        params.append(f"%{filtro_club}%")
+
+    query = f"""
+        SELECT DISTINCT u.id_usuario,
+               u.nombre,
+               u.email,
+               u.ciudad,
+               c.nombre_club
+        FROM usuario u
+        LEFT JOIN usuario_club uc ON u.id_usuario = uc.id_usuario
+        LEFT JOIN club_lectura c  ON uc.id_club    = c.id_club
+        WHERE u.ciudad = %s
+        {extra}
+        ORDER BY u.nombre;
+    """
+    return _leer(query, tuple(params), stream=stream, tx=tx, formato=formato)
+
+
+def reporte_5_ordenes_por_ciudad_y_mes(stream: bool = False, tx=None,
+                                       formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    # Lee la tabla resumen mantenida por triggers (resumenes.sql).
+    return _leer("""
+        SELECT IF(rv.ciudad_nula, NULL, rv.ciudad) AS ciudad,
+               NULLIF(rv.anio, 0)                  AS anio,
+               NULLIF(rv.mes, 0)                   AS mes,
+               rv.total_ordenes,
+               rv.total_vendido
+        FROM resumen_ventas_ciudad_mes rv
+        ORDER BY rv.ciudad_nula DESC, rv.ciudad, rv.anio, rv.mes;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+def reporte_6_ventas_por_libro(stream: bool = False, tx=None, formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT l.id_libro,
+               l.titulo,
+               COALESCE(rv.veces_vendido, 0)   AS veces_vendido,
+               COALESCE(rv.total_ingresos, 0)  AS total_ingresos
+        FROM libro l
+        LEFT JOIN resumen_ventas_libro rv ON l.id_libro = rv.id_libro
+        ORDER BY veces_vendido DESC;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+def reporte_7_detalle_intercambios(stream: bool = False, tx=None, formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT i.id_intercambio,
+               u1.nombre AS usuario_propone,
+               u2.nombre AS usuario_recibe,
+               l1.titulo AS libro_ofrecido,
+               l2.titulo AS libro_solicitado,
+               i.estado_intercambio,
+               i.fecha_propuesta
+        FROM intercambio i
+        JOIN usuario u1 ON i.id_usuario_propone  = u1.id_usuario
+        JOIN usuario u2 ON i.id_usuario_recibe   = u2.id_usuario
+        JOIN libro   l1 ON i.id_libro_ofrecido   = l1.id_libro
+        JOIN libro   l2 ON i.id_libro_solicitado = l2.id_libro;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+def reporte_8_intercambios_completados_por_usuario(stream: bool = False, tx=None,
+                                                   formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT u.id_usuario,
+               u.nombre,
+               COUNT(i.id_intercambio) AS intercambios_completados
+        FROM usuario u
+        JOIN intercambio i ON u.id_usuario = i.id_usuario_propone
+        WHERE i.estado_intercambio = 'completado'
+        GROUP BY u.id_usuario, u.nombre
+        ORDER BY intercambios_completados DESC;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+def reporte_9_promedio_calificacion_por_libro(minimo: float = 4, stream: bool = False,
+                                              tx=None, formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    # rating_avg lo mantienen los triggers de resena (resumenes.sql); con idx_libro_rating
+    # es un rango del índice recorrido en orden, sin agrupar reseñas.
+    return _leer("""
+        SELECT l.id_libro,
+               l.titulo,
+               l.rating_avg   AS promedio_calificacion,
+               l.rating_count AS total_resenas
+        FROM libro l
+        WHERE l.rating_avg >= %s
+        ORDER BY l.rating_avg DESC;
+    """, (minimo,), stream=stream, tx=tx, formato=formato)
+
+
+def reporte_10_promedio_calificacion_por_usuario(stream: bool = False, tx=None,
+                                                 formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT u.id_usuario,
+               u.nombre,
+               u.rating_avg   AS promedio_calificaciones_dadas,
+               u.rating_count AS total_resenas
+        FROM usuario u
+        WHERE u.rating_avg IS NOT NULL
+        ORDER BY u.rating_avg DESC;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+def reporte_11_proximas_reuniones(stream: bool = False, tx=None, formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT c.id_club,
+               c.nombre_club,
+               r.fecha_reunion,
+               r.tema,
+               r.lugar
+        FROM reunion r
+        JOIN club_lectura c ON r.id_club = c.id_club
+        WHERE r.fecha_reunion >= NOW()
+        ORDER BY r.fecha_reunion;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+def reporte_12_libros_en_lectura_por_club(stream: bool = False, tx=None,
+                                          formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT c.id_club,
+               c.nombre_club,
+               COUNT(ll.id_libro) AS libros_en_lectura_actual
+        FROM club_lectura c
+        LEFT JOIN leer_libros ll
+               ON c.id_club = ll.id_club
+              AND ll.fecha_fin IS NULL
+        GROUP BY c.id_club, c.nombre_club
+        ORDER BY libros_en_lectura_actual DESC;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+def reporte_13_clubes_por_usuario(stream: bool = False, tx=None, formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT u.id_usuario,
+               u.nombre,
+               COUNT(CASE WHEN uc.estado_miembro = 'aceptado' THEN 1 END) AS clubes_aceptados
+        FROM usuario u
+        LEFT JOIN usuario_club uc ON u.id_usuario = uc.id_usuario
+        GROUP BY u.id_usuario, u.nombre
+        ORDER BY clubes_aceptados DESC;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+def reporte_14_libros_clubes_y_lectores(stream: bool = False, tx=None,
+                                        formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT l.id_libro,
+               l.titulo,
+               COUNT(DISTINCT c.id_club)     AS num_clubes_asociados,
+               COUNT(DISTINCT ll.id_usuario) AS num_lectores_activos
+        FROM libro l
+        JOIN club_lectura c ON l.id_libro = c.id_libro
+        LEFT JOIN leer_libros ll
+               ON l.id_libro = ll.id_libro
+              AND ll.fecha_fin IS NULL
+        GROUP BY l.id_libro, l.titulo
+        ORDER BY num_lectores_activos DESC;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+def reporte_15_usuarios_con_club_sin_compras(stream: bool = False, tx=None,
+                                             formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    return _leer("""
+        SELECT DISTINCT u.id_usuario,
+               u.nombre,
+               u.email,
+               u.ciudad
+        FROM usuario u
+        JOIN usuario_club uc
+               ON u.id_usuario = uc.id_usuario
+              AND uc.estado_miembro = 'aceptado'
+        LEFT JOIN orden_compra oc
+               ON u.id_usuario = oc.id_comprador
+        WHERE oc.id_orden IS NULL
+        ORDER BY u.nombre;
+    """, stream=stream, tx=tx, formato=formato)
+
+
+# ----------------------------------------------------------------------
+# REPORTES DE ÓRDENES POR RANGO DE FECHAS
+# ----------------------------------------------------------------------
+# orden_compra está particionada por mes de fecha_pedido (particiones.sql). Estas
+# consultas filtran con fecha_pedido >= desde AND fecha_pedido < hasta, sin funciones
+# sobre la columna, para que MySQL lea solo las particiones del rango (y pueda usar
+# idx_orden_fechas). Los meses se cuentan por fecha de pedido, no de pago.
+
+_ESTADOS_VENDIDOS = ('pagado', 'enviado', 'recibido')
+
+
+def rango_mes(anio: int, mes: int, meses: int = 1) -> Tuple[date, date]:
+    """(primer día del mes, primer día del mes `meses` después) para usar como [desde, hasta)."""
+    total = anio * 12 + mes - 1 + meses
+    return date(anio, mes, 1), date(total // 12, total % 12 + 1, 1)
+
+
+def _limites(desde, hasta) -> Tuple[datetime, datetime]:
+    desde, hasta = (d if isinstance(d, datetime) else datetime.combine(d, time.min) for d in (desde, hasta))
+    if desde >= hasta:
+        raise ValueError("El rango de fechas está vacío: 'desde' debe ser anterior a 'hasta'")
+    return desde, hasta
+
+
+def ordenes_por_rango(desde, hasta, estado: Optional[str] = None,
+                      stream: bool = False, tx=None, formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    """Órdenes con fecha_pedido en [desde, hasta), opcionalmente de un solo estado."""
+    params = list(_limites(desde, hasta))
+    extra = ""
+    if estado:
+        extra = "AND oc.estado_orden = %s"
+        params.append(estado)
+    return _leer(f"""
+        SELECT oc.*
+        FROM orden_compra oc
+        WHERE oc.fecha_pedido >= %s
+          AND oc.fecha_pedido <  %s
+          {extra}
+        ORDER BY oc.fecha_pedido, oc.id_orden;
+    """, tuple(params), stream=stream, tx=tx, formato=formato)
+
+
+def ventas_por_ciudad_y_mes_rango(desde, hasta, stream: bool = False, tx=None,
+                                  formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    """Como la consulta 5 pero de un rango y agrupando por mes de pedido."""
+    return _leer("""
+        SELECT u.ciudad,
+               YEAR(oc.fecha_pedido)  AS anio,
+               MONTH(oc.fecha_pedido) AS mes,
+               COUNT(*)               AS total_ordenes,
+               SUM(oc.precio_total)   AS total_vendido
+        FROM orden_compra oc
+        JOIN usuario u ON oc.id_comprador = u.id_usuario
+        WHERE oc.fecha_pedido >= %s
+          AND oc.fecha_pedido <  %s
+          AND oc.estado_orden IN (%s, %s, %s)
+        GROUP BY u.ciudad, anio, mes
+        ORDER BY u.ciudad, anio, mes;
+    """, _limites(desde, hasta) + _ESTADOS_VENDIDOS, stream=stream, tx=tx, formato=formato)
+
+
+def ventas_por_libro_rango(desde, hasta, stream: bool = False, tx=None,
+                           formato: str = 'dict') -> Iterable[Dict[str, Any]]:
+    """Como la consulta 6 pero solo con las órdenes pedidas en el rango."""
+    return _leer("""
+        SELECT l.id_libro,
+               l.titulo,
+               v.veces_vendido,
+               v.total_ingresos
+        FROM (
+            SELECT oc.id_libro, COUNT(*) AS veces_vendido, SUM(oc.precio_total) AS total_ingresos
+            FROM orden_compra oc
+            WHERE oc.fecha_pedido >= %s
+              AND oc.fecha_pedido <  %s
+              AND oc.estado_orden IN (%s, %s, %s)
+            GROUP BY oc.id_libro
+        ) v
+        JOIN libro l ON l.id_libro = v.id_libro
+        ORDER BY v.veces_vendido DESC;
+    """, _limites(desde, hasta) + _ESTADOS_VENDIDOS, stream=stream, tx=tx, formato=formato)
+
+
+# número de consulta -> (título, función)
+REPORTES = {
+    1: ("Miembros de un club", reporte_1_miembros_por_club),
+    2: ("Clubs y total de miembros aceptados", reporte_2_clubes_y_total_miembros),
+    3: ("Buscar libros por título/autor y propietario", reporte_3_buscar_libros_propietario),
+    4: ("Usuarios por ciudad y club", reporte_4_usuarios_por_ciudad_y_club),
+    5: ("Órdenes por ciudad y mes", reporte_5_ordenes_por_ciudad_y_mes),
+    6: ("Ventas por libro", reporte_6_ventas_por_libro),
+    7: ("Intercambios entre usuarios", reporte_7_detalle_intercambios),
+    8: ("Intercambios completados por usuario", reporte_8_intercambios_completados_por_usuario),
+    9: ("Promedio de calificación por libro", reporte_9_promedio_calificacion_por_libro),
+    10: ("Promedio de calificación dada por usuario", reporte_10_promedio_calificacion_por_usuario),
+    11: ("Próximas reuniones", reporte_11_proximas_reuniones),
+    12: ("Libros en lectura actual por club", reporte_12_libros_en_lectura_por_club),
+    13: ("Clubes por usuario", reporte_13_clubes_por_usuario),
+    14: ("Libros, clubes y lectores activos", reporte_14_libros_clubes_y_lectores),
+    15: ("Usuarios con clubes pero sin compras", reporte_15_usuarios_con_club_sin_compras),
+}
+
+
+def rango_consultas(texto: str) -> List[int]:
+    """Números de consulta de un texto como '1-15' o '2,5,9' (para las opciones --consultas)."""
+    numeros = set()
+    for parte in texto.split(','):
+        if '-' in parte:
+            inicio, fin = parte.split('-', 1)
+            numeros.update(range(int(inicio), int(fin) + 1))
+        elif parte.strip():
+            numeros.add(int(parte))
+    return sorted(numeros)
@@ -0,0 +1,116 @@
+# resumenes.py
+"""Mantenimiento de las tablas resumen de resumenes.sql.
+
+Los triggers las mantienen al día; este módulo solo sirve para repararlas:
+
+    python resumenes.py            # reconstruye todos los resúmenes
+    python resumenes.py --verificar  # compara resúmenes contra las tablas base
+    python resumenes.py --reconciliar  # corrige rating_sum/rating_count de libro y usuario
+"""
+import sys
+from typing import Dict, Any
+
+from cruds import execute_query, Transaction, entity_cache
+
+
+# Consultas que recalculan cada resumen desde las tablas base (mismas reglas que los triggers).
+_VERIFICACIONES = {
+    'resumen_ventas_ciudad_mes': """
+        SELECT COUNT(*) AS diferencias FROM (
+            SELECT IFNULL(u.ciudad, '') AS ciudad, u.ciudad IS NULL AS ciudad_nula,
+                   IFNULL(YEAR(oc.fecha_pago), 0) AS anio, IFNULL(MONTH(oc.fecha_pago), 0) AS mes,
+                   COUNT(*) AS total_ordenes, SUM(oc.precio_total) AS total_vendido
+            FROM orden_compra oc
+            JOIN usuario u ON oc.id_comprador = u.id_usuario
+            WHERE oc.estado_orden IN ('pagado','enviado','recibido')
+            GROUP BY 1, 2, 3, 4
+        ) base
+        LEFT JOIN resumen_ventas_ciudad_mes r
+               ON r.ciudad = base.ciudad AND r.ciudad_nula = base.ciudad_nula
+              AND r.anio = base.anio AND r.mes = base.mes
+        WHERE r.total_ordenes IS NULL
+           OR r.total_ordenes <> base.total_ordenes
+           OR r.total_vendido <> base.total_vendido
+    """,
+    'resumen_ventas_libro': """
+        SELECT COUNT(*) AS diferencias FROM (
+            SELECT oc.id_libro, COUNT(*) AS veces_vendido, SUM(oc.precio_total) AS total_ingresos
+            FROM orden_compra oc
+            WHERE oc.estado_orden IN ('pagado','enviado','recibido')
+            GROUP BY oc.id_libro
+        ) base
+        LEFT JOIN resumen_ventas_libro r ON r.id_libro = base.id_libro
+        WHERE r.veces_vendido IS NULL
+           OR r.veces_vendido <> base.veces_vendido
+           OR r.total_ingresos <> base.total_ingresos
+    """,
+    'libro.rating': """
+        SELECT COUNT(*) AS diferencias
+        FROM libro l
+        LEFT JOIN (SELECT id_libro, SUM(calificacion) AS suma, COUNT(*) AS total
+                   FROM resena GROUP BY id_libro) base ON base.id_libro = l.id_libro
+        WHERE l.rating_sum <> IFNULL(base.suma, 0)
+           OR l.rating_count <> IFNULL(base.total, 0)
+    """,
+    'usuario.rating': """
+        SELECT COUNT(*) AS diferencias
+        FROM usuario u
+        LEFT JOIN (SELECT id_usuario, SUM(calificacion) AS suma, COUNT(*) AS total
+                   FROM resena GROUP BY id_usuario) base ON base.id_usuario = u.id_usuario
+        WHERE u.rating_sum <> IFNULL(base.suma, 0)
+           OR u.rating_count <> IFNULL(base.total, 0)
+    """,
+}
+
+
+def reconstruir_resumenes() -> bool:
+    """Recalcula todas las tablas resumen en una sola transacción.
+
+    INSERT ... SELECT bloquea (en modo compartido) las filas leídas de orden_compra y
+    resena hasta el commit, así que ninguna escritura concurrente se pierde.
+    """
+    with Transaction() as tx:
+        execute_query("CALL sp_reconstruir_resumenes()", commit=True, tx=tx)
+    entity_cache.clear()  # libro y usuario cacheados pueden tener rating_* viejos
+    return True
+
+
+def reconciliar_calificaciones() -> Dict[str, Any]:
+    """Corrige las filas de libro y usuario cuyo rating_sum/rating_count se desvió.
+
+    Retorna cuántas filas estaban desviadas en cada tabla antes de corregir.
+    """
+    with Transaction() as tx:
+        desviadas = {}
+        for clave in ('libro.rating', 'usuario.rating'):
+            fila = execute_query(_VERIFICACIONES[clave], commit=False, fetch_one=True, tx=tx)
+            desviadas[clave] = fila['diferencias'] if fila else None
+        if any(desviadas.values()):
+            execute_query("CALL sp_reconciliar_calificaciones()", commit=True, tx=tx)
+    if any(desviadas.values()):
+        entity_cache.clear()
+    return desviadas
+
+
+def verificar_resumenes() -> Dict[str, Any]:
+    """Cuenta, por resumen, los grupos que faltan o no coinciden con las tablas base.
+
+    Solo detecta grupos faltantes o distintos, no grupos sobrantes.
+    """
+    resultado = {}
+    for tabla, query in _VERIFICACIONES.items():
+        fila = execute_query(query, commit=False, fetch_one=True)
+        resultado[tabla] = fila['diferencias'] if fila else None
+    return resultado
+
+
+if __name__ == "__main__":
+    if '--verificar' in sys.argv[1:]:
+        for tabla, diferencias in verificar_resumenes().items():
+            print(f"{tabla}: {diferencias} diferencia(s)")
+    elif '--reconciliar' in sys.argv[1:]:
+        for tabla, desviadas in reconciliar_calificaciones().items():
+            print(f"{tabla}: {desviadas} fila(s) corregida(s)")
+    else:
+        reconstruir_resumenes()
+        print("✅ Resúmenes reconstruidos.")
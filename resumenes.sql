@@ -0,0 +1,284 @@
+-- TABLAS RESUMEN PARA LOS REPORTES DE VENTAS Y CALIFICACIONES
+-- Se ejecuta después de entrega3.sql. Los triggers mantienen los resúmenes al día
+-- con cada cambio en orden_compra y resena; sp_reconstruir_resumenes() los recalcula
+-- desde cero (python resumenes.py) si alguna vez se desincronizan.
+-- Las ventas van en tablas resumen; las calificaciones, en columnas de libro y usuario.
+
+USE libros_circulares;
+
+-- Ventas (órdenes pagadas, enviadas o recibidas) por ciudad del comprador y mes de pago.
+-- ciudad_nula y anio/mes = 0 representan los NULL del reporte original (no caben en una PK).
+CREATE TABLE IF NOT EXISTS resumen_ventas_ciudad_mes (
+  ciudad         VARCHAR(120) NOT NULL DEFAULT '',
+  ciudad_nula    TINYINT(1) NOT NULL DEFAULT 0,
+  anio           SMALLINT UNSIGNED NOT NULL DEFAULT 0,
+  mes            TINYINT UNSIGNED NOT NULL DEFAULT 0,
+  total_ordenes  BIGINT NOT NULL DEFAULT 0,
+  total_vendido  DECIMAL(16,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (ciudad, ciudad_nula, anio, mes)
+) ENGINE=InnoDB;
+
+-- Ventas por libro.
+CREATE TABLE IF NOT EXISTS resumen_ventas_libro (
+  id_libro        BIGINT UNSIGNED PRIMARY KEY,
+  veces_vendido   BIGINT NOT NULL DEFAULT 0,
+  total_ingresos  DECIMAL(16,2) NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+-- Suma y cantidad de calificaciones recibidas por cada libro y dadas por cada usuario.
+-- rating_avg es NULL sin reseñas; su índice resuelve "promedio >= 4" como un rango
+-- ya ordenado, sin agrupar reseñas.
+ALTER TABLE libro
+  ADD COLUMN rating_sum    BIGINT NOT NULL DEFAULT 0,
+  ADD COLUMN rating_count  BIGINT NOT NULL DEFAULT 0,
+  ADD COLUMN rating_avg    DECIMAL(3,2)
+    AS (IF(rating_count > 0, ROUND(rating_sum / rating_count, 2), NULL)) STORED,
+  ADD INDEX idx_libro_rating (rating_avg);
+
+ALTER TABLE usuario
+  ADD COLUMN rating_sum    BIGINT NOT NULL DEFAULT 0,
+  ADD COLUMN rating_count  BIGINT NOT NULL DEFAULT 0,
+  ADD COLUMN rating_avg    DECIMAL(3,2)
+    AS (IF(rating_count > 0, ROUND(rating_sum / rating_count, 2), NULL)) STORED,
+  ADD INDEX idx_usuario_rating (rating_avg);
+
+
+-- ===================================
+-- Procedimientos de aplicación de deltas
+-- ===================================
+
+DELIMITER //
+CREATE PROCEDURE sp_resumen_aplicar_orden(IN p_id_comprador BIGINT UNSIGNED, IN p_id_libro BIGINT UNSIGNED,
+                                          IN p_fecha_pago DATETIME, IN p_precio DECIMAL(12,2), IN p_signo INT)
+BEGIN
+  DECLARE v_ciudad VARCHAR(120);
+  SELECT ciudad INTO v_ciudad FROM usuario WHERE id_usuario = p_id_comprador;
+
+  INSERT INTO resumen_ventas_ciudad_mes (ciudad, ciudad_nula, anio, mes, total_ordenes, total_vendido)
+  VALUES (IFNULL(v_ciudad, ''), v_ciudad IS NULL, IFNULL(YEAR(p_fecha_pago), 0), IFNULL(MONTH(p_fecha_pago), 0),
+          p_signo, p_signo * p_precio)
+  ON DUPLICATE KEY UPDATE total_ordenes = total_ordenes + VALUES(total_ordenes),
+                          total_vendido = total_vendido + VALUES(total_vendido);
+  DELETE FROM resumen_ventas_ciudad_mes
+  WHERE ciudad = IFNULL(v_ciudad, '') AND ciudad_nula = (v_ciudad IS NULL)
+    AND anio = IFNULL(YEAR(p_fecha_pago), 0) AND mes = IFNULL(MONTH(p_fecha_pago), 0)
+    AND total_ordenes = 0;
+
+  INSERT INTO resumen_ventas_libro (id_libro, veces_vendido, total_ingresos)
+  VALUES (p_id_libro, p_signo, p_signo * p_precio)
+  ON DUPLICATE KEY UPDATE veces_vendido = veces_vendido + VALUES(veces_vendido),
+                          total_ingresos = total_ingresos + VALUES(total_ingresos);
+  DELETE FROM resumen_ventas_libro WHERE id_libro = p_id_libro AND veces_vendido = 0;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE PROCEDURE sp_resumen_aplicar_resena(IN p_id_usuario BIGINT UNSIGNED, IN p_id_libro BIGINT UNSIGNED,
+                                           IN p_calificacion INT, IN p_signo INT)
+BEGIN
+  UPDATE libro
+  SET rating_sum = rating_sum + p_signo * p_calificacion, rating_count = rating_count + p_signo
+  WHERE id_libro = p_id_libro;
+
+  UPDATE usuario
+  SET rating_sum = rating_sum + p_signo * p_calificacion, rating_count = rating_count + p_signo
+  WHERE id_usuario = p_id_usuario;
+END//
+DELIMITER ;
+
+
+-- ===================================
+-- Triggers de orden_compra
+-- ===================================
+
+DELIMITER //
+CREATE TRIGGER trg_orden_resumen_ins
+AFTER INSERT ON orden_compra
+FOR EACH ROW
+BEGIN
+  IF NEW.estado_orden IN ('pagado','enviado','recibido') THEN
+    CALL sp_resumen_aplicar_orden(NEW.id_comprador, NEW.id_libro, NEW.fecha_pago, NEW.precio_total, 1);
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_orden_resumen_upd
+AFTER UPDATE ON orden_compra
+FOR EACH ROW
+BEGIN
+  IF OLD.estado_orden IN ('pagado','enviado','recibido') THEN
+    CALL sp_resumen_aplicar_orden(OLD.id_comprador, OLD.id_libro, OLD.fecha_pago, OLD.precio_total, -1);
+  END IF;
+  IF NEW.estado_orden IN ('pagado','enviado','recibido') THEN
+    CALL sp_resumen_aplicar_orden(NEW.id_comprador, NEW.id_libro, NEW.fecha_pago, NEW.precio_total, 1);
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_orden_resumen_del
+AFTER DELETE ON orden_compra
+FOR EACH ROW
+BEGIN
+  IF OLD.estado_orden IN ('pagado','enviado','recibido') THEN
+    CALL sp_resumen_aplicar_orden(OLD.id_comprador, OLD.id_libro, OLD.fecha_pago, OLD.precio_total, -1);
+  END IF;
+END//
+DELIMITER ;
+
+
+-- ===================================
+-- Triggers de resena
+-- ===================================
+
+DELIMITER //
+CREATE TRIGGER trg_resena_resumen_ins
+AFTER INSERT ON resena
+FOR EACH ROW
+BEGIN
+  CALL sp_resumen_aplicar_resena(NEW.id_usuario, NEW.id_libro, NEW.calificacion, 1);
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_resena_resumen_upd
+AFTER UPDATE ON resena
+FOR EACH ROW
+BEGIN
+  IF NOT (OLD.id_usuario <=> NEW.id_usuario AND OLD.id_libro <=> NEW.id_libro
+          AND OLD.calificacion <=> NEW.calificacion) THEN
+    CALL sp_resumen_aplicar_resena(OLD.id_usuario, OLD.id_libro, OLD.calificacion, -1);
+    CALL sp_resumen_aplicar_resena(NEW.id_usuario, NEW.id_libro, NEW.calificacion, 1);
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_resena_resumen_del
+AFTER DELETE ON resena
+FOR EACH ROW
+BEGIN
+  CALL sp_resumen_aplicar_resena(OLD.id_usuario, OLD.id_libro, OLD.calificacion, -1);
+END//
+DELIMITER ;
+
+
+-- ===================================
+-- Cambios en usuario y libro que afectan los resúmenes
+-- ===================================
+-- Las acciones ON DELETE CASCADE de las FK no disparan triggers, así que las reseñas
+-- borradas en cascada se descuentan antes de borrar el usuario o el libro.
+
+DELIMITER //
+CREATE TRIGGER trg_usuario_resumen_upd
+AFTER UPDATE ON usuario
+FOR EACH ROW
+BEGIN
+  IF NOT (OLD.ciudad <=> NEW.ciudad) THEN
+    -- Mueve las ventas del comprador de la ciudad anterior a la nueva.
+    INSERT INTO resumen_ventas_ciudad_mes (ciudad, ciudad_nula, anio, mes, total_ordenes, total_vendido)
+    SELECT IFNULL(OLD.ciudad, ''), OLD.ciudad IS NULL,
+           IFNULL(YEAR(oc.fecha_pago), 0), IFNULL(MONTH(oc.fecha_pago), 0),
+           -COUNT(*), -SUM(oc.precio_total)
+    FROM orden_compra oc
+    WHERE oc.id_comprador = NEW.id_usuario
+      AND oc.estado_orden IN ('pagado','enviado','recibido')
+    GROUP BY IFNULL(YEAR(oc.fecha_pago), 0), IFNULL(MONTH(oc.fecha_pago), 0)
+    ON DUPLICATE KEY UPDATE total_ordenes = total_ordenes + VALUES(total_ordenes),
+                            total_vendido = total_vendido + VALUES(total_vendido);
+
+    INSERT INTO resumen_ventas_ciudad_mes (ciudad, ciudad_nula, anio, mes, total_ordenes, total_vendido)
+    SELECT IFNULL(NEW.ciudad, ''), NEW.ciudad IS NULL,
+           IFNULL(YEAR(oc.fecha_pago), 0), IFNULL(MONTH(oc.fecha_pago), 0),
+           COUNT(*), SUM(oc.precio_total)
+    FROM orden_compra oc
+    WHERE oc.id_comprador = NEW.id_usuario
+      AND oc.estado_orden IN ('pagado','enviado','recibido')
+    GROUP BY IFNULL(YEAR(oc.fecha_pago), 0), IFNULL(MONTH(oc.fecha_pago), 0)
+    ON DUPLICATE KEY UPDATE total_ordenes = total_ordenes + VALUES(total_ordenes),
+                            total_vendido = total_vendido + VALUES(total_vendido);
+
+    DELETE FROM resumen_ventas_ciudad_mes
+    WHERE ciudad = IFNULL(OLD.ciudad, '') AND ciudad_nula = (OLD.ciudad IS NULL) AND total_ordenes = 0;
+  END IF;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_usuario_resumen_del
+BEFORE DELETE ON usuario
+FOR EACH ROW
+BEGIN
+  UPDATE libro l
+  JOIN (SELECT id_libro, SUM(calificacion) AS suma, COUNT(*) AS total
+        FROM resena
+        WHERE id_usuario = OLD.id_usuario
+        GROUP BY id_libro) r ON r.id_libro = l.id_libro
+  SET l.rating_sum = l.rating_sum - r.suma, l.rating_count = l.rating_count - r.total;
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE TRIGGER trg_libro_resumen_del
+BEFORE DELETE ON libro
+FOR EACH ROW
+BEGIN
+  UPDATE usuario u
+  JOIN (SELECT id_usuario, SUM(calificacion) AS suma, COUNT(*) AS total
+        FROM resena
+        WHERE id_libro = OLD.id_libro
+        GROUP BY id_usuario) r ON r.id_usuario = u.id_usuario
+  SET u.rating_sum = u.rating_sum - r.suma, u.rating_count = u.rating_count - r.total;
+END//
+DELIMITER ;
+
+
+-- ===================================
+-- Reconstrucción completa (reparación)
+-- ===================================
+
+-- Corrige solo las filas de libro/usuario cuyo rating_sum o rating_count no coincide con resena.
+DELIMITER //
+CREATE PROCEDURE sp_reconciliar_calificaciones()
+BEGIN
+  UPDATE libro l
+  LEFT JOIN (SELECT id_libro, SUM(calificacion) AS suma, COUNT(*) AS total
+             FROM resena GROUP BY id_libro) r ON r.id_libro = l.id_libro
+  SET l.rating_sum = IFNULL(r.suma, 0), l.rating_count = IFNULL(r.total, 0)
+  WHERE l.rating_sum <> IFNULL(r.suma, 0) OR l.rating_count <> IFNULL(r.total, 0);
+
+  UPDATE usuario u
+  LEFT JOIN (SELECT id_usuario, SUM(calificacion) AS suma, COUNT(*) AS total
+             FROM resena GROUP BY id_usuario) r ON r.id_usuario = u.id_usuario
+  SET u.rating_sum = IFNULL(r.suma, 0), u.rating_count = IFNULL(r.total, 0)
+  WHERE u.rating_sum <> IFNULL(r.suma, 0) OR u.rating_count <> IFNULL(r.total, 0);
+END//
+DELIMITER ;
+
+DELIMITER //
+CREATE PROCEDURE sp_reconstruir_resumenes()
+BEGIN
+  DELETE FROM resumen_ventas_ciudad_mes;
+  INSERT INTO resumen_ventas_ciudad_mes (ciudad, ciudad_nula, anio, mes, total_ordenes, total_vendido)
+  SELECT IFNULL(u.ciudad, ''), u.ciudad IS NULL,
+         IFNULL(YEAR(oc.fecha_pago), 0), IFNULL(MONTH(oc.fecha_pago), 0),
+         COUNT(*), SUM(oc.precio_total)
+  FROM orden_compra oc
+  JOIN usuario u ON oc.id_comprador = u.id_usuario
+  WHERE oc.estado_orden IN ('pagado','enviado','recibido')
+  GROUP BY IFNULL(u.ciudad, ''), u.ciudad IS NULL, IFNULL(YEAR(oc.fecha_pago), 0), IFNULL(MONTH(oc.fecha_pago), 0);
+
+  DELETE FROM resumen_ventas_libro;
+  INSERT INTO resumen_ventas_libro (id_libro, veces_vendido, total_ingresos)
+  SELECT oc.id_libro, COUNT(*), SUM(oc.precio_total)
+  FROM orden_compra oc
+  WHERE oc.estado_orden IN ('pagado','enviado','recibido')
+  GROUP BY oc.id_libro;
+
+  CALL sp_reconciliar_calificaciones();
+END//
+DELIMITER ;
+
+-- Carga inicial con los datos existentes.
+CALL sp_reconstruir_resumenes();
@@ -0,0 +1,172 @@
+# tablero.py
+"""Ejecuta en paralelo las consultas de reportes.py y arma un reporte combinado.
+
+    python tablero.py                              # 1, 3 y 4 se omiten: piden datos
+    python tablero.py --consultas 1-15 --club 3 --ciudad Cali --termino amor
+    python tablero.py --snapshot --hilos 6 --salida tablero.json
+
+Cada consulta corre en un hilo de un ThreadPoolExecutor acotado, en su propia
+transacción de solo lectura (en una réplica si hay), así un error de la base queda
+en el campo `error` del reporte y el proceso termina con código 1. Con --snapshot
+todas leen la misma foto del primario (ver _abrir_snapshot).
+"""
+import argparse
+import inspect
+import json
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from mysql.connector import Error
+
+import reportes
+from conecction import get_db_connection, POOL_CONFIG
+from cruds import Transaction
+
+HILOS_POR_DEFECTO = 4
+
+
+def _parametros_requeridos(funcion) -> List[str]:
+    return [p.name for p in inspect.signature(funcion).parameters.values()
+            if p.default is inspect.Parameter.empty and p.name != 'tx']
+
+
+def _abrir_snapshot(pila: ExitStack, n: int) -> Tuple[List[Transaction], str]:
+    """Abre `n` transacciones de solo lectura que ven la misma foto de la base.
+
+    FLUSH TABLES WITH READ LOCK frena las escrituras mientras cada conexión arranca
+    su START TRANSACTION WITH CONSISTENT SNAPSHOT; después se libera el candado (el
+    mismo truco de los respaldos paralelos). Requiere el privilegio RELOAD: sin él,
+    cada conexión toma su propia foto al arrancar y el tipo retornado es 'por_conexion'.
+    """
+    candado = get_db_connection()
+    if not candado:
+        raise Error(msg="No se pudo obtener una conexión para el snapshot")
+    tipo = 'global'
+    cursor = candado.cursor()
+    try:
+        try:
+            cursor.execute("FLUSH TABLES WITH READ LOCK")
+        except Error as e:
+            print(f"⚠️ Sin FLUSH TABLES WITH READ LOCK ({e}); cada conexión tendrá su propia foto.")
+            tipo = 'por_conexion'
+        transacciones = [pila.enter_context(Transaction(isolation_level='REPEATABLE READ', read_only=True,
+                                                         consistent_snapshot=True))
+                         for _ in range(n)]
+    finally:
+        if tipo == 'global':
+            cursor.execute("UNLOCK TABLES")
+        cursor.close()
+        candado.close()
+    return transacciones, tipo
+
+
+def _ejecutar_uno(numero: int, parametros: Dict[str, Any], transacciones: Optional['queue.Queue']) -> Dict[str, Any]:
+    titulo, funcion = reportes.REPORTES[numero]
+    compartida = transacciones.get() if transacciones is not None else None
+    inicio = time.perf_counter()
+    try:
+        if compartida is not None:
+            datos = funcion(tx=compartida, **parametros)
+        else:
+            # Sin tx, execute_query imprime el error y retorna []: el reporte pasaría por vacío.
+            # En una réplica, como las lecturas sueltas (el snapshot sí necesita el primario).
+            with Transaction(read_only=True, use_replica=True) as tx:
+                datos = funcion(tx=tx, **parametros)
+        error = None
+    except (Error, ValueError) as e:
+        datos, error = [], str(e)
+    finally:
+        if compartida is not None:
+            transacciones.put(compartida)
+    return {
+        'titulo': titulo,
+        'parametros': parametros,
+        'segundos': round(time.perf_counter() - inicio, 4),
+        'filas': len(datos) if isinstance(datos, list) else 0,
+        'error': error,
+        'datos': datos,
+    }
+
+
+def ejecutar_reportes(numeros: Iterable[int] = range(1, 16), parametros: Optional[Dict[str, Any]] = None,
+                      hilos: int = HILOS_POR_DEFECTO, snapshot: bool = False) -> Dict[str, Any]:
+    """Corre las consultas `numeros` en paralelo y retorna el reporte combinado.
+
+    `parametros` tiene los valores que piden algunas consultas (id_club, ciudad,
+    termino, filtro_club...); a cada consulta se le pasan solo los que acepta. Las que
+    necesitan un valor que no está se marcan como omitidas.
+    """
+    parametros = parametros or {}
+    hilos = max(1, min(hilos, POOL_CONFIG['pool_size'] + POOL_CONFIG['max_overflow'] - 1))
+    informe = {'fecha': datetime.now().isoformat(timespec='seconds'), 'hilos': hilos,
+               'snapshot': None, 'reportes': {}, 'omitidos': {}}
+
+    trabajos = {}
+    for numero in sorted(set(numeros)):
+        if numero not in reportes.REPORTES:
+            raise ValueError(f"No existe la consulta {numero}")
+        funcion = reportes.REPORTES[numero][1]
+        faltan = [p for p in _parametros_requeridos(funcion) if p not in parametros]
+        if faltan:
+            informe['omitidos'][numero] = f"falta(n): {', '.join(faltan)}"
+            continue
+        aceptados = inspect.signature(funcion).parameters
+        trabajos[numero] = {k: v for k, v in parametros.items() if k in aceptados and k != 'tx'}
+
+    hilos = min(hilos, len(trabajos)) or 1
+    inicio = time.perf_counter()
+    with ExitStack() as pila:
+        transacciones = None
+        if snapshot and trabajos:
+            abiertas, informe['snapshot'] = _abrir_snapshot(pila, hilos)
+            transacciones = queue.Queue()
+            for tx in abiertas:
+                transacciones.put(tx)
+
+        with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='reporte') as ejecutor:
+            futuros = {n: ejecutor.submit(_ejecutar_uno, n, p, transacciones) for n, p in trabajos.items()}
+            for numero, futuro in futuros.items():
+                informe['reportes'][numero] = futuro.result()
+
+    informe['segundos_total'] = round(time.perf_counter() - inicio, 4)
+    informe['suma_segundos'] = round(sum(r['segundos'] for r in informe['reportes'].values()), 4)
+    return informe
+
+
+def imprimir_resumen(informe: Dict[str, Any]):
+    print(f"\n=== TABLERO {informe['fecha']} (hilos: {informe['hilos']}, snapshot: {informe['snapshot']}) ===")
+    for numero, r in informe['reportes'].items():
+        estado = f"❌ {r['error']}" if r['error'] else f"{r['filas']} filas"
+        print(f"{numero:>3}. {r['titulo']:<45} {r['segundos'] * 1000:>9.1f} ms  {estado}")
+    for numero, motivo in informe['omitidos'].items():
+        print(f"{numero:>3}. (omitida: {motivo})")
+    print(f"Tiempo total: {informe['segundos_total']:.3f} s "
+          f"(en serie habría sido ~{informe['suma_segundos']:.3f} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecuta las consultas de la Entrega 3 en paralelo.")
+    parser.add_argument("--consultas", default="1-15", help="p.ej. 1-15 o 2,5,9")
+    parser.add_argument("--hilos", type=int, default=HILOS_POR_DEFECTO)
+    parser.add_argument("--snapshot", action="store_true", help="Todas las consultas ven la misma foto.")
+    parser.add_argument("--club", type=int, dest="id_club")
+    parser.add_argument("--ciudad")
+    parser.add_argument("--filtro-club", dest="filtro_club")
+    parser.add_argument("--termino")
+    parser.add_argument("--salida", help="Archivo JSON del reporte combinado.")
+    args = parser.parse_args()
+
+    valores = {k: getattr(args, k) for k in ('id_club', 'ciudad', 'filtro_club', 'termino')
+               if getattr(args, k) is not None}
+    informe = ejecutar_reportes(reportes.rango_consultas(args.consultas), valores, args.hilos, args.snapshot)
+    imprimir_resumen(informe)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False, default=str)
+        print(f"✅ Reporte guardado en {args.salida}")
+    sys.exit(1 if any(r['error'] for r in informe['reportes'].values()) else 0)
@@ -0,0 +1,76 @@
+# tests/test_cruds_async.py
+"""Prueba de humo de cruds_async contra un MySQL local (DB_CONFIG de conecction.py).
+
+    python -m unittest tests.test_cruds_async
+
+Se salta si aiomysql no está instalado o si no hay servidor. Todo lo que escribe
+ocurre dentro de una AsyncTransaction que se deshace al final.
+"""
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+try:
+    import cruds_async
+except ImportError:  # sin mysql-connector no se puede importar cruds.py
+    cruds_async = None
+
+
+class _Deshacer(Exception):
+    """Sale del bloque de la transacción para que haga rollback."""
+
+
+@unittest.skipIf(aiomysql is None or cruds_async is None, "requiere aiomysql y mysql-connector")
+class PruebaHumoCrudsAsync(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        try:
+            await cruds_async.get_async_pool()
+        except Exception as e:
+            self.skipTest(f"sin MySQL local: {e}")
+
+    async def asyncTearDown(self):
+        await cruds_async.close_async_pool()
+
+    async def test_execute_query(self):
+        fila = await cruds_async.execute_query("SELECT 1 AS uno", fetch_one=True)
+        self.assertEqual(fila, {'uno': 1})
+        filas = await cruds_async.execute_query("SELECT 1 AS uno", formato='tupla')
+        self.assertEqual(filas.columnas, ('uno',))
+        self.assertEqual(list(filas), [(1,)])
+
+    async def test_crud_y_carga_masiva_en_transaccion(self):
+        sufijo = time.time_ns()
+        with self.assertRaises(_Deshacer):
+            async with cruds_async.AsyncTransaction() as tx:
+                email = f"async.{sufijo}@prueba.local"
+                id_usuario = await cruds_async.crear_usuario("Prueba", email, 'x', 'Cali', '3000000000', tx=tx)
+                filas = await cruds_async.leer_usuarios(campo='email', valor=email, tx=tx, fields=['email'])
+                self.assertEqual(filas, [{'id_usuario': id_usuario, 'email': email}])
+
+                resultado = await cruds_async.crear_usuario_bulk(
+                    [{'nombre': f"Prueba {i}", 'email': f"async.{sufijo}.{i}@prueba.local", 'password_hash': 'x',
+                      'ciudad': 'Cali', 'telefono': '3000000000'} for i in range(3)], tx=tx)
+                self.assertEqual(resultado['filas_insertadas'], 3)
+                self.assertEqual(resultado['errores'], [])
+                raise _Deshacer
+
+    async def test_campo_invalido(self):
+        with self.assertRaises(ValueError):
+            await cruds_async.leer_usuarios(campo='1 = 1 OR id_usuario', valor='1')
+
+    async def test_buscar_libros(self):
+        self.assertEqual(await cruds_async.buscar_libros('   '), [])
+        self.assertIsInstance(await cruds_async.buscar_libros('sombra viento'), list)
+
+
+if __name__ == "__main__":
+    unittest.main()